@@ -224,7 +224,7 @@ class MainActivity : AppCompatActivity() {
                     )
                     
                     val deferreds = types.map { (type, version) ->
-                        async { if (version != null) repository.downloadAndPrepare(type, version) else true }
+                        async { if (version != null) repository.downloadAndPrepare(type, version, serverVersions.delta?.get(type)) else true }
                     }
                     
                     val results = deferreds.awaitAll()
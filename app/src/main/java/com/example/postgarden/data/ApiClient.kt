@@ -10,7 +10,14 @@ import okhttp3.Request
 data class LatestVersions(
     val home: String? = null,
     val world: String? = null,
-    val entertainment: String? = null
+    val entertainment: String? = null,
+    // Per-section delta packages: only usable when the local version equals `base`
+    val delta: Map<String, DeltaPackage>? = null
+)
+
+data class DeltaPackage(
+    val base: String? = null,
+    val file: String? = null
 )
 
 class ApiClient {
@@ -12,7 +12,8 @@ data class PolishedNewsItem(
     @SerializedName("source_platform") val sourcePlatform: String? = "",
     @SerializedName("source_url") val sourceUrl: String? = "",
     @SerializedName("image") val imagePath: String? = "",
-    @SerializedName("summary") var summary: String? = ""
+    @SerializedName("summary") var summary: String? = "",
+    @SerializedName("hash") val hash: String? = null
 ) {
     // This will be set dynamically after parsing to point to local file
     var localImageFile: File? = null
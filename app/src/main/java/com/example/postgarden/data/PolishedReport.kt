@@ -6,3 +6,16 @@ data class PolishedReport(
     @SerializedName("timestamp") val timestamp: String? = null,
     @SerializedName("news") val news: List<PolishedNewsItem> = emptyList()
 )
+
+data class DeltaEntry(
+    @SerializedName("rank") val rank: Int = 0,
+    @SerializedName("hash") val hash: String? = null
+)
+
+// delta.json inside a delta package: full item order + only the items the base version lacked
+data class DeltaReport(
+    @SerializedName("base") val base: String? = null,
+    @SerializedName("timestamp") val timestamp: String? = null,
+    @SerializedName("order") val order: List<DeltaEntry> = emptyList(),
+    @SerializedName("news") val news: List<PolishedNewsItem> = emptyList()
+)
@@ -22,6 +22,10 @@ data class CachedReport(
 
 class ReportRepository(private val context: Context) {
 
+    companion object {
+        private const val DELTA_JSON = "delta.json"
+    }
+
     private val gson = Gson()
     private val client = OkHttpClient()
     
@@ -82,34 +86,19 @@ class ReportRepository(private val context: Context) {
         return@withContext false
     }
 
-    suspend fun downloadAndPrepare(type: String, zipFilename: String): Boolean = withContext(Dispatchers.IO) {
-        val url = "${ApiClient.BASE_URL}/$zipFilename"
-        val zipFile = File(dataDir, zipFilename)
+    suspend fun downloadAndPrepare(type: String, zipFilename: String, delta: DeltaPackage? = null): Boolean = withContext(Dispatchers.IO) {
         val typeExtractedDir = File(extractedDir, type)
         
         try {
-            val request = Request.Builder().url(url).build()
-            val response = client.newCall(request).execute()
-            if (!response.isSuccessful) return@withContext false
-            
-            val source = response.body?.byteStream() ?: return@withContext false
-            zipFile.outputStream().use { output -> source.copyTo(output) }
-            
-            if (typeExtractedDir.exists()) typeExtractedDir.deleteRecursively()
-            typeExtractedDir.mkdirs()
-            
-            ZipInputStream(BufferedInputStream(zipFile.inputStream())).use { zis ->
-                var entry = zis.nextEntry
-                while (entry != null) {
-                    val file = File(typeExtractedDir, entry.name)
-                    if (entry.isDirectory) {
-                        file.mkdirs()
-                    } else {
-                        file.parentFile?.mkdirs()
-                        FileOutputStream(file).use { fos -> zis.copyTo(fos) }
-                    }
-                    entry = zis.nextEntry
-                }
+            // Prefer the delta package when the local copy is exactly its base version
+            val deltaApplied = delta != null && applyDelta(type, delta)
+            if (!deltaApplied) {
+                val zipFile = downloadFile(zipFilename) ?: return@withContext false
+                
+                if (typeExtractedDir.exists()) typeExtractedDir.deleteRecursively()
+                typeExtractedDir.mkdirs()
+                
+                unzip(zipFile, typeExtractedDir)
             }
             
             File(typeExtractedDir, "version.txt").writeText(zipFilename)
@@ -199,6 +188,98 @@ class ReportRepository(private val context: Context) {
         }
     }
 
+    private fun downloadFile(filename: String): File? {
+        val request = Request.Builder().url("${ApiClient.BASE_URL}/$filename").build()
+        val response = client.newCall(request).execute()
+        if (!response.isSuccessful) return null
+        
+        val source = response.body?.byteStream() ?: return null
+        val file = File(dataDir, filename)
+        file.outputStream().use { output -> source.copyTo(output) }
+        return file
+    }
+
+    private fun unzip(zipFile: File, targetDir: File) {
+        ZipInputStream(BufferedInputStream(zipFile.inputStream())).use { zis ->
+            var entry = zis.nextEntry
+            while (entry != null) {
+                val file = File(targetDir, entry.name)
+                if (entry.isDirectory) {
+                    file.mkdirs()
+                } else {
+                    file.parentFile?.mkdirs()
+                    FileOutputStream(file).use { fos -> zis.copyTo(fos) }
+                }
+                entry = zis.nextEntry
+            }
+        }
+    }
+
+    /**
+     * Delta package = ordered item hashes + only the items/images the base version lacked.
+     * Unchanged items (including their fetched summaries) are reused from the local report.
+     * Returns false whenever the delta cannot be applied, so the caller falls back to the full package.
+     */
+    private fun applyDelta(type: String, delta: DeltaPackage): Boolean {
+        val typeDir = File(extractedDir, type)
+        val deltaFilename = delta.file ?: return false
+        val versionFile = File(typeDir, "version.txt")
+        if (!versionFile.exists() || versionFile.readText().trim() != delta.base) return false
+        val oldJsonFile = typeDir.listFiles()
+            ?.firstOrNull { it.isFile && it.name.startsWith("polished_") && it.name.endsWith(".json") }
+            ?: return false
+        
+        val stagingDir = File(dataDir, "delta_$type")
+        try {
+            val deltaZip = downloadFile(deltaFilename) ?: return false
+            if (stagingDir.exists()) stagingDir.deleteRecursively()
+            stagingDir.mkdirs()
+            unzip(deltaZip, stagingDir)
+            
+            val deltaReport = gson.fromJson(File(stagingDir, DELTA_JSON).readText(), DeltaReport::class.java)
+            val oldReport = gson.fromJson(oldJsonFile.readText(), PolishedReport::class.java)
+            val known = (oldReport.news + deltaReport.news)
+                .filter { !it.hash.isNullOrEmpty() }
+                .associateBy { it.hash }
+            val news = deltaReport.order.map { entry ->
+                val item = known[entry.hash] ?: run {
+                    Log.w("ReportRepository", "Delta for $type misses item ${entry.hash}, using full package")
+                    return false
+                }
+                item.copy(rank = entry.rank)
+            }
+            
+            // New images first, then swap the report JSON
+            stagingDir.walk().filter { it.isFile && it.name != DELTA_JSON }.forEach { file ->
+                val target = File(typeDir, file.relativeTo(stagingDir).path)
+                target.parentFile?.mkdirs()
+                file.copyTo(target, overwrite = true)
+            }
+            val newJsonFile = File(typeDir, "polished_all_${deltaReport.timestamp}.json")
+            val tmpJsonFile = File(typeDir, "${newJsonFile.name}.tmp")
+            tmpJsonFile.writeText(gson.toJson(PolishedReport(timestamp = deltaReport.timestamp, news = news)))
+            oldJsonFile.delete()
+            if (!tmpJsonFile.renameTo(newJsonFile)) return false
+            
+            pruneImages(typeDir, news)
+            return true
+        } catch (e: Exception) {
+            Log.e("ReportRepository", "Error applying delta for $type", e)
+            return false
+        } finally {
+            stagingDir.deleteRecursively()
+        }
+    }
+
+    private fun pruneImages(typeDir: File, news: List<PolishedNewsItem>) {
+        // Keep referenced images and their extra sizes/formats (same stem)
+        val stems = news.mapNotNull { it.imagePath?.takeIf { path -> path.isNotEmpty() }?.substringBeforeLast('.') }
+        File(typeDir, "images").walk().filter { it.isFile }.forEach { file ->
+            val relativePath = file.relativeTo(typeDir).invariantSeparatorsPath
+            if (stems.none { relativePath.startsWith(it) }) file.delete()
+        }
+    }
+
     private fun cleanupOldArchives() {
         val now = System.currentTimeMillis()
         val threeDaysMillis = 3L * 24 * 60 * 60 * 1000
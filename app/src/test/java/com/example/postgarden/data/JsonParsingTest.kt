@@ -47,4 +47,58 @@ class JsonParsingTest {
         assertEquals("images/1.jpg", item1.imagePath)
         assertEquals("https://huangtm23.github.io/PostGarden/images/1.jpg", item1.fullImageUrl)
     }
+
+    @Test
+    fun testParseLatestVersionsWithDelta() {
+        val json = """
+            {
+              "home": "Home_20260102_000000.zip",
+              "world": "World_20260102_000000.zip",
+              "delta": {
+                "home": {
+                  "base": "Home_20260101_000000.zip",
+                  "file": "Home_20260102_000000_delta.zip"
+                }
+              }
+            }
+        """
+
+        val versions = Gson().fromJson(json, LatestVersions::class.java)
+
+        assertEquals("Home_20260102_000000.zip", versions.home)
+        assertEquals(null, versions.entertainment)
+        assertEquals("Home_20260101_000000.zip", versions.delta?.get("home")?.base)
+        assertEquals("Home_20260102_000000_delta.zip", versions.delta?.get("home")?.file)
+        assertEquals(null, versions.delta?.get("world"))
+    }
+
+    @Test
+    fun testParseDeltaReport() {
+        val json = """
+            {
+              "base": "Home_20260101_000000.zip",
+              "timestamp": "20260102_000000",
+              "order": [
+                {"rank": 0, "hash": "74a18103fb74e2ff"},
+                {"rank": 1, "hash": "1f64c03e014beddf"}
+              ],
+              "news": [
+                {
+                  "rank": 1,
+                  "title": "News Title",
+                  "image": "images/e98ca11f09ebcca3.jpg",
+                  "hash": "1f64c03e014beddf"
+                }
+              ]
+            }
+        """
+
+        val delta = Gson().fromJson(json, DeltaReport::class.java)
+
+        assertEquals(2, delta.order.size)
+        assertEquals("74a18103fb74e2ff", delta.order[0].hash)
+        assertEquals(1, delta.news.size)
+        assertEquals("1f64c03e014beddf", delta.news[0].hash)
+        assertEquals("images/e98ca11f09ebcca3.jpg", delta.news[0].imagePath)
+    }
 }
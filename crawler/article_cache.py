@@ -0,0 +1,163 @@
+"""
+跨运行的文章详情缓存
+- 以规范化后的 source_url 为键，保存详情页提取结果（title/content/image/source_platform）
+  以及 ETag / Last-Modified
+- TTL 内直接使用缓存（不发请求）；过期后用条件请求重新验证，304 即续期复用
+- 长期未使用的条目过期淘汰，条目数超过上限时按最近使用时间（LRU）淘汰
+"""
+
+import atexit
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import state_store
+
+# 缓存文件（CI 中通过 actions/cache 在两次运行间保留）
+CACHE_FILE = os.getenv("ARTICLE_CACHE_FILE", os.path.join(".cache", "articles", "index.json"))
+# 抓取后多久内直接复用（秒），之后需要条件请求重新验证
+TTL = float(os.getenv("ARTICLE_CACHE_TTL_HOURS", "24")) * 3600
+# 超过该时间未使用的条目直接淘汰（秒）
+MAX_IDLE = int(os.getenv("ARTICLE_CACHE_MAX_IDLE_DAYS", "7")) * 24 * 3600
+# 条目数上限
+MAX_ENTRIES = int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", "2000"))
+# 设为 0 关闭缓存
+ENABLED = os.getenv("ARTICLE_CACHE", "1") != "0"
+
+# 规范化 URL 时去掉的跟踪参数
+TRACKING_PARAMS = ("utm_", "spm", "from", "share", "fbclid", "gclid", "at_medium", "at_campaign")
+FIELDS = ("title", "content", "image", "source_platform")
+
+_lock = threading.Lock()
+_entries = None
+_dirty = False
+
+def canonical_url(url):
+    """小写协议与域名、去掉片段与跟踪参数、统一末尾斜杠"""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+def _load():
+    """按需加载：{canonical_url: {title, content, image, source_platform, etag, last_modified, fetched_at, last_used}}"""
+    global _entries
+    if _entries is None:
+        data = state_store.read(CACHE_FILE, default=dict)
+        _entries = data if isinstance(data, dict) else {}
+    return _entries
+
+def _usable(entry):
+    """没有正文的条目（旧版本写入的提取失败结果）视为未缓存"""
+    return bool(entry and entry.get("content"))
+
+def _fields(entry):
+    return {field: entry.get(field, "") for field in FIELDS}
+
+def get(url):
+    """
+    TTL 内的缓存结果
+    :return: 字段 dict；未命中或已过期返回 None
+    """
+    if not ENABLED:
+        return None
+    with _lock:
+        entry = _load().get(canonical_url(url))
+        if not _usable(entry) or time.time() - entry.get("fetched_at", 0) > TTL:
+            return None
+        entry["last_used"] = time.time()
+        _mark_dirty()
+        print(f"    [✓] 文章缓存命中，跳过详情页: {url[:80]}")
+        return _fields(entry)
+
+def conditional_headers(url):
+    """已过期条目的条件请求头（没有缓存时为空）"""
+    if not ENABLED:
+        return {}
+    with _lock:
+        entry = _load().get(canonical_url(url))
+    headers = {}
+    if _usable(entry):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def revalidated(url, response):
+    """
+    条件请求返回 304：续期并返回缓存结果
+    :return: 字段 dict；没有对应条目时返回 None（调用方按普通响应处理）
+    """
+    if not ENABLED:
+        return None
+    with _lock:
+        entry = _load().get(canonical_url(url))
+        if not _usable(entry):
+            return None
+        now = time.time()
+        entry["fetched_at"] = now
+        entry["last_used"] = now
+        entry["etag"] = response.headers.get("ETag", entry.get("etag", ""))
+        entry["last_modified"] = response.headers.get("Last-Modified", entry.get("last_modified", ""))
+        _mark_dirty()
+    print(f"    [✓] 文章未变化 (304)，复用缓存: {url[:80]}")
+    return _fields(entry)
+
+def store(url, fields, response=None):
+    """
+    写入提取结果（调用方只在标题与正文都提取成功时写入）
+    正文为空的结果不缓存，并删除该 URL 的旧条目：版式变化、同意页/跳转页下次运行重新抓取
+    :param fields: title/content/image/source_platform（缺省为空字符串）
+    :param response: 详情页响应（记录 ETag / Last-Modified）
+    """
+    if not ENABLED:
+        return
+    if not (fields.get("content") or "").strip():
+        with _lock:
+            if _load().pop(canonical_url(url), None) is not None:
+                _mark_dirty()
+        return
+    now = time.time()
+    entry = {field: fields.get(field) or "" for field in FIELDS}
+    entry["etag"] = response.headers.get("ETag", "") if response is not None else ""
+    entry["last_modified"] = response.headers.get("Last-Modified", "") if response is not None else ""
+    entry["fetched_at"] = now
+    entry["last_used"] = now
+    with _lock:
+        _load()[canonical_url(url)] = entry
+        _mark_dirty()
+
+def _mark_dirty():
+    global _dirty
+    _dirty = True
+
+def _evict():
+    """淘汰长期未使用与超出数量上限的条目（调用方持锁）"""
+    global _entries
+    now = time.time()
+    kept = {url: entry for url, entry in _entries.items() if now - entry.get("last_used", 0) <= MAX_IDLE}
+    if len(kept) > MAX_ENTRIES:
+        by_recency = sorted(kept.items(), key=lambda pair: pair[1].get("last_used", 0), reverse=True)
+        kept = dict(by_recency[:MAX_ENTRIES])
+    evicted = len(_entries) - len(kept)
+    _entries = kept
+    return evicted
+
+def flush():
+    """淘汰并写回（流水线结束时调用，同时注册 atexit 兜底）"""
+    global _dirty
+    if not ENABLED:
+        return
+    with _lock:
+        if _entries is None or not _dirty:
+            return
+        evicted = _evict()
+        state_store.write(CACHE_FILE, _entries)
+        _dirty = False
+        count = len(_entries)
+    print(f"    [✓] 文章缓存已保存: {count} 篇" + (f", 淘汰 {evicted} 篇" if evicted else ""))
+
+atexit.register(flush)
@@ -0,0 +1,90 @@
+"""
+HTML 解析后端微基准
+- 在保存的页面上对比 html.parser / lxml / html5lib（已安装的才测）
+- 每个后端分别测整页解析和 SoupStrainer 局部解析
+用法：
+    python crawler/benchmarks/bench_parsers.py [页面文件或目录 ...] [--repeat N]
+    未指定时使用 crawler/benchmarks/fixtures 下的所有 .html 文件
+"""
+
+import argparse
+import glob
+import importlib.util
+import os
+import sys
+import time
+
+# 公共模块（html_parser 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import html_parser
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BACKENDS = ["html.parser", "lxml", "html5lib"]
+
+# 与各抓取器详情页使用的 SoupStrainer 一致
+STRAINER = html_parser.only_tags('h1', 'h2', 'h3', 'article', 'main', 'section', 'p', 'meta')
+
+def available_backends():
+    """只返回已安装的解析后端"""
+    backends = []
+    for name in BACKENDS:
+        if name == "html.parser" or importlib.util.find_spec(name) is not None:
+            backends.append(name)
+    return backends
+
+def collect_pages(paths):
+    """展开文件/目录参数为 HTML 文件列表"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", "*.html"), recursive=True)))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+def time_parse(markup, backend, parse_only, repeat):
+    """返回单次解析的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        html_parser.make_soup(markup, parse_only=parse_only, parser=backend)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 解析后端微基准")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_FIXTURES], help="HTML 文件或目录")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数")
+    args = parser.parse_args()
+
+    pages = collect_pages(args.paths)
+    if not pages:
+        print(f"[!] 未找到 HTML 页面: {', '.join(args.paths)}")
+        return 1
+
+    backends = available_backends()
+    print(f"默认后端: {html_parser.PARSER}  可用后端: {', '.join(backends)}")
+    print(f"{'页面':<40} {'大小KB':>8} " + " ".join(f"{b:>14} {b + '+S':>16}" for b in backends))
+
+    totals = {(b, s): 0.0 for b in backends for s in (False, True)}
+    for path in pages:
+        with open(path, "rb") as f:
+            markup = f.read()
+        row = f"{os.path.basename(path)[:40]:<40} {len(markup) / 1024:>8.1f} "
+        cells = []
+        for backend in backends:
+            for strained in (False, True):
+                ms = time_parse(markup, backend, STRAINER if strained else None, args.repeat)
+                totals[(backend, strained)] += ms
+                width = 16 if strained else 14
+                cells.append(f"{ms:>{width}.1f}")
+        print(row + " ".join(cells))
+
+    print("-" * 60)
+    baseline = totals[("html.parser", False)]
+    for (backend, strained), ms in totals.items():
+        label = backend + (" + SoupStrainer" if strained else "")
+        speedup = baseline / ms if ms else 0
+        print(f"{label:<30} 总计 {ms:>9.1f} ms  (x{speedup:.2f} vs html.parser)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+录制的响应夹具（fixtures）
+- 每个响应按 (方法, URL) 存为一个文件：fixtures/<host>/<sha1>.<ext>
+- fixtures/index.json 记录状态码、Content-Type、最终 URL 与文件位置
+- 浏览器页面（Selenium）以渲染后的 HTML 存储，方法记为 BROWSER
+"""
+
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+INDEX_FILENAME = "index.json"
+# 浏览器渲染页面使用的伪方法名（与同一 URL 的 HTTP 响应分开存放）
+BROWSER_METHOD = "BROWSER"
+
+# Content-Type -> 文件扩展名（便于直接用 bench_parsers.py 等工具查看）
+EXTENSIONS = {
+    "text/html": ".html",
+    "application/json": ".json",
+    "text/plain": ".txt",
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+def fixture_key(method, url):
+    return f"{method.upper()} {url}"
+
+def _extension(content_type):
+    mime = (content_type or "").split(";")[0].strip().lower()
+    return EXTENSIONS.get(mime, ".bin")
+
+class FixtureStore:
+    """按 URL 存取录制响应的目录"""
+
+    def __init__(self, root=DEFAULT_FIXTURES_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def save(self, method, url, body, status=200, content_type="", final_url=None):
+        """
+        保存一个响应（同一 URL 重复录制时覆盖）
+        :param body: 响应体 bytes
+        :param final_url: 重定向后的 URL，默认同 url
+        """
+        key = fixture_key(method, url)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        host = urlsplit(url).netloc.lower() or "_"
+        rel_path = f"{host}/{digest}{_extension(content_type)}"
+        abs_path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        with open(abs_path, 'wb') as f:
+            f.write(body)
+        with self._lock:
+            self.index[key] = {
+                "file": rel_path,
+                "status": status,
+                "content_type": content_type,
+                "final_url": final_url or url,
+                "size": len(body),
+            }
+
+    def lookup(self, method, url):
+        """
+        查找录制的响应
+        :return: (meta, body)；未录制返回 (None, None)
+        """
+        meta = self.index.get(fixture_key(method, url))
+        if meta is None:
+            return None, None
+        with open(os.path.join(self.root, meta["file"]), 'rb') as f:
+            return meta, f.read()
+
+    def entries(self, method=None, host=None, content_type=None):
+        """
+        按条件列出录制的 (url, meta)
+        :param method: "GET" / BROWSER_METHOD
+        :param host: 只返回该 host 的响应
+        :param content_type: Content-Type 前缀，如 "text/html"
+        """
+        for key, meta in self.index.items():
+            key_method, url = key.split(" ", 1)
+            if method and key_method != method:
+                continue
+            if host and urlsplit(url).netloc.lower() != host:
+                continue
+            if content_type and not (meta.get("content_type") or "").startswith(content_type):
+                continue
+            yield url, meta
+
+    def read(self, meta):
+        with open(os.path.join(self.root, meta["file"]), 'rb') as f:
+            return f.read()
+
+    def flush(self):
+        """写回 index.json"""
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=2, sort_keys=True)
@@ -0,0 +1,89 @@
+"""
+录制真实响应到 fixtures/
+- 在线运行各抓取入口，http_client 的所有响应与浏览器渲染后的页面都写入夹具目录
+- 随后下载抓取结果中的封面图，供 package_section 离线回放
+用法：
+    python crawler/benchmarks/record.py [--only baidu cnn ...] [--count 9] [--fixtures DIR]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import targets
+import article_cache
+import browser_pool
+import http_client
+import image_cache
+import image_utils
+from fixtures import DEFAULT_FIXTURES_DIR, FixtureStore
+from replay_driver import RecordingDriver
+
+def make_response_recorder(store):
+    """http_client 响应回调：保存响应体、状态码、Content-Type 与最终 URL"""
+    def _record(method, url, response):
+        store.save(method, url, response.content,
+                   status=response.status_code,
+                   content_type=response.headers.get("Content-Type", ""),
+                   final_url=response.url)
+    return _record
+
+def make_driver_factory(store):
+    """浏览器池工厂：真实 Chrome 外包一层 RecordingDriver"""
+    def _factory():
+        driver = browser_pool.create_driver()
+        return RecordingDriver(driver, store) if driver is not None else None
+    return _factory
+
+def record_images(results):
+    """下载抓取结果中的封面图（响应由回调录制）"""
+    urls = {item.get("image") for items in results.values() for item in items}
+    urls = [url for url in urls if url and url.startswith("http")]
+    print(f"\n[*] 录制封面图 {len(urls)} 张...")
+    for url in urls:
+        image_utils.download_image(url, None)
+
+def main():
+    parser = argparse.ArgumentParser(description="录制抓取响应")
+    parser.add_argument("--only", nargs="*", help="只录制指定抓取入口（默认全部）")
+    parser.add_argument("--count", type=int, default=9, help="每个抓取入口的数量")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="夹具目录")
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    # 命中文章/图片缓存时不会发请求（图片只发条件请求），录制时必须关闭
+    article_cache.ENABLED = False
+    image_cache.ENABLED = False
+    recorder = make_response_recorder(store)
+    http_client.add_response_hook(recorder)
+    browser_pool.set_driver_factory(make_driver_factory(store))
+
+    results = {}
+    try:
+        for name, module_name, func_name, _ in targets.select(args.only):
+            print(f"\n{'=' * 40}\n[*] 录制 {name}\n{'=' * 40}")
+            start = time.time()
+            try:
+                results[name] = targets.load(module_name, func_name)(args.count) or []
+            except Exception as e:
+                print(f"[!] {name} 录制失败: {type(e).__name__} - {e}")
+                results[name] = []
+            print(f"[✓] {name}: {len(results[name])} 条，耗时 {time.time() - start:.1f}s")
+        record_images(results)
+    finally:
+        # 关闭浏览器时保存最后停留的页面
+        browser_pool.shutdown()
+        http_client.remove_response_hook(recorder)
+        store.flush()
+
+    # 保存抓取结果，便于对比回放输出
+    results_path = os.path.join(args.fixtures, "results.json")
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n[✓] 已录制 {len(store.index)} 条响应 -> {args.fixtures}")
+
+if __name__ == "__main__":
+    main()
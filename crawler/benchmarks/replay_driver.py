@@ -0,0 +1,171 @@
+"""
+Selenium 录制/回放 driver
+- RecordingDriver：包装真实 Chrome，离开页面（跳转、归还浏览器池、退出）前保存渲染后的 HTML
+- ReplayDriver：从回放服务器读取渲染后的 HTML，用 lxml 实现抓取器用到的 WebDriver 接口子集
+  (get / page_source / title / current_url / find_element(s) / execute_script / execute_cdp_cmd)
+"""
+
+import os
+import sys
+from urllib.parse import quote, urljoin
+
+from lxml import html as lxml_html
+from selenium.common.exceptions import NoSuchElementException
+
+try:
+    from lxml.cssselect import CSSSelector
+    CSSSELECT_AVAILABLE = True
+except ImportError:
+    CSSSELECT_AVAILABLE = False
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+from fixtures import BROWSER_METHOD
+
+BLANK_URL = "about:blank"
+BLANK_PAGE = "<html><head></head><body></body></html>"
+PAGE_CONTENT_TYPE = "text/html; charset=utf-8"
+
+def _find_all(root, base_url, by, value):
+    """在 lxml 元素下按 Selenium 定位方式查找，返回 ReplayElement 列表"""
+    if by == "xpath":
+        nodes = root.xpath(value)
+    elif by == "css selector":
+        if not CSSSELECT_AVAILABLE:
+            raise RuntimeError("回放 CSS 选择器需要 cssselect: pip install cssselect")
+        nodes = CSSSelector(value)(root)
+    elif by == "tag name":
+        nodes = root.xpath(f".//{value}")
+    elif by == "id":
+        nodes = root.xpath(f".//*[@id='{value}']")
+    elif by == "class name":
+        nodes = root.xpath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {value} ')]")
+    else:
+        raise ValueError(f"回放 driver 不支持的定位方式: {by}")
+    return [ReplayElement(node, base_url) for node in nodes if isinstance(node, lxml_html.HtmlElement)]
+
+def _find_one(root, base_url, by, value):
+    elements = _find_all(root, base_url, by, value)
+    if not elements:
+        raise NoSuchElementException(f"{by}={value}")
+    return elements[0]
+
+class ReplayElement:
+    """WebElement 的只读替身"""
+
+    def __init__(self, node, base_url):
+        self._node = node
+        self._base_url = base_url
+
+    @property
+    def tag_name(self):
+        return self._node.tag
+
+    @property
+    def text(self):
+        lines = (line.strip() for line in self._node.text_content().splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def get_attribute(self, name):
+        value = self._node.get(name)
+        # 与浏览器一致：href/src 返回绝对地址
+        if value and name in ("href", "src"):
+            return urljoin(self._base_url, value)
+        return value
+
+    def find_element(self, by, value):
+        return _find_one(self._node, self._base_url, by, value)
+
+    def find_elements(self, by, value):
+        return _find_all(self._node, self._base_url, by, value)
+
+class _SwitchTo:
+    def window(self, handle):
+        pass
+
+class ReplayDriver:
+    """用录制页面驱动抓取器的离线 WebDriver"""
+
+    def __init__(self):
+        self.current_url = BLANK_URL
+        self.page_source = BLANK_PAGE
+        self.window_handles = ["replay"]
+        self.switch_to = _SwitchTo()
+        self._root = lxml_html.document_fromstring(BLANK_PAGE)
+
+    def get(self, url):
+        if url == BLANK_URL:
+            self.current_url, source = BLANK_URL, BLANK_PAGE
+        else:
+            replay_url = f"{http_client.REPLAY_SERVER}/replay?method={BROWSER_METHOD}&url={quote(url, safe='')}"
+            response = http_client.get_session(False).get(replay_url, timeout=http_client.DEFAULT_TIMEOUT)
+            self.current_url = response.headers.get(http_client.REPLAY_URL_HEADER, url)
+            source = response.content.decode("utf-8", errors="replace") if response.ok else BLANK_PAGE
+        self.page_source = source
+        self._root = lxml_html.document_fromstring(source.encode("utf-8") or BLANK_PAGE.encode(),
+                                                   parser=lxml_html.HTMLParser(encoding="utf-8"))
+
+    @property
+    def title(self):
+        return (self._root.findtext(".//title") or "").strip()
+
+    def find_element(self, by, value):
+        return _find_one(self._root, self.current_url, by, value)
+
+    def find_elements(self, by, value):
+        return _find_all(self._root, self.current_url, by, value)
+
+    def execute_script(self, script, *args):
+        """只模拟抓取器用到的脚本：页面高度（固定）与源码标记查找"""
+        if "scrollHeight" in script and script.lstrip().startswith("return"):
+            return len(self.page_source)
+        if "outerHTML" in script and args:
+            return any(marker in self.page_source for marker in args[0])
+        return None
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def close(self):
+        pass
+
+    def quit(self):
+        pass
+
+class RecordingDriver:
+    """包装真实 driver，把每个访问过的页面存入 FixtureStore"""
+
+    def __init__(self, driver, store):
+        self._driver = driver
+        self._store = store
+        self._requested_url = None
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def snapshot(self):
+        """保存当前页面的渲染结果（以 get() 请求的 URL 为键）"""
+        if not self._requested_url or self._requested_url == BLANK_URL:
+            return
+        try:
+            source = self._driver.page_source
+            final_url = self._driver.current_url
+        except Exception as e:
+            print(f"    [!] 页面录制失败: {type(e).__name__}")
+            return
+        self._store.save(BROWSER_METHOD, self._requested_url, source.encode("utf-8"),
+                         content_type=PAGE_CONTENT_TYPE, final_url=final_url)
+
+    def get(self, url):
+        self.snapshot()
+        self._driver.get(url)
+        self._requested_url = url
+
+    def quit(self):
+        self.snapshot()
+        self._requested_url = None
+        self._driver.quit()
@@ -0,0 +1,124 @@
+"""
+本地回放 HTTP 服务器
+- GET /replay?method=GET&url=<原始 URL>，返回录制的响应体、状态码与 Content-Type
+- 响应头 X-Replay-Url 携带录制时的最终 URL（http_client 据此还原 response.url）
+- method=BROWSER 查找浏览器渲染后的页面（未录制时退回 GET 响应）
+- 未录制的 URL 返回 404 并记录在 misses 中
+用法：
+    python crawler/benchmarks/replay_server.py [--port 8765] [--fixtures DIR]
+    HTTP_REPLAY_SERVER=http://127.0.0.1:8765 python crawler/pipeline.py
+"""
+
+import argparse
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+from fixtures import BROWSER_METHOD, DEFAULT_FIXTURES_DIR, FixtureStore
+
+DEFAULT_PORT = 8765
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query)
+        url = params.get("url", [""])[0]
+        method = params.get("method", ["GET"])[0]
+        if parts.path != "/replay" or not url:
+            self._send(400, b"usage: /replay?method=GET&url=<url>", "text/plain")
+            return
+
+        meta, body = self.server.store.lookup(method, url)
+        if meta is None and method == BROWSER_METHOD:
+            # 浏览器页面未单独录制时退回到 HTTP 录制
+            meta, body = self.server.store.lookup("GET", url)
+        if meta is None:
+            self.server.record_miss(method, url)
+            self._send(404, b"not recorded", "text/plain", final_url=url)
+            return
+        self.server.record_hit()
+        self._send(meta["status"], body, meta.get("content_type") or "application/octet-stream",
+                   final_url=meta.get("final_url") or url)
+
+    do_HEAD = do_GET
+
+    def _send(self, status, body, content_type, final_url=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if final_url:
+            self.send_header(http_client.REPLAY_URL_HEADER, final_url)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class ReplayServer(ThreadingHTTPServer):
+    """回放服务器（统计命中/未命中次数）"""
+
+    daemon_threads = True
+
+    def __init__(self, store, port=0):
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.store = store
+        self.hits = 0
+        self.misses = []
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_hit(self):
+        with self._stats_lock:
+            self.hits += 1
+
+    def record_miss(self, method, url):
+        with self._stats_lock:
+            self.misses.append(f"{method} {url}")
+
+def start_server(store=None, port=0):
+    """
+    在后台线程启动回放服务器
+    :param store: FixtureStore，默认使用 fixtures/ 目录
+    :param port: 端口，0 表示随机空闲端口
+    :return: ReplayServer（用完调用 shutdown()）
+    """
+    server = ReplayServer(store or FixtureStore(), port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="录制响应回放服务器")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="监听端口")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="夹具目录")
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    server = ReplayServer(store, args.port)
+    print(f"[*] 回放服务器已启动: {server.base_url} ({len(store.index)} 条录制响应)")
+    print(f"    export HTTP_REPLAY_SERVER={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if server.misses:
+            print(f"[!] 未录制的请求 {len(server.misses)} 个:")
+            for miss in server.misses:
+                print(f"    {miss}")
+
+if __name__ == "__main__":
+    main()
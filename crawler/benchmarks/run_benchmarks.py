@@ -0,0 +1,190 @@
+"""
+离线基准测试
+- 启动本地回放服务器，http_client 与浏览器池全部改用录制的夹具（不访问外网）
+- 依次计时：各抓取入口、extract_from_html、extract_cards_from_section、package_section
+- 报告墙钟时间、CPU 时间（含所有线程）与 Python 内存峰值（tracemalloc）
+用法：
+    python crawler/benchmarks/record.py              # 先在线录制一次
+    python crawler/benchmarks/run_benchmarks.py [--only cnn bbc ...] [--repeat 20] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import targets
+import article_cache
+import browser_pool
+import html_parser
+import http_client
+import image_cache
+from fixtures import BROWSER_METHOD, DEFAULT_FIXTURES_DIR, FixtureStore
+from replay_driver import ReplayDriver
+from replay_server import start_server
+
+def measure(name, func, track_memory=True):
+    """
+    运行并计时
+    :return: (结果, 统计 dict)
+    """
+    if track_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        result = func()
+        error = ""
+    except Exception as e:
+        result = None
+        error = f"{type(e).__name__}: {e}"
+    stats = {
+        "name": name,
+        "wall_s": time.perf_counter() - wall_start,
+        "cpu_s": time.process_time() - cpu_start,
+        "peak_mb": 0.0,
+        "items": len(result) if isinstance(result, (list, dict)) else "",
+        "error": error,
+    }
+    if track_memory:
+        stats["peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return result, stats
+
+def bench_fetchers(names, count, track_memory):
+    """计时各抓取入口（回放模式）"""
+    results, rows = {}, []
+    for name, module_name, func_name, section in targets.select(names):
+        func = targets.load(module_name, func_name)
+        result, stats = measure(f"{name}.{func_name}", lambda: func(count), track_memory)
+        results[name] = (section, result or [])
+        rows.append(stats)
+    return results, rows
+
+def bench_extract_from_html(store, repeat, track_memory):
+    """计时百度搜索结果页解析（所有录制的 www.baidu.com 页面）"""
+    from homenews import fetch_baidu
+
+    pages = []
+    for method in ("GET", BROWSER_METHOD):
+        for _, meta in store.entries(method=method, host="www.baidu.com", content_type="text/html"):
+            pages.append(store.read(meta).decode("utf-8", errors="replace"))
+    if not pages:
+        return None
+
+    def _run():
+        return [fetch_baidu.extract_from_html(html) for _ in range(repeat) for html in pages]
+    _, stats = measure(f"extract_from_html x{repeat} ({len(pages)} 页)", _run, track_memory)
+    return stats
+
+def bench_extract_cards(store, repeat, track_memory):
+    """计时 CNN 分类卡片提取（整页解析 + 全部目标分类）"""
+    from worldnews import fetch_cnn
+
+    meta, body = store.lookup("GET", fetch_cnn.WORLD_URL)
+    if meta is None:
+        return None
+
+    def _run():
+        cards = []
+        for _ in range(repeat):
+            soup = html_parser.make_soup(body)
+            heading_candidates = fetch_cnn.find_heading_candidates(soup)
+            for section_name in fetch_cnn.TARGET_SECTIONS:
+                cards.extend(fetch_cnn.extract_cards_from_section(soup, section_name, heading_candidates))
+        return cards
+    _, stats = measure(f"extract_cards_from_section x{repeat}", _run, track_memory)
+    return stats
+
+def bench_package_section(fetch_results, track_memory):
+    """用回放抓取结果计时各板块 package_section（输出到临时目录）"""
+    import pipeline
+
+    rows = []
+    output_dir = tempfile.mkdtemp(prefix="bench_output_")
+    pipeline.OUTPUT_DIR = output_dir
+    pipeline.LATEST_VERSION_FILE = os.path.join(output_dir, "latest_versions.json")
+    pipeline.PUBLISHED_DIR = output_dir
+    try:
+        sections = {}
+        for section, items in fetch_results.values():
+            sections.setdefault(section, []).extend(items)
+        timestamp_str = time.strftime("%Y%m%d_%H%M%S")
+        for section, items in sections.items():
+            if not items:
+                continue
+            news = [{"rank": 0, "title": "Summary", "content": ""}]
+            news += [dict(item, rank=rank) for rank, item in enumerate(items, 1)]
+            _, stats = measure(
+                f"package_section[{section}] ({len(items)} 条)",
+                lambda: pipeline.package_section(section, {"news": news}, timestamp_str),
+                track_memory,
+            )
+            rows.append(stats)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return rows
+
+def print_report(rows):
+    print(f"\n{'基准项':<52} {'墙钟(s)':>9} {'CPU(s)':>9} {'峰值(MB)':>9} {'条数':>6}")
+    print("-" * 90)
+    for row in rows:
+        print(f"{row['name'][:52]:<52} {row['wall_s']:>9.3f} {row['cpu_s']:>9.3f} {row['peak_mb']:>9.1f} {str(row['items']):>6}")
+        if row["error"]:
+            print(f"    [!] {row['error'][:80]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="离线基准测试（回放录制的响应）")
+    parser.add_argument("--only", nargs="*", help="只运行指定抓取入口（默认全部）")
+    parser.add_argument("--count", type=int, default=9, help="每个抓取入口的数量")
+    parser.add_argument("--repeat", type=int, default=20, help="解析类基准的重复次数")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="夹具目录")
+    parser.add_argument("--no-memory", action="store_true", help="不统计内存峰值（tracemalloc 会拖慢运行）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于对比前后两次运行")
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    if not store.index:
+        print(f"[!] 夹具目录为空: {args.fixtures}，请先运行 record.py")
+        return 1
+
+    # 每次都完整解析详情页、完整处理图片，结果才可比（也不写入正式缓存目录）
+    article_cache.ENABLED = False
+    image_cache.ENABLED = False
+    server = start_server(store)
+    http_client.set_replay_server(server.base_url)
+    browser_pool.set_driver_factory(ReplayDriver)
+    track_memory = not args.no_memory
+    print(f"[*] 回放服务器: {server.base_url} ({len(store.index)} 条录制响应)")
+
+    rows = []
+    try:
+        fetch_results, fetch_rows = bench_fetchers(args.only, args.count, track_memory)
+        rows.extend(fetch_rows)
+        for stats in (bench_extract_from_html(store, args.repeat, track_memory),
+                      bench_extract_cards(store, args.repeat, track_memory)):
+            if stats:
+                rows.append(stats)
+        rows.extend(bench_package_section(fetch_results, track_memory))
+    finally:
+        browser_pool.shutdown()
+        http_client.set_replay_server("")
+        server.shutdown()
+
+    print_report(rows)
+    print(f"\n回放命中 {server.hits} 次，未录制 {len(server.misses)} 次")
+    for miss in server.misses[:20]:
+        print(f"    {miss}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"rows": rows, "misses": server.misses}, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+基准测试覆盖的抓取入口（录制与回放共用）
+"""
+
+import importlib
+import os
+import sys
+
+CRAWLER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CRAWLER_DIR not in sys.path:
+    sys.path.append(CRAWLER_DIR)
+
+# (名称, 模块, 函数, 所属板块)；函数均接受数量参数
+FETCHERS = [
+    ("baidu", "homenews.fetch_baidu", "get_baidu_news", "Home"),
+    ("tencent", "homenews.fetch_tencent", "get_tencent_news", "Home"),
+    ("toutiao", "homenews.fetch_toutiao", "get_toutiao_news", "Home"),
+    ("bbc", "worldnews.fetch_bbc", "scrape", "World"),
+    ("cnn", "worldnews.fetch_cnn", "scrape", "World"),
+    ("nytimes", "worldnews.fetch_nytimes", "scrape", "World"),
+    ("sky", "worldnews.fetch_sky", "scrape", "World"),
+    ("tencent_ent", "entertainment.get_tencent_entertainment_hot", "get_tencent_entertainment_hot", "Entertainment"),
+    ("douyin", "entertainment.get_douyin_rank", "get_douyin_rank", "Entertainment"),
+    ("bilibili", "entertainment.get_bilibili_rank", "get_bilibili_rank", "Entertainment"),
+    ("bilibili_news", "entertainment.fetch_bilibili", "get_bilibili_news", "Entertainment"),
+]
+
+def load(module_name, func_name):
+    """按名称导入抓取函数"""
+    return getattr(importlib.import_module(module_name), func_name)
+
+def select(names=None):
+    """按名称筛选抓取入口，names 为空时返回全部"""
+    if not names:
+        return list(FETCHERS)
+    return [target for target in FETCHERS if target[0] in names]
@@ -0,0 +1,232 @@
+"""
+共享无头浏览器池
+- 每次流水线运行只启动一次 Chrome（按需启动，最多 BROWSER_POOL_SIZE 个）
+- 通过 acquire() 上下文管理器借出 driver，用完自动重置状态并归还
+- 运行结束时 shutdown() 统一关闭（同时注册 atexit 兜底）
+"""
+
+import atexit
+import os
+import queue
+import threading
+from contextlib import ExitStack, contextmanager
+
+# Selenium 导入
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+    from webdriver_manager.chrome import ChromeDriverManager
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+# 浏览器实例数量上限
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+# 默认 User-Agent（借出时可按站点覆盖）
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+PAGE_LOAD_TIMEOUT = 60
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def _get_driver_path():
+    """ChromeDriver 只解析/下载一次"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+def create_driver():
+    """启动一个无头 Chrome 实例，失败返回 None"""
+    print("    [*] 正在初始化浏览器...")
+    try:
+        options = ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-proxy-server")
+        options.add_argument("--disable-images")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        options.add_argument(f"user-agent={DEFAULT_USER_AGENT}")
+        options.page_load_strategy = 'eager'
+
+        service = ChromeService(_get_driver_path())
+        driver = webdriver.Chrome(service=service, options=options)
+
+        # 隐藏 Selenium 特征
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+          "source": """
+            Object.defineProperty(navigator, 'webdriver', {
+              get: () => undefined
+            })
+          """
+        })
+
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        print("    [✓] 浏览器初始化成功")
+        return driver
+    except Exception as e:
+        print(f"    [!] 浏览器初始化失败: {type(e).__name__}")
+        return None
+
+# driver 工厂（基准测试可替换为录制/回放 driver）
+_driver_factory = create_driver
+
+def set_driver_factory(factory):
+    """
+    替换新建 driver 的工厂函数
+    :param factory: callable() -> WebDriver 或 None；传 None 恢复 create_driver
+    """
+    global _driver_factory
+    _driver_factory = factory or create_driver
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+class BrowserPool:
+    """无头 Chrome 实例池"""
+
+    def __init__(self, size=BROWSER_POOL_SIZE):
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _checkout(self):
+        """取出空闲实例；不足上限时新建；否则等待归还"""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+
+            if can_create:
+                driver = _driver_factory()
+                if driver is None:
+                    with self._lock:
+                        self._created -= 1
+                return driver
+
+            # 全部借出：等待归还（定期重查，防止有实例被丢弃后空等）
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _reset(self, driver):
+        """清理 cookies、多余标签页和站点 UA，恢复为空白页"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": DEFAULT_USER_AGENT})
+        driver.get("about:blank")
+
+    def _checkin(self, driver):
+        """归还实例；状态重置失败（浏览器已崩溃）则丢弃"""
+        if self._closed:
+            _quit_driver(driver)
+            return
+        try:
+            self._reset(driver)
+        except Exception as e:
+            print(f"    [!] 浏览器状态重置失败，丢弃该实例: {type(e).__name__}")
+            _quit_driver(driver)
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(driver)
+
+    @contextmanager
+    def acquire(self, user_agent=None):
+        """
+        借出一个 driver
+        :param user_agent: 站点专用 User-Agent（归还时恢复默认）
+        :return: WebDriver；浏览器无法启动时为 None
+        """
+        driver = self._checkout()
+        if driver is not None and user_agent:
+            try:
+                driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": user_agent})
+            except Exception:
+                pass
+        try:
+            yield driver
+        finally:
+            if driver is not None:
+                self._checkin(driver)
+
+    def shutdown(self):
+        """关闭所有浏览器实例"""
+        self._closed = True
+        count = 0
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            _quit_driver(driver)
+            count += 1
+        with self._lock:
+            self._created = 0
+        if count:
+            print(f"    [✓] 浏览器池已关闭 ({count} 个实例)")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """获取进程内共享的浏览器池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+def acquire(user_agent=None):
+    """从共享浏览器池借出 driver，参数同 BrowserPool.acquire()"""
+    return get_pool().acquire(user_agent=user_agent)
+
+@contextmanager
+def lazy_acquire(user_agent=None):
+    """
+    按需借出 driver：只有调用返回的 get_driver() 时才占用（必要时启动）浏览器
+    :param user_agent: 站点专用 User-Agent
+    :return: get_driver() -> WebDriver 或 None
+    """
+    stack = ExitStack()
+    holder = []
+
+    def get_driver():
+        if not holder:
+            holder.append(stack.enter_context(acquire(user_agent=user_agent)))
+        return holder[0]
+
+    with stack:
+        yield get_driver
+
+def shutdown():
+    """关闭共享浏览器池（流水线结束时调用）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+atexit.register(shutdown)
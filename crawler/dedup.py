@@ -0,0 +1,192 @@
+"""
+本地事件级去重（调用 DeepSeek 之前预筛候选）
+- 标题按字符 n-gram 切片（中文 2-gram，英文 4-gram），MinHash + LSH 分桶找近似重复
+- 可选：多语言句向量（sentence-transformers，CPU 即可），用于国际新闻英文候选与中文历史的跨语言比对
+- 候选按事件聚类（并查集），每个事件只保留一条代表；与历史库中任一条相似的事件直接剔除
+- 提示词只收到互不重复且未发布过的事件，更短、推理更快
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+
+# MinHash 排列数与 LSH 分桶（BANDS * ROWS == NUM_PERM）
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# 估计 Jaccard 相似度达到该值视为同一事件
+JACCARD_THRESHOLD = float(os.getenv("DEDUP_JACCARD", "0.5"))
+# 句向量余弦相似度阈值
+COSINE_THRESHOLD = float(os.getenv("DEDUP_COSINE", "0.82"))
+# 多语言句向量模型（未安装 sentence-transformers 时只用 MinHash）
+EMBED_MODEL = os.getenv("DEDUP_EMBED_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+# 设为 0 关闭本地去重
+ENABLED = os.getenv("LOCAL_DEDUP", "1") != "0"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERM)]
+_CJK_RE = re.compile(r'[一-鿿]')
+_NOISE_RE = re.compile(r'[^\w一-鿿]+')
+
+_model = None
+_model_lock = threading.Lock()
+
+def normalize(text):
+    """小写，去掉标点与空白"""
+    return _NOISE_RE.sub("", (text or "").lower())
+
+def shingles(text):
+    """字符 n-gram 集合：含中文用 2-gram，否则 4-gram；过短的文本整体作为一个切片"""
+    text = normalize(text)
+    n = 2 if _CJK_RE.search(text) else 4
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def _base_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def minhash(shingle_set):
+    """MinHash 签名（空集合返回 None）"""
+    if not shingle_set:
+        return None
+    hashes = [_base_hash(s) for s in shingle_set]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def similarity(sig_a, sig_b):
+    """由签名估计 Jaccard 相似度"""
+    if sig_a is None or sig_b is None:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+def _bands(signature):
+    for band in range(BANDS):
+        yield band, signature[band * ROWS:(band + 1) * ROWS]
+
+def _lsh_pairs(signatures):
+    """LSH 分桶：至少有一个分段完全相同的签名对（索引对）"""
+    buckets = {}
+    for index, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for key in _bands(signature):
+            buckets.setdefault(key, []).append(index)
+    pairs = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                pairs.add((members[i], members[j]))
+    return pairs
+
+def _load_model():
+    """按需加载句向量模型，失败后不再重试"""
+    global _model
+    if not EMBEDDINGS_AVAILABLE:
+        return None
+    with _model_lock:
+        if _model is None:
+            try:
+                _model = SentenceTransformer(EMBED_MODEL, device="cpu")
+            except Exception as e:
+                print(f"  [!] 句向量模型加载失败，仅使用 MinHash: {type(e).__name__}")
+                _model = False
+    return _model or None
+
+def _embed(texts):
+    """归一化句向量（numpy 数组）；模型不可用时返回 None"""
+    model = _load_model()
+    if model is None or not texts:
+        return None
+    return model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+def _history_texts(history_items, fields):
+    texts = []
+    for item in history_items:
+        for field in fields:
+            value = item.get(field)
+            if value:
+                texts.append(value)
+    return texts
+
+def filter_candidates(candidates, history_items, label="", title_field="title",
+                      history_fields=("title",), use_embeddings=False, min_keep=0):
+    """
+    候选聚类为事件，剔除与历史重复的事件，每个事件保留一条代表（保持原顺序，优先有图片的）
+    :param history_items: 历史库条目
+    :param history_fields: 历史条目中参与比对的字段（国际新闻同时比对中文 title 与英文 title0）
+    :param use_embeddings: 是否额外使用多语言句向量（需要 sentence-transformers）
+    :param min_keep: 剔除历史事件后不足该数量时，按原顺序补回与历史相似的事件（交给 AI 最终判断）
+    :return: 过滤后的候选列表
+    """
+    if not ENABLED or not candidates:
+        return candidates
+
+    titles = [item.get(title_field, "") or "" for item in candidates]
+    history_texts = _history_texts(history_items, history_fields)
+    count = len(titles)
+
+    # 只比较涉及候选的对（历史与历史之间的相似度用不到）
+    signatures = [minhash(shingles(text)) for text in titles + history_texts]
+    similar = [(i, j) for i, j in _lsh_pairs(signatures)
+               if min(i, j) < count and similarity(signatures[i], signatures[j]) >= JACCARD_THRESHOLD]
+
+    if use_embeddings:
+        vectors = _embed(titles + history_texts)
+        if vectors is not None:
+            # 候选行 × (候选 + 历史) 列，开销随历史条数线性增长
+            rows, cols = (vectors[:count] @ vectors.T >= COSINE_THRESHOLD).nonzero()
+            similar.extend((int(i), int(j)) for i, j in zip(rows, cols) if j > i)
+
+    # 候选之间相似 -> 同一事件；候选与历史相似 -> 该事件已发布过
+    groups = _UnionFind(count)
+    seen = set()
+    for i, j in similar:
+        if i < count and j < count:
+            groups.union(i, j)
+        elif i < count <= j:
+            seen.add(i)
+        elif j < count <= i:
+            seen.add(j)
+
+    events = {}
+    for index in range(count):
+        if titles[index]:
+            events.setdefault(groups.find(index), []).append(index)
+    fresh, repeated = [], []
+    for members in events.values():
+        representative = next((i for i in members if candidates[i].get("image")), members[0])
+        target = repeated if any(i in seen for i in members) else fresh
+        target.append(representative)
+
+    kept = sorted(fresh)
+    if len(kept) < min_keep:
+        kept = sorted(kept + sorted(repeated)[:min_keep - len(kept)])
+
+    print(f"  [✓] {label}本地去重: {count} 条候选 -> {len(events)} 个事件，"
+          f"{len(repeated)} 个与历史重复，交给 AI {len(kept)} 条")
+    return [candidates[i] for i in kept]
@@ -0,0 +1,162 @@
+"""
+DeepSeek 流式调用（SSE）
+- 以 stream 方式请求 chat/completions，边接收边拼接输出
+- 增量解析输出中的新闻列表：顶层数组或 {"news": [...]} 中的 news 数组（其他数组字段跳过）里每完成一个对象立即回调，
+  调用方可在模型生成后续条目时就开始处理（如提前下载图片）
+- 模型误输出为并列对象（"}{"）或单个对象时，按顶层对象逐个解析
+- 输出被截断（超时、连接中断、达到 max_tokens）时，已完整的条目仍然可用
+"""
+
+import json
+import os
+import time
+
+import requests
+
+API_URL = "https://api.deepseek.com/chat/completions"
+# 建立连接时限 / 两个数据块之间的最长等待（秒）
+CONNECT_TIMEOUT = float(os.getenv("DEEPSEEK_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("DEEPSEEK_READ_TIMEOUT", "60"))
+# 单次调用的整体时限（秒），超时按截断处理
+DEADLINE = float(os.getenv("DEEPSEEK_DEADLINE", "120"))
+
+class ItemStream:
+    """
+    增量 JSON 条目解析器：feed() 输入新到达的文本，返回本次新完成的条目（dict）
+    只跟踪字符串/转义状态与括号深度，不回溯，总开销与输出长度成正比
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.items = []
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth = None  # 新闻列表 "[" 所在深度
+        self._done = False
+        self._start = None  # 当前条目 "{" 在 buffer 中的位置
+        self._string = None  # 顶层对象中正在读取的字符串（可能是键名）
+        self._last_string = None
+        self._key = None  # 顶层对象中当前值对应的键名
+
+    def feed(self, text):
+        completed = []
+        if self._done or not text:
+            return completed
+        self.buffer.append(text)
+        for ch in text:
+            position = self._pos
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._string is not None:
+                        self._last_string, self._string = "".join(self._string), None
+                        continue
+                if self._string is not None:
+                    self._string.append(ch)
+                continue
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._array_depth is None:
+                    self._string = []
+            elif ch == ":" and self._depth == 1:
+                self._key = self._last_string
+            elif ch == "," and self._depth == 1:
+                self._key = None
+            elif ch in "{[":
+                # 只认顶层数组或顶层对象 "news" 键的数组，其他数组字段（如 "tags": [...]）跳过
+                if ch == "[" and self._array_depth is None and (
+                        self._depth == 0 or (self._depth == 1 and self._key == "news")):
+                    self._array_depth = self._depth
+                    self._start = None  # 外层对象（{"news": [...]}）不作为条目
+                elif ch == "{" and self._item_depth() == self._depth:
+                    self._start = position
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "]" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._done = True
+                    break
+                if ch == "}" and self._start is not None and self._depth == self._item_depth():
+                    item = self._parse(position)
+                    self._start = None
+                    if item is not None:
+                        completed.append(item)
+        self.items.extend(completed)
+        return completed
+
+    def _item_depth(self):
+        """条目对象的起始深度：数组内为数组深度 + 1，尚未遇到数组时为顶层"""
+        return 0 if self._array_depth is None else self._array_depth + 1
+
+    def _parse(self, end):
+        text = "".join(self.buffer)
+        self.buffer = [text]
+        try:
+            item = json.loads(text[self._start:end + 1])
+        except ValueError:
+            return None
+        return item if isinstance(item, dict) else None
+
+def chat(body, api_key, on_item=None, deadline=DEADLINE):
+    """
+    流式调用 chat/completions
+    :param body: 请求体（不含 stream 参数）
+    :param on_item: on_item(item)，输出中每完成一条新闻立即回调（在调用线程中）
+    :return: (content, usage, items, complete)
+             content 为完整输出文本；usage 为 API 返回的用量（可能为空）；
+             items 为已解析出的完整条目；complete 表示输出正常结束（未被截断）
+    :raises requests.RequestException: 连接失败或 HTTP 错误（未收到任何输出）
+    """
+    request_body = dict(body, stream=True, stream_options={"include_usage": True})
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
+    parser = ItemStream()
+    chunks, usage = [], {}
+    finish_reason = None
+    started = time.time()
+
+    response = requests.post(API_URL, headers=headers, json=request_body, stream=True,
+                             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    try:
+        response.raise_for_status()
+        # 小块读取：每个 SSE 事件都远大于 64 字节，到达即可解析，不会攒到缓冲区满才处理
+        for raw_line in response.iter_lines(chunk_size=64):
+            if time.time() - started > deadline:
+                print(f"  [!] DeepSeek 输出超过 {deadline:.0f}s 时限，按截断处理")
+                break
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if not line.startswith("data:"):
+                continue  # 空行与 ": keep-alive" 注释
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            try:
+                event = json.loads(payload)
+            except ValueError:
+                continue
+            usage = event.get("usage") or usage
+            for choice in event.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content") or ""
+                if delta:
+                    chunks.append(delta)
+                    for item in parser.feed(delta):
+                        if on_item:
+                            on_item(item)
+                finish_reason = choice.get("finish_reason") or finish_reason
+    except requests.RequestException as e:
+        if not chunks:
+            raise
+        print(f"  [!] DeepSeek 流式输出中断: {type(e).__name__}，保留已接收的 {len(parser.items)} 条")
+    finally:
+        response.close()
+
+    return "".join(chunks), usage, parser.items, finish_reason == "stop"
@@ -10,10 +10,17 @@ import sys
 import argparse
 import time
 import os
-import requests
 import shutil
 from datetime import datetime, timedelta
 
+# 公共模块（state_store 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import history_store
+import llm_cache
+import dedup
+import prompt_builder
+import deepseek_client
+
 # Import the three scraper modules
 try:
     from .get_tencent_entertainment_hot import get_tencent_entertainment_hot
@@ -25,10 +32,12 @@ except ImportError:
     from get_bilibili_rank import get_bilibili_rank
 
 # 配置
-HISTORY_FILE = os.path.join(os.path.dirname(__file__), "entertainment_history.json")
+# 历史库分区：当前目录的 entertainment_history.jsonl
+HISTORY = history_store.open_section(os.path.dirname(os.path.abspath(__file__)), "entertainment")
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "")
-DEEPSEEK_API_URL = "https://api.deepseek.com/chat/completions"
+# 去重提示词版本（修改 deduplicate_with_deepseek 的提示词时递增，旧的响应缓存随之失效）
+DEDUP_PROMPT_VERSION = "v2"
 
 def clean_output_dir():
     """清空输出目录"""
@@ -38,40 +47,13 @@ def clean_output_dir():
     os.makedirs(OUTPUT_DIR)
 
 def load_history():
-    """加载历史库"""
-    if not os.path.exists(HISTORY_FILE):
-        return []
-    try:
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            history = json.load(f)
-            return history if isinstance(history, list) else []
-    except:
-        return []
+    """加载最近的历史（用于提示词）"""
+    return HISTORY.recent()
 
 def save_history(new_items):
-    """保存历史库，最多保留36条"""
-    history = load_history()
-    
-    # 添加新项目（每次添加9条）
-    for item in new_items:
-        history.append({
-            "title": item.get('title', ''),
-            "content": item.get('content', ''),
-            "source_platform": item.get('source_platform', ''),
-            "timestamp": datetime.utcnow().isoformat()
-        })
-    
-    # 只保留最新的36条（4*9=36）
-    initial_count = len(history)
-    if len(history) > 36:
-        history = history[-36:]
-        deleted_count = initial_count - 36
-        print(f"  历史库已更新：保留最新36条，删除早期{deleted_count}条")
-    else:
-        print(f"  历史库已更新：当前{len(history)}条")
-    
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+    """追加本次发布的新闻到历史库"""
+    total = HISTORY.add(new_items)
+    print(f"  历史库已更新：当前{total}条")
 
 def save_aggregated_news(polished_data):
     """保存聚合的新闻JSON文件"""
@@ -151,9 +133,10 @@ def deduplicate_with_deepseek(all_news, history_items):
     
     print("  正在使用DeepSeek进行智能去重...")
     
-    # 准备提示词
-    history_titles = [item['title'] for item in history_items]
-    all_titles = [f"{i+1}. {item['title']}" for i, item in enumerate(all_news)]
+    # 准备提示词：历史与候选各自装入 token 预算；编号即 all_news 中的下标（从0开始）
+    history_titles = prompt_builder.fit_history([item['title'] for item in history_items])
+    entries, candidates_by_id = prompt_builder.fit_candidates(all_news, lambda item: {"title": item['title']})
+    all_titles = [f"{entry['id']}. {entry['title']}" for entry in entries]
     
     prompt = f"""
 你是一个内容去重专家。请从以下最新的娱乐新闻列表中选择9个与历史记录无关且互相不重复的新闻。
@@ -173,41 +156,44 @@ def deduplicate_with_deepseek(all_news, history_items):
 只返回JSON，不要有其他文字。
 """
     
+    request_body = {
+        "model": "deepseek-chat",
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 500
+    }
+    # 相同候选与历史直接复用上次的选择结果
+    cache_key = llm_cache.make_key("ent_dedup", request_body, DEDUP_PROMPT_VERSION)
+    
     try:
-        response = requests.post(
-            DEEPSEEK_API_URL,
-            headers={
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 500
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content']
-            
-            # 解析JSON响应
-            selected_data = json.loads(content)
-            indices = selected_data.get('selected_indices', [])
-            
-            # 过滤选中的新闻
-            selected_news = [all_news[i] for i in indices if i < len(all_news)]
-            selected_news = selected_news[:9]
-            
-            print(f"  [✓] DeepSeek去重完成，选出 {len(selected_news)} 条新闻")
-            return selected_news
+        content = llm_cache.get(cache_key)
+        fresh = content is None
+        complete = True
+        if fresh:
+            content, usage, _, complete = deepseek_client.chat(request_body, DEEPSEEK_API_KEY, deadline=30)
+            prompt_builder.log_usage("ent_dedup", request_body["messages"], {"usage": usage},
+                                     completion_text=content)
         else:
-            print(f"  [!] DeepSeek API返回错误: {response.status_code}")
+            prompt_builder.log_usage("ent_dedup", request_body["messages"], completion_text=content)
+        
+        # 解析JSON响应
+        selected_data = json.loads(content)
+        indices = selected_data.get('selected_indices', [])
+        
+        # 过滤选中的新闻
+        selected_news = [candidates_by_id[i] for i in indices if isinstance(i, int) and i in candidates_by_id]
+        selected_news = selected_news[:9]
+        
+        if not selected_news:
+            print("  [!] DeepSeek未选出有效新闻，改用本地去重")
             return deduplicate_locally(all_news, history_items)
+        # 只缓存新请求得到的完整、非空结果（命中缓存时不重写，避免延长有效期）
+        if fresh and complete:
+            llm_cache.put(cache_key, content, "ent_dedup")
+        print(f"  [✓] DeepSeek去重完成，选出 {len(selected_news)} 条新闻")
+        return selected_news
             
     except Exception as e:
         print(f"  [!] DeepSeek调用失败: {e}")
@@ -217,7 +203,7 @@ def deduplicate_locally(all_news, history_items):
     """本地智能去重"""
     print("  正在进行本地去重...")
     
-    history_titles = set(item['title'] for item in history_items)
+    # 历史查重走历史库的标题指纹索引（覆盖整个保留期，不只是提示词里的最近几十条）
     titles_set = set()
     selected_items = []
 
@@ -242,7 +228,7 @@ def deduplicate_locally(all_news, history_items):
                 continue
             if is_political_or_military(title):
                 continue
-            if title in history_titles:  # 跟历史库去重
+            if HISTORY.contains(title):  # 跟历史库去重
                 continue
             if title in titles_set:  # 跟当前选择去重
                 continue
@@ -256,14 +242,17 @@ def deduplicate_locally(all_news, history_items):
     add_if_valid(bilibili_news, 3)
     
     # 补充不足的部分
-    all_others = [i for i in all_news if i.get('title') not in titles_set and i.get('title') not in history_titles]
+    all_others = [i for i in all_news if i.get('title') not in titles_set and not HISTORY.contains(i.get('title'))]
     add_if_valid(all_others, 9 - len(selected_items))
 
     selected_items = selected_items[:9]
     return selected_items
 
-def aggregate_news(count=9):
-    """聚合三个平台的娱乐新闻"""
+def aggregate_news(count=9, update_history=True):
+    """
+    聚合三个平台的娱乐新闻
+    :param update_history: 是否立即写入历史库（pipeline 在打包成功后再写）
+    """
     print("\n" + "="*30)
     print("🚀 [Entertainment] 开始聚合流程")
     print("="*30)
@@ -330,6 +319,9 @@ def aggregate_news(count=9):
 
     print(f"  抓取完成：共 {len(all_news)} 条新闻")
 
+    # 本地预筛：跨平台同一事件只留一条，剔除历史库中已发布的事件（近似匹配，不只是标题完全相同）
+    all_news = dedup.filter_candidates(all_news, HISTORY.within_days(), label="[Entertainment] ", min_keep=count + 3)
+
     # 使用DeepSeek或本地去重
     selected_news = deduplicate_with_deepseek(all_news, history_items)
 
@@ -380,9 +372,10 @@ def aggregate_news(count=9):
     # 保存聚合的新闻JSON文件
     save_aggregated_news(polished_data)
     
-    # 更新历史库
-    print("  正在更新历史库...")
-    save_history(selected_news)
+    # 更新历史库（pipeline 在打包成功后再写）
+    if update_history:
+        print("  正在更新历史库...")
+        save_history(selected_news)
     
     return polished_data
 
@@ -2,9 +2,13 @@
 Bilibili Hot Search Scraper
 抓取 Bilibili 热搜视频
 """
-import requests
 import time
 import os
+import sys
+
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 # Constants
 API_URL = "https://api.bilibili.com/x/web-interface/popular?ps=50"
@@ -21,7 +25,7 @@ def get_bilibili_news(count: int = 9) -> list:
     print("[Bilibili] 开始抓取热搜视频...")
     
     try:
-        response = requests.get(API_URL, headers=HEADERS, timeout=10)
+        response = http_client.get(API_URL, headers=HEADERS, timeout=10)
         response.raise_for_status()
         data = response.json()
         
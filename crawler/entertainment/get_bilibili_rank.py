@@ -1,5 +1,10 @@
-import requests
 import json
+import os
+import sys
+
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 def fetch_rank_data(retries=3):
     """抓取B站热榜数据"""
@@ -16,7 +21,7 @@ def fetch_rank_data(retries=3):
             ]
             for url in urls:
                 try:
-                    response = requests.get(url, headers=headers, timeout=10)
+                    response = http_client.get(url, headers=headers, timeout=10)
                     response.raise_for_status()
                     return response.json()
                 except:
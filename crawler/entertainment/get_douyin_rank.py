@@ -1,5 +1,10 @@
-import requests
 import json
+import os
+import sys
+
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
 
 def fetch_rank_data(retries=3):
     """抓取抖音热榜数据"""
@@ -12,7 +17,7 @@ def fetch_rank_data(retries=3):
 
     for attempt in range(retries):
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get(url, headers=headers, timeout=10)
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
@@ -1,16 +1,22 @@
 import json
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import os
+import sys
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import browser_pool
+import page_ready
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Referer": "https://www.qq.com/",
 }
 
+# 首页就绪条件（替代固定等待）：热榜列表渲染完成
+RANK_LIST_SELECTOR = ".home-rank-list a.rank-item, .rank-list a"
+RANK_LIST_TIMEOUT = 10
+
 def get_tencent_entertainment_hot(count=9):
     """
     抓取腾讯娱乐热榜
@@ -19,19 +25,20 @@ def get_tencent_entertainment_hot(count=9):
     """
     print("[Tencent Entertainment] 开始抓取娱乐热榜...")
     
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument(f"user-agent={HEADERS['User-Agent']}")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
     results = []
 
-    try:
+    # 从共享浏览器池借出 Selenium driver
+    with browser_pool.acquire(user_agent=HEADERS['User-Agent']) as driver:
+        if not driver:
+            print("[Tencent Entertainment] ✗ 浏览器初始化失败")
+            return results
+
         driver.get("https://www.qq.com/")
-        time.sleep(5)
+        page_ready.wait_ready(
+            driver,
+            page_ready.selector_present(RANK_LIST_SELECTOR),
+            timeout=RANK_LIST_TIMEOUT,
+        )
 
         try:
             container = None
@@ -103,9 +110,6 @@ def get_tencent_entertainment_hot(count=9):
         except Exception as e:
             print(f"[Tencent Entertainment] ✗ 抓取失败: {e}")
 
-    finally:
-        driver.quit()
-
     print(f"\n[Tencent Entertainment] ✓ 抓取完成，共{len(results)}条新闻\n")
     return results
 
@@ -0,0 +1,182 @@
+"""
+已发布新闻历史库（每个板块一个分区文件）
+- 存储：追加写的 JSON Lines 日志（<section>_history.jsonl），每行一条记录，便于随仓库提交与对比
+- 索引：加载时建立 标题指纹 -> 记录 的字典（常数时间查重）与按时间排序的列表（时间窗口查询）
+- 写入：文件锁内追加并 fsync；进程中途被杀最多留下半行，加载时跳过
+- 压缩：超过保留期的记录与重复指纹在写入时顺带清理（临时文件 + 原子替换）
+- 首次使用时自动导入旧版 <section>_history.json 列表
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+import state_store
+
+# 记录保留天数（压缩时删除更早的记录）
+RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "180"))
+# 本地去重回看天数
+DEDUP_WINDOW_DAYS = int(os.getenv("HISTORY_DEDUP_DAYS", "30"))
+# 提示词中附带的最近历史条数
+PROMPT_HISTORY_SIZE = int(os.getenv("HISTORY_PROMPT_SIZE", "36"))
+
+_NOISE_RE = re.compile(r'[^\w]+')
+
+def fingerprint(title):
+    """标题指纹：小写并去掉标点空白后的哈希"""
+    normalized = _NOISE_RE.sub("", (title or "").lower())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+def _parse_time(record):
+    """兼容旧记录：timestamp（ISO）或 date（YYYY-MM-DD）"""
+    for key in ("timestamp", "date"):
+        value = record.get(key)
+        if value:
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                continue
+    return datetime.min
+
+class HistoryStore:
+    """单个板块的历史分区"""
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._records = None
+        self._times = []
+        self._index = {}
+
+    def _load(self):
+        """按需加载日志并建立索引（调用方持锁）"""
+        if self._records is not None:
+            return
+        self._records, self._times, self._index = [], [], {}
+        if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+            self._migrate()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._insert(record)
+
+    def _insert(self, record):
+        record.setdefault("fp", fingerprint(record.get("title")))
+        moment = _parse_time(record)
+        position = bisect.bisect_right(self._times, moment)
+        self._times.insert(position, moment)
+        self._records.insert(position, record)
+        self._index[record["fp"]] = record
+
+    def _migrate(self):
+        """导入旧版 JSON 列表历史"""
+        legacy = state_store.read(self.legacy_path, default=list)
+        records = [self._normalize(item) for item in legacy if isinstance(item, dict)] if isinstance(legacy, list) else []
+        self._rewrite(records)
+        print(f"  [✓] 已导入旧版历史 {len(records)} 条: {os.path.basename(self.legacy_path)}")
+
+    @staticmethod
+    def _normalize(item, now=None):
+        """统一记录字段：title/title0/content/source_platform/timestamp/date/fp"""
+        moment = now or _parse_time(item)
+        if moment == datetime.min:
+            moment = datetime.utcnow()
+        return {
+            "title": item.get("title") or "",
+            "title0": item.get("title0") or "",
+            "content": item.get("content") or "",
+            "source_platform": item.get("source_platform") or "",
+            "timestamp": item.get("timestamp") or moment.isoformat(),
+            "date": item.get("date") or moment.strftime('%Y-%m-%d'),
+            "fp": fingerprint(item.get("title")),
+        }
+
+    def _rewrite(self, records):
+        """整体重写日志（原子替换）"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def add(self, items):
+        """
+        追加新发布的新闻（已存在的标题只刷新时间）
+        :return: 当前记录数
+        """
+        now = datetime.utcnow()
+        records = [self._normalize(item, now) for item in items if item.get("title")]
+        with self._lock, state_store.locked(self.path):
+            self._records = None  # 其他进程可能已追加，重新加载
+            self._load()
+            if records:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                for record in records:
+                    self._insert(record)
+            self._compact(now)
+            return len(self._index)
+
+    def _compact(self, now):
+        """删除过期记录与被覆盖的重复指纹（调用方持锁）"""
+        cutoff = now - timedelta(days=RETENTION_DAYS)
+        live = [r for r in self._records if self._index.get(r["fp"]) is r and _parse_time(r) >= cutoff]
+        if len(live) == len(self._records):
+            return
+        removed = len(self._records) - len(live)
+        self._rewrite(live)
+        self._records, self._times, self._index = [], [], {}
+        for record in live:
+            self._insert(record)
+        print(f"  [✓] 历史库已压缩: 清理 {removed} 条过期/重复记录")
+
+    def contains(self, title):
+        """标题是否发布过（指纹索引，常数时间）"""
+        with self._lock:
+            self._load()
+            return fingerprint(title) in self._index
+
+    def recent(self, n=PROMPT_HISTORY_SIZE):
+        """最近 n 条（时间升序，与旧版列表顺序一致）"""
+        with self._lock:
+            self._load()
+            return [dict(r) for r in self._records[-n:]] if n > 0 else []
+
+    def since(self, moment):
+        """某时间点之后的记录（时间升序）"""
+        with self._lock:
+            self._load()
+            position = bisect.bisect_left(self._times, moment)
+            return [dict(r) for r in self._records[position:]]
+
+    def within_days(self, days=DEDUP_WINDOW_DAYS):
+        """最近若干天的记录（本地去重用）"""
+        return self.since(datetime.utcnow() - timedelta(days=days))
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self._index)
+
+def open_section(directory, name):
+    """
+    板块历史分区：<directory>/<name>_history.jsonl（自动导入同目录的旧版 <name>_history.json）
+    """
+    return HistoryStore(os.path.join(directory, f"{name}_history.jsonl"),
+                        legacy_path=os.path.join(directory, f"{name}_history.json"))
@@ -4,26 +4,52 @@ import re
 import time
 import os
 import sys
-from typing import Dict, List, Tuple
-
-import requests
-from bs4 import BeautifulSoup
-
-# Selenium 导入
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service as ChromeService
-    from selenium.webdriver.chrome.options import Options as ChromeOptions
-    from webdriver_manager.chrome import ChromeDriverManager
-    from selenium.webdriver.common.by import By
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import html_parser
+import browser_pool
+import page_ready
+
+SELENIUM_AVAILABLE = browser_pool.SELENIUM_AVAILABLE
 
 # Constants
 BOARD_API_URL = "https://top.baidu.com/api/board?platform=pc&tab=realtime"
+HOME_URL = "https://www.baidu.com/"
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
 
+# 页面就绪条件（替代固定等待）：s-data 注入 / 搜索结果渲染 / 出现安全验证
+READY_TIMEOUT = 5
+SEARCH_PAGE_READY = page_ready.any_of(
+    page_ready.source_contains("<!--s-data:", "security-verification"),
+    page_ready.selector_present("#content_left .result, #content_left .c-container"),
+    page_ready.title_contains("百度安全验证"),
+)
+BAIJIAHAO_PAGE_READY = page_ready.selector_present(
+    ".author-name, span[class*='author'], a[class*='author']"
+)
+
+# 并发解析数与每个 worker 的请求间隔（控制在百度安全验证阈值以下）
+RESOLVE_WORKERS = 3
+REQUEST_INTERVAL = 0.5
+
+# s-data 注释块边界
+S_DATA_START = "<!--s-data:"
+S_DATA_END = "-->"
+
+# 安全验证页面特征
+CAPTCHA_MARKERS = ("wappass.baidu.com", "security-verification")
+
+# 来源解析分级命中统计：http（免浏览器）/ selenium / unresolved
+_tier_stats = {"http": 0, "selenium": 0, "unresolved": 0}
+_tier_lock = threading.Lock()
+_cookies_ready = False
+
 def get_headers() -> Dict[str, str]:
     return {
         "User-Agent": USER_AGENT,
@@ -34,12 +60,6 @@ def get_headers() -> Dict[str, str]:
         "Upgrade-Insecure-Requests": "1",
     }
 
-def get_no_proxy_session():
-    """创建一个不使用系统代理的 Session"""
-    session = requests.Session()
-    session.trust_env = False
-    return session
-
 def install_selenium_hint():
     """提示安装 Selenium"""
     print("\n" + "!"*50)
@@ -54,51 +74,11 @@ def install_selenium_hint():
     print("\n" + "!"*50 + "\n")
     sys.exit(1)
 
-def init_driver():
-    """初始化 Selenium WebDriver"""
-    if not SELENIUM_AVAILABLE:
-        install_selenium_hint()
-    
-    print("    [*] 正在初始化浏览器...")
-    try:
-        options = ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-proxy-server")
-        options.add_argument("--disable-images")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(f"user-agent={USER_AGENT}")
-        options.page_load_strategy = 'eager'
-        
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # 隐藏 Selenium 特征
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-          "source": """
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined
-            })
-          """
-        })
-        
-        driver.set_page_load_timeout(60)
-        print("    [✓] 浏览器初始化成功")
-        return driver
-    except Exception as e:
-        print(f"    [!] 浏览器初始化失败: {type(e).__name__}")
-        return None
-
 def fetch_top_list(limit: int = 9) -> List[Dict]:
     """从百度热搜API获取榜单"""
     print(f"    [*] 从API获取前{limit}条热搜...")
     try:
-        session = get_no_proxy_session()
-        resp = session.get(BOARD_API_URL, headers=get_headers(), timeout=10)
+        resp = http_client.get(BOARD_API_URL, headers=get_headers(), timeout=10, trust_env=False)
         resp.raise_for_status()
         data = resp.json()
         
@@ -126,79 +106,88 @@ def fetch_top_list(limit: int = 9) -> List[Dict]:
         print(f"    [!] API 获取失败: {type(e).__name__}")
         return []
 
+def iter_s_data_blocks(html: str):
+    """增量扫描 <!--s-data:{...}--> 注释块，逐个产出原始 JSON 文本（调用方可提前停止）"""
+    pos = html.find(S_DATA_START)
+    while pos != -1:
+        start = pos + len(S_DATA_START)
+        end = html.find(S_DATA_END, start)
+        if end == -1:
+            return
+        yield html[start:end]
+        pos = html.find(S_DATA_START, end + len(S_DATA_END))
+
 def extract_from_html(html: str) -> Tuple[str, str]:
     """从HTML中提取真实URL和来源"""
     found_url = ""
     found_source = ""
 
-    # 策略1: 从<!--s-data:{...}-->提取
-    s_data_pattern = r'<!--s-data:(.*?)-->'
-    matches = re.findall(s_data_pattern, html, re.DOTALL)
-    
-    if matches:
-        for match in matches:
-            try:
-                data = json.loads(match)
-                
-                # 子策略1: citationList (优先)
-                card_data = data.get("cardData", {})
-                citation_list = card_data.get("citationList", {})
+    # 策略1: 从<!--s-data:{...}-->提取（找到可用来源即停止扫描）
+    has_s_data = False
+    for raw_block in iter_s_data_blocks(html):
+        has_s_data = True
+        try:
+            data = json.loads(raw_block)
+            
+            # 子策略1: citationList (优先)
+            card_data = data.get("cardData", {})
+            citation_list = card_data.get("citationList", {})
+            
+            if citation_list:
+                ref_data = citation_list.get("data", {})
+                ref_list = ref_data.get("referenceList", [])
                 
-                if citation_list:
-                    ref_data = citation_list.get("data", {})
-                    ref_list = ref_data.get("referenceList", [])
+                if ref_list and isinstance(ref_list, list) and len(ref_list) > 0:
+                    first_ref = ref_list[0]
+                    real_url = first_ref.get("url", "")
+                    source = first_ref.get("source", "")
+                    
+                    if isinstance(source, dict):
+                        source = source.get("name", "")
                     
-                    if ref_list and isinstance(ref_list, list) and len(ref_list) > 0:
-                        first_ref = ref_list[0]
-                        real_url = first_ref.get("url", "")
-                        source = first_ref.get("source", "")
-                        
-                        if isinstance(source, dict):
-                            source = source.get("name", "")
-                        
-                        if real_url:
-                            found_url = real_url
-                            found_source = str(source)
-                            if found_source:
-                                break
-
-                # 子策略2: blocksList (备选)
-                if not found_url:
-                    blocks_list = data.get("cardData", {}).get("blocksList", [])
-                    for block in blocks_list:
-                        items = block.get("data", {}).get("items", [])
-                        for item in items:
-                            source_list = item.get("sourceList", [])
-                            if source_list and isinstance(source_list, list) and len(source_list) > 0:
-                                src_text = source_list[0].get("text", "")
-                                if src_text:
-                                    link_info = item.get("linkInfo", {})
-                                    link = link_info.get("href", "") or link_info.get("url", "")
-                                    
-                                    found_url = link
-                                    found_source = src_text
-                                    if found_url and found_source:
-                                        break
-                        if found_url and found_source:
+                    if real_url:
+                        found_url = real_url
+                        found_source = str(source)
+                        if found_source:
                             break
 
-            except (json.JSONDecodeError, Exception):
-                continue
-            
-            if found_url and found_source:
-                break
-    else:
+            # 子策略2: blocksList (备选)
+            if not found_url:
+                blocks_list = data.get("cardData", {}).get("blocksList", [])
+                for block in blocks_list:
+                    items = block.get("data", {}).get("items", [])
+                    for item in items:
+                        source_list = item.get("sourceList", [])
+                        if source_list and isinstance(source_list, list) and len(source_list) > 0:
+                            src_text = source_list[0].get("text", "")
+                            if src_text:
+                                link_info = item.get("linkInfo", {})
+                                link = link_info.get("href", "") or link_info.get("url", "")
+                                
+                                found_url = link
+                                found_source = src_text
+                                if found_url and found_source:
+                                    break
+                    if found_url and found_source:
+                        break
+
+        except (json.JSONDecodeError, Exception):
+            continue
+        
+        if found_url and found_source:
+            break
+
+    if not has_s_data:
         # 备选: 简单的百家号链接
-        bjh_pattern = r'https://baijiahao\.baidu\.com/s\?id=\d+'
-        bjh_matches = re.findall(bjh_pattern, html)
-        if bjh_matches:
-            found_url = bjh_matches[0]
+        bjh_match = re.search(r'https://baijiahao\.baidu\.com/s\?id=\d+', html)
+        if bjh_match:
+            found_url = bjh_match.group(0)
             found_source = "Baidu (Fallback)"
 
     # 策略2: BeautifulSoup DOM 解析
     if not found_source or found_source == "Baidu (Fallback)":
         try:
-            soup = BeautifulSoup(html, "html.parser")
+            soup = html_parser.make_soup(html)
             
             # 查找 cosc-source-text
             cosc_source = soup.select_one(".cosc-source-text")
@@ -239,51 +228,112 @@ def extract_from_html(html: str) -> Tuple[str, str]:
 
     return found_url, found_source
 
-def resolve_real_source(search_url: str, driver=None) -> Tuple[str, str]:
-    """访问搜索页面提取真实URL和来源（Selenium优先）"""
-    if not search_url:
-        return "", "百度"
+def _record_tier(tier: str):
+    with _tier_lock:
+        _tier_stats[tier] += 1
 
-    print(f"        正在解析: {search_url[:60]}...")
-    html = ""
-    
-    # 使用 Selenium
-    if driver:
-        try:
-            driver.get(search_url)
-            time.sleep(2)
-            html = driver.page_source
-            
-            # 检测验证码
-            if "百度安全验证" in driver.title or "security-verification" in html:
-                print(f"        [!] 检测到百度安全验证")
-                return search_url, "百度"
-                
-        except Exception as e:
-            print(f"        [!] Selenium 错误: {type(e).__name__}")
-            return search_url, "百度"
-    else:
-        # 备选: requests
-        try:
-            session = get_no_proxy_session()
-            resp = session.get(search_url, headers=get_headers(), timeout=10)
-            if "wappass.baidu.com" in resp.url or "security-verification" in resp.text:
-                print(f"        [!] 检测到验证码 (requests)")
-                return search_url, "百度"
-            html = resp.text
-        except Exception as e:
-            print(f"        [!] Request 错误: {type(e).__name__}")
-            return search_url, "百度"
+def reset_tier_stats():
+    """清零来源解析分级统计"""
+    with _tier_lock:
+        for key in _tier_stats:
+            _tier_stats[key] = 0
 
-    # 解析 HTML
-    real_url, source = extract_from_html(html)
-    
+def report_tier_stats() -> Dict[str, int]:
+    """打印并返回本次运行各级解析的命中率"""
+    with _tier_lock:
+        stats = dict(_tier_stats)
+    total = sum(stats.values())
+    if total:
+        summary = ", ".join(f"{tier} {n}/{total} ({n / total:.0%})" for tier, n in stats.items())
+        print(f"[Baidu] 来源解析命中: {summary}")
+    return stats
+
+def _is_captcha(url: str, html: str) -> bool:
+    return any(marker in url or marker in html for marker in CAPTCHA_MARKERS)
+
+def _is_resolved(real_url: str, source: str) -> bool:
+    return bool(real_url) and source not in ("", "百度", "Baidu (Fallback)")
+
+def _ensure_cookies():
+    """首次请求前访问百度首页获取 BAIDUID 等 Cookie（保存在共享 Session 中）"""
+    global _cookies_ready
+    if _cookies_ready:
+        return
+    try:
+        http_client.get(HOME_URL, headers=get_headers(), timeout=10, trust_env=False)
+    except Exception as e:
+        print(f"        [!] Cookie 预热失败: {type(e).__name__}")
+    _cookies_ready = True
+
+def _finalize_source(real_url: str, source: str, driver=None) -> Tuple[str, str]:
+    """补全百家号来源"""
     # 如果是百家号且来源未知,尝试进一步解析
     if real_url and "baijiahao.baidu.com" in real_url and source == "Baidu (Fallback)":
         print(f"        [+] 解析百家号来源: {real_url[:50]}...")
         bj_source = resolve_baijiahao_source(real_url, driver=driver)
         if bj_source:
             source = bj_source
+    return real_url, source
+
+def resolve_with_http(search_url: str) -> Optional[Tuple[str, str]]:
+    """第一级：普通 HTTP 请求解析 s-data；遇到验证码或未找到引用时返回 None"""
+    try:
+        _ensure_cookies()
+        resp = http_client.get(search_url, headers=get_headers(), timeout=10, trust_env=False)
+        if _is_captcha(resp.url, resp.text):
+            print(f"        [!] 检测到验证码 (HTTP)，转用浏览器")
+            return None
+        html = resp.text
+    except Exception as e:
+        print(f"        [!] Request 错误: {type(e).__name__}")
+        return None
+
+    real_url, source = _finalize_source(*extract_from_html(html))
+    if not _is_resolved(real_url, source):
+        print(f"        [!] HTTP 未找到引用来源，转用浏览器")
+        return None
+    return real_url, source
+
+def resolve_with_selenium(search_url: str, driver) -> Tuple[str, str]:
+    """第二级：Selenium 渲染页面后解析"""
+    try:
+        driver.get(search_url)
+        page_ready.wait_ready(driver, SEARCH_PAGE_READY, timeout=READY_TIMEOUT)
+        html = driver.page_source
+        
+        # 检测验证码
+        if "百度安全验证" in driver.title or "security-verification" in html:
+            print(f"        [!] 检测到百度安全验证")
+            return search_url, "百度"
+            
+    except Exception as e:
+        print(f"        [!] Selenium 错误: {type(e).__name__}")
+        return search_url, "百度"
+
+    return _finalize_source(*extract_from_html(html), driver=driver)
+
+def resolve_real_source(search_url: str, get_driver=None) -> Tuple[str, str]:
+    """
+    分级解析搜索页面的真实URL和来源：
+    1. HTTP 快速通道（免浏览器）
+    2. 命中验证码或未找到引用时回退到 Selenium
+    :param search_url: 百度搜索页面URL
+    :param get_driver: 返回 WebDriver 的函数（仅在需要回退时调用，按需启动浏览器）
+    :return: (真实URL, 来源)
+    """
+    if not search_url:
+        return "", "百度"
+
+    print(f"        正在解析: {search_url[:60]}...")
+    
+    result = resolve_with_http(search_url)
+    if result:
+        _record_tier("http")
+        return result
+
+    driver = get_driver() if get_driver else None
+    real_url, source = resolve_with_selenium(search_url, driver) if driver else ("", "")
+    _record_tier("selenium" if _is_resolved(real_url, source) else "unresolved")
     
     final_url = real_url if real_url else search_url
     final_source = source if source else "百度"
@@ -296,14 +346,13 @@ def resolve_baijiahao_source(url: str, driver=None) -> str:
         html = ""
         if driver:  # Selenium driver object
             driver.get(url)
-            time.sleep(2)
+            page_ready.wait_ready(driver, BAIJIAHAO_PAGE_READY, timeout=READY_TIMEOUT)
             html = driver.page_source
         else:
-            session = get_no_proxy_session()
-            resp = session.get(url, headers=get_headers(), timeout=10)
+            resp = http_client.get(url, headers=get_headers(), timeout=10, trust_env=False)
             html = resp.text
             
-        soup = BeautifulSoup(html, "html.parser")
+        soup = html_parser.make_soup(html)
         
         # 1. 作者名选择器
         author = soup.select_one(".author-name, span.author-name, a.author-name, span[class*='author'], a[class*='author']")
@@ -326,6 +375,17 @@ def resolve_baijiahao_source(url: str, driver=None) -> str:
         
     return ""
 
+def _resolve_item(item: Dict) -> Tuple[str, str]:
+    """worker：解析单条热搜的来源（需要回退时才从浏览器池借出独立 driver）"""
+    try:
+        with browser_pool.lazy_acquire(user_agent=USER_AGENT) as get_driver:
+            return resolve_real_source(item['search_url'], get_driver=get_driver)
+    except Exception as e:
+        print(f"        [!] 解析失败: {type(e).__name__}")
+        return item['search_url'], "百度"
+    finally:
+        time.sleep(REQUEST_INTERVAL)
+
 def get_baidu_news(count: int = 9) -> List[dict]:
     """
     抓取百度热搜新闻
@@ -347,51 +407,41 @@ def get_baidu_news(count: int = 9) -> List[dict]:
     print(f"[Baidu] ✓ 获取{len(items)}条候选新闻")
     results = []
     
-    # 2. 初始化 Selenium
-    driver = init_driver()
-    if not driver:
-        print("[Baidu] ✗ 浏览器初始化失败")
-        return []
+    reset_tier_stats()
     
-    try:
-        for item in items:
-            print(f"\n[Baidu] 处理第{item['rank']}/{len(items)}条:")
-            print(f"  标题: {item['title']}")
-            
-            # 解析真实来源
-            real_url, source_name = resolve_real_source(item['search_url'], driver=driver)
-            
-            print(f"  来源: {source_name}")
-            
-            # 内容优先使用desc
-            content_val = item['desc'] or item['title']
-            if len(content_val) > 100:
-                content_preview = content_val[:100] + "..."
-            else:
-                content_preview = content_val
-            print(f"  内容: {content_preview}")
-            print(f"  链接: {real_url[:60]}...")
-            
-            results.append({
-                "rank": len(results) + 1,
-                "title": item['title'],
-                "title0": "",
-                "content": content_val,
-                "index": item['hot_score'],
-                "author": "baidu",
-                "source_platform": source_name,
-                "source_url": real_url,
-                "image": item['image_url']
-            })
-            print(f"  ✓ 第{len(results)}条新闻已保存")
-            
-            time.sleep(0.5)
+    # 2. 并发解析来源，结果按原始排名输出
+    print(f"[Baidu] 并发解析来源 (并发 {RESOLVE_WORKERS})...")
+    with ThreadPoolExecutor(max_workers=RESOLVE_WORKERS) as executor:
+        resolved = list(executor.map(_resolve_item, items))
     
-    finally:
-        if driver:
-            driver.quit()
-            print("    [✓] 浏览器已关闭")
+    for item, (real_url, source_name) in zip(items, resolved):
+        print(f"\n[Baidu] 处理第{item['rank']}/{len(items)}条:")
+        print(f"  标题: {item['title']}")
+        print(f"  来源: {source_name}")
+        
+        # 内容优先使用desc
+        content_val = item['desc'] or item['title']
+        if len(content_val) > 100:
+            content_preview = content_val[:100] + "..."
+        else:
+            content_preview = content_val
+        print(f"  内容: {content_preview}")
+        print(f"  链接: {real_url[:60]}...")
+        
+        results.append({
+            "rank": len(results) + 1,
+            "title": item['title'],
+            "title0": "",
+            "content": content_val,
+            "index": item['hot_score'],
+            "author": "baidu",
+            "source_platform": source_name,
+            "source_url": real_url,
+            "image": item['image_url']
+        })
+        print(f"  ✓ 第{len(results)}条新闻已保存")
     
+    report_tier_stats()
     print(f"\n[Baidu] ✓ 抓取完成，共{len(results)}条新闻\n")
     return results
 
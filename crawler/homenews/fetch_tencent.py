@@ -6,20 +6,18 @@ import sys
 import re
 import os
 from typing import Tuple, List
-from bs4 import BeautifulSoup
 
-def get_no_proxy_session():
-    """创建一个不使用系统代理的 Session"""
-    session = requests.Session()
-    session.trust_env = False
-    return session
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import html_parser
+import article_cache
+import browser_pool
+import page_ready
 
 # Selenium 导入
 try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service as ChromeService
-    from selenium.webdriver.chrome.options import Options as ChromeOptions
-    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.common.by import By
     SELENIUM_AVAILABLE = True
 except ImportError:
     SELENIUM_AVAILABLE = False
@@ -32,6 +30,11 @@ HEADERS = {
 # 腾讯新闻标签页ID（早报热点）
 TAG_ID = "aEWqxLtdgmQ="
 
+# 页面就绪条件（替代固定等待）：文章链接渲染完成 / 滚动后新内容加载
+ARTICLE_LINK_SELECTOR = "a[href*='/rain/a/'], a[href*='/omn/']"
+INITIAL_LOAD_TIMEOUT = 8
+SCROLL_LOAD_TIMEOUT = 3
+
 def install_selenium_hint():
     """提示安装 Selenium"""
     print("\n" + "!"*50)
@@ -46,45 +49,6 @@ def install_selenium_hint():
     print("\n" + "!"*50 + "\n")
     sys.exit(1)
 
-def init_driver():
-    """初始化 Selenium WebDriver"""
-    if not SELENIUM_AVAILABLE:
-        install_selenium_hint()
-    
-    print("    [*] 正在初始化浏览器...")
-    try:
-        options = ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-proxy-server")
-        options.add_argument("--disable-images")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(f"user-agent={HEADERS['User-Agent']}")
-        options.page_load_strategy = 'eager'
-        
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # 隐藏 Selenium 特征
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-          "source": """
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined
-            })
-          """
-        })
-        
-        driver.set_page_load_timeout(60)
-        print("    [✓] 浏览器初始化成功")
-        return driver
-    except Exception as e:
-        print(f"    [!] 浏览器初始化失败: {type(e).__name__}")
-        return None
-
 def get_links_with_selenium(tag_id: str, count: int, driver) -> List[str]:
     """使用 Selenium 获取动态加载的链接"""
     url = f"https://news.qq.com/tag/{tag_id}"
@@ -95,7 +59,11 @@ def get_links_with_selenium(tag_id: str, count: int, driver) -> List[str]:
     
     try:
         driver.get(url)
-        time.sleep(3)  # 等待初始加载
+        page_ready.wait_ready(
+            driver,
+            page_ready.selector_present(ARTICLE_LINK_SELECTOR),
+            timeout=INITIAL_LOAD_TIMEOUT,
+        )
         
         print(f"    [*] 页面标题: {driver.title}")
         
@@ -105,7 +73,6 @@ def get_links_with_selenium(tag_id: str, count: int, driver) -> List[str]:
         
         while len(links) < count and retry_count < 3:
             # 查找所有链接
-            from selenium.webdriver.common.by import By
             all_links = driver.find_elements(By.TAG_NAME, 'a')
             
             for link_element in all_links:
@@ -135,14 +102,17 @@ def get_links_with_selenium(tag_id: str, count: int, driver) -> List[str]:
             
             # 滚动到底部
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(2)
+            grown = page_ready.wait_ready(
+                driver,
+                page_ready.scroll_height_grows(last_height),
+                timeout=SCROLL_LOAD_TIMEOUT,
+            )
             
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                retry_count += 1
-            else:
+            if grown:
                 retry_count = 0
-            last_height = new_height
+            else:
+                retry_count += 1
+            last_height = driver.execute_script("return document.body.scrollHeight")
         
         print(f"    [✓] Selenium 获取成功，找到 {len(links)} 条链接")
         
@@ -152,17 +122,25 @@ def get_links_with_selenium(tag_id: str, count: int, driver) -> List[str]:
     return links[:count]
 
 def get_article_details(url: str, max_retries: int = 2) -> Tuple[str, str, str, str]:
-    """获取文章详情（带重试机制）"""
+    """获取文章详情（带重试机制，优先使用跨运行的文章缓存）"""
+    cached = article_cache.get(url)
+    if cached:
+        return cached["title"], cached["content"], cached["source_platform"], cached["image"]
+
     for attempt in range(max_retries):
         try:
             if attempt > 0:
                 time.sleep(2)
             
-            session = get_no_proxy_session()
-            response = session.get(url, headers=HEADERS, timeout=10)
+            headers = {**HEADERS, **article_cache.conditional_headers(url)}
+            response = http_client.get(url, headers=headers, timeout=10, trust_env=False)
+            if response.status_code == 304:
+                cached = article_cache.revalidated(url, response)
+                if cached:
+                    return cached["title"], cached["content"], cached["source_platform"], cached["image"]
             response.raise_for_status()
             response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = html_parser.make_soup(response.text)
             
             # 检测是否为视频 URL
             is_video = bool(re.search(r'/[a-zA-Z0-9]*V[a-zA-Z0-9]*', url))
@@ -256,6 +234,10 @@ def get_article_details(url: str, max_retries: int = 2) -> Tuple[str, str, str,
                 if "logo_gray" in cover_image or "default" in cover_image:
                     cover_image = ""
             
+            # 标题与正文都提取成功才缓存（正文退回标题的结果下次运行重新抓取）
+            if title != "未找到标题" and content and content != title:
+                article_cache.store(url, {"title": title, "content": content,
+                                          "source_platform": source_platform, "image": cover_image}, response)
             return title, content, source_platform, cover_image
             
         except requests.exceptions.Timeout:
@@ -275,13 +257,15 @@ def get_tencent_news(count: int = 9) -> List[dict]:
     """
     print("[Tencent] 开始抓取早报新闻...")
     
-    # 初始化浏览器
-    driver = init_driver()
-    if not driver:
-        print("[Tencent] ✗ 浏览器初始化失败")
-        return []
+    if not SELENIUM_AVAILABLE:
+        install_selenium_hint()
     
-    try:
+    # 从共享浏览器池借出 Selenium driver
+    with browser_pool.acquire(user_agent=HEADERS['User-Agent']) as driver:
+        if not driver:
+            print("[Tencent] ✗ 浏览器初始化失败")
+            return []
+        
         # 使用 Selenium 获取链接
         links = get_links_with_selenium(TAG_ID, count, driver)
         
@@ -334,11 +318,6 @@ def get_tencent_news(count: int = 9) -> List[dict]:
         
         print(f"\n[Tencent] ✓ 抓取完成，共{len(results)}条新闻\n")
         return results
-    
-    finally:
-        if driver:
-            driver.quit()
-            print("    [✓] 浏览器已关闭")
 
 if __name__ == "__main__":
     import sys
@@ -3,19 +3,20 @@ import argparse
 import json
 import time
 import random
-import requests
 import os
 import re
 import sys
 from typing import Tuple, List
-from bs4 import BeautifulSoup
+
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import html_parser
+import browser_pool
+import page_ready
 
 # Selenium 导入
 try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service as ChromeService
-    from selenium.webdriver.chrome.options import Options as ChromeOptions
-    from webdriver_manager.chrome import ChromeDriverManager
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.webdriver.common.by import By
@@ -32,11 +33,12 @@ HEADERS = {
     "Referer": "https://www.toutiao.com/"
 }
 
-def get_no_proxy_session():
-    """创建一个不使用系统代理的 Session"""
-    session = requests.Session()
-    session.trust_env = False
-    return session
+# 内容页就绪条件（替代固定等待）：正文或作者信息渲染完成
+CONTENT_READY_SELECTOR = (
+    "article, .weitoutiao-html, .author-info .name, .article-meta .name, "
+    ".author-name, .user-card-name, .media-info .name"
+)
+CONTENT_READY_TIMEOUT = 6
 
 def install_selenium_hint():
     """提示安装 Selenium"""
@@ -52,51 +54,11 @@ def install_selenium_hint():
     print("\n" + "!"*50 + "\n")
     sys.exit(1)
 
-def init_driver():
-    """初始化 Selenium WebDriver"""
-    if not SELENIUM_AVAILABLE:
-        install_selenium_hint()
-    
-    print("    [*] 正在初始化浏览器...")
-    try:
-        options = ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-proxy-server")
-        options.add_argument("--disable-images")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(f"user-agent={USER_AGENT}")
-        options.page_load_strategy = 'eager'
-        
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # 隐藏 Selenium 特征
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-          "source": """
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined
-            })
-          """
-        })
-        
-        driver.set_page_load_timeout(60)
-        print("    [✓] 浏览器初始化成功")
-        return driver
-    except Exception as e:
-        print(f"    [!] 浏览器初始化失败: {type(e).__name__}")
-        return None
-
 def fetch_hot_list(limit: int = 9) -> List[dict]:
     """从今日头条热榜API获取链接"""
     try:
         print("    [*] 从热榜API获取文章列表...")
-        session = get_no_proxy_session()
-        response = session.get(API_URL, headers=HEADERS, timeout=15)
+        response = http_client.get(API_URL, headers=HEADERS, timeout=15, trust_env=False)
         response.raise_for_status()
         
         data = response.json()
@@ -172,8 +134,12 @@ def resolve_article_data(rank: int, title: str, initial_url: str, driver) -> Tup
         if source_url != driver.current_url:
             driver.get(source_url)
         
-        time.sleep(2)
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        page_ready.wait_ready(
+            driver,
+            page_ready.selector_present(CONTENT_READY_SELECTOR),
+            timeout=CONTENT_READY_TIMEOUT,
+        )
+        soup = html_parser.make_soup(driver.page_source)
         
         # 步骤4: 提取数据
         
@@ -232,13 +198,15 @@ def get_toutiao_news(count: int = 9) -> List[dict]:
     """
     print("[Toutiao] 开始抓取热搜新闻...")
     
-    # 初始化浏览器
-    driver = init_driver()
-    if not driver:
-        print("[Toutiao] ✗ 浏览器初始化失败")
-        return []
+    if not SELENIUM_AVAILABLE:
+        install_selenium_hint()
     
-    try:
+    # 从共享浏览器池借出 Selenium driver
+    with browser_pool.acquire(user_agent=USER_AGENT) as driver:
+        if not driver:
+            print("[Toutiao] ✗ 浏览器初始化失败")
+            return []
+        
         # 获取热榜链接
         items = fetch_hot_list(limit=count)
         
@@ -299,11 +267,6 @@ def get_toutiao_news(count: int = 9) -> List[dict]:
         
         print(f"\n[Toutiao] ✓ 抓取完成，共{len(results)}条新闻\n")
         return results
-    
-    finally:
-        if driver:
-            driver.quit()
-            print("    [✓] 浏览器已关闭")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Toutiao Hot News Scraper")
@@ -1,17 +1,29 @@
 # Renamed from polish_v3.py
 import os
+import sys
 import json
 import time
-import requests
 import shutil
 import argparse
 from datetime import datetime, timedelta
 
+# 公共模块（state_store 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import history_store
+import llm_cache
+import dedup
+import prompt_builder
+import deepseek_client
+import polish_stages
+
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "")
-DEEPSEEK_BASE_URL = "https://api.deepseek.com/chat/completions"
-# 修复：使用绝对路径指向当前目录的历史文件
-HISTORY_FILE = os.path.join(os.path.dirname(__file__), "homenews_history.json")
+# 历史库分区：当前目录的 homenews_history.jsonl
+HISTORY = history_store.open_section(os.path.dirname(os.path.abspath(__file__)), "homenews")
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
+# 单条候选发送给 AI 的正文上限（字符）
+CONTENT_CHAR_LIMIT = int(os.getenv("HOME_PROMPT_CONTENT_CHARS", "800"))
+# 不经过 AI、按 id 从原始候选回填的字段
+RESTORED_FIELDS = ("source_platform", "source_url", "image", "author")
 
 SYSTEM_PROMPT = """你是一名专业中文新闻编辑与内容策划人员，负责从多个新闻平台的抓取结果中，进行事件级去重、筛选、专业简化与内容整合，生成一组适合发布在微信公众号与小红书的新闻精选内容。
 
@@ -49,9 +61,8 @@ SYSTEM_PROMPT = """你是一名专业中文新闻编辑与内容策划人员，
     - 或借鉴常见网络爆款标题结构（如“突然”“炸锅”“定了”“彻底”“没想到”等），但不得失真；
 
 数据完整性要求：
-- 对于选中的每条新闻，必须保留其原始的 `source_platform`, `source_url`, `source` 和 `image` 字段。
-- `image` 字段必须原样复制，不要修改链接地址。
-- `source` 字段表示来源平台（baidu/tencent/toutiao），必须保留。
+- 每条输入新闻都有编号 `id`，对选中的每条新闻必须原样返回其 `id`，不得编造或改动。
+- 无需返回链接、图片与来源字段，程序会按 `id` 从原始数据回填。
 
 输出格式要求（必须严格遵守）
 你必须输出一个包含 "news" 字段的 JSON 对象。
@@ -59,41 +70,48 @@ SYSTEM_PROMPT = """你是一名专业中文新闻编辑与内容策划人员，
 
 {{
   "news": [
-    {{ 
-      "rank": 0, 
-      "title": "爆炸性疑问标题？", 
-      "content": "",
-      "source_platform": "",
-      "source_url": "",
-      "source": "",
-      "image": "" 
-    }},
-    {{ 
-      "rank": 1, 
-      "title": "新闻1标题", 
-      "content": "新闻1正文...", 
-      "source_platform": "来源平台名称", 
-      "source_url": "原始文章链接", 
-      "source": "baidu",
-      "image": "原始图片链接(必须保留)" 
-    }},
-    {{ 
-      "rank": 2, 
-      "title": "新闻2标题", 
-      "content": "新闻2正文...", 
-      "source_platform": "来源平台名称", 
-      "source_url": "原始文章链接", 
-      "source": "tencent",
-      "image": "原始图片链接" 
-    }},
+    {{ "rank": 0, "id": null, "title": "爆炸性疑问标题？", "content": "" }},
+    {{ "rank": 1, "id": 12, "title": "新闻1标题", "content": "新闻1正文..." }},
+    {{ "rank": 2, "id": 3, "title": "新闻2标题", "content": "新闻2正文..." }},
     ...
     {{ "rank": 9, ... }}
   ]
 }}
 
 注意：Rank 0 的 title 必须以问号（?）结尾。
-注意：Rank 0 的 content、source_platform、source_url、source、image 字段均留空。
-Rank 1-9 的所有字段都必须填充完整。
+注意：Rank 0 的 id 为 null，content 留空。
+Rank 1-9 的 id、title、content 都必须填充完整。
+"""
+
+# 两段式润色（见 polish_stages）：选择 / 单条改写 / 总结标题
+SELECT_COUNT = 9
+
+SELECT_PROMPT = """你是一名专业中文新闻编辑。请从输入的候选新闻（JSON 列表，每条带编号 id）中，通过事件级去重与筛选，选出 {count} 条"完全不同新闻事件"的新闻。
+
+【历史排重参考】以下是过去发布过的新闻，选出的新闻不得与其中任何一条为同一事件：
+{history_context_str}
+
+⚠️ 必须剔除涉及政治、军事、台湾的新闻。
+保留的新闻应侧重于：科技与商业、民生与社会热点、文化与娱乐、体育、奇闻轶事；尽量覆盖不同来源。
+
+只输出 JSON：{{"selected_ids": [按推荐顺序排列的 id]}}
+"""
+
+REWRITE_PROMPT = """你是一名专业中文新闻编辑。请将输入的一条新闻（JSON）改写为适合发布在微信公众号与小红书的精选内容：
+- 使用专业、正式的新闻体，不得虚构原文没有的信息。
+- 标题不超过 20 个汉字。
+- 正文不超过 50 个汉字，只保留"发生了什么 + 关键结果"。
+
+只输出 JSON：{"title": "标题", "content": "正文"}
+"""
+
+HEADLINE_PROMPT = """你是一名资深中文网络媒体编辑，擅长从大量热点新闻中提炼高度吸引眼球但不造谣、不歪曲事实的标题。
+请根据输入的本期新闻标题列表（JSON），生成一个总结性热点标题，用于 Rank 0 位置：
+- 允许"标题党"，追求点击率与传播力，但不得虚构事实、不得引入原文未出现的结论；
+- 不超过 10 个汉字（含标点），必须以问号（？）结尾；
+- 可以只抓住最具传播性的一个侧面，或借鉴常见爆款结构（如"突然""炸锅""定了""彻底""没想到"），但不得失真。
+
+只输出 JSON：{"title": "总结标题"}
 """
 
 def clean_output_dir():
@@ -103,43 +121,13 @@ def clean_output_dir():
     os.makedirs(OUTPUT_DIR)
 
 def load_history():
-    """加载历史库"""
-    if not os.path.exists(HISTORY_FILE):
-        print(f"  [*] 历史文件不存在，路径: {HISTORY_FILE}")
-        return []
-    try:
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            history = json.load(f)
-            return history if isinstance(history, list) else []
-    except Exception as e:
-        print(f"  [!] 历史文件读取失败: {e}")
-        return []
+    """加载最近的历史（用于提示词）"""
+    return HISTORY.recent()
 
 def save_history(news_list):
-    """保存历史库，最多保留36条"""
-    history = load_history()
-    
-    # 添加新项目（rank 1-9）
-    for item in news_list:
-        if item.get('rank', 0) > 0:  # 跳过rank 0的摘要
-            history.append({
-                "title": item.get('title', ''),
-                "content": item.get('content', ''),
-                "source_platform": item.get('source_platform', ''),
-                "timestamp": datetime.utcnow().isoformat()
-            })
-    
-    # 只保留最新的36条（4*9=36）
-    initial_count = len(history)
-    if len(history) > 36:
-        history = history[-36:]
-        deleted_count = initial_count - 36
-        print(f"  历史库已更新：保留最新36条，删除早期{deleted_count}条")
-    else:
-        print(f"  历史库已更新：当前{len(history)}条")
-    
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
+    """追加本次发布的新闻到历史库（跳过 rank 0 的摘要）"""
+    total = HISTORY.add([item for item in news_list if item.get('rank', 0) > 0])
+    print(f"  历史库已更新：当前{total}条")
 
 def save_polished_news(polished_data):
     """保存润色后的新闻JSON文件"""
@@ -217,8 +205,11 @@ def fetch_news_from_scrapers(count=9):
     print(f"✓ 全部平台抓取完成，共获得 {len(all_news)} 条新闻候选\n")
     return all_news
 
-def call_deepseek_api(all_news_items, history_context, max_retries=3):
-    """调用DeepSeek API进行润色"""
+def call_deepseek_api(all_news_items, history_context, max_retries=3, on_item=None):
+    """
+    调用DeepSeek API进行润色（流式输出）
+    :param on_item: on_item(item)，每生成完一条新闻（已回填链接与图片）立即回调
+    """
     print("\n" + "-"*30)
     print("🤖 [AI] 正在启动新闻润色与筛选...")
     print("-"*30)
@@ -227,36 +218,26 @@ def call_deepseek_api(all_news_items, history_context, max_retries=3):
         print("  [!] 错误: 未找到 DEEPSEEK_API_KEY。")
         return None
 
-    # Format History
+    # 历史与候选各自装入 token 预算：历史从最新往前取，候选按平台轮流、排名与热度优先
     history_str = "无历史记录"
-    if history_context:
-        history_lines = [f"- {h.get('title')} ({h.get('timestamp', '')[:10]})" for h in history_context]
-        history_str = "\n".join(history_lines)  # 发送全部历史记录，不做切片
-
-    input_payload = []
-    for item in all_news_items:
-        content_text = item.get('content', '')
-        if len(content_text) > 800:
-            content_text = content_text[:800] + "..."
-            
-        entry = {
+    history_lines = prompt_builder.fit_history(
+        [f"- {h.get('title')} ({h.get('timestamp', '')[:10]})" for h in history_context])
+    if history_lines:
+        history_str = "\n".join(history_lines)
+
+    def to_entry(item):
+        return {
             "title": item.get('title', ''),
-            "content": content_text,
+            "content": prompt_builder.truncate(item.get('content', ''), CONTENT_CHAR_LIMIT),
             "source_platform": item.get('source_platform', 'Unknown'),
-            "source_url": item.get('source_url', ''),
-            "image": item.get('image', '')
         }
-        if entry['title'] or entry['content']:
-            input_payload.append(entry)
 
-    json_payload_str = json.dumps(input_payload, ensure_ascii=False)
-    print(f"  [>] 发送 {len(input_payload)} 条候选新闻 + {len(history_context)} 条历史记录给 AI...")
+    usable = [item for item in all_news_items if item.get('title') or item.get('content')]
+    input_payload, candidates_by_id = prompt_builder.fit_candidates(usable, to_entry)
+
+    json_payload_str = prompt_builder.compact_json(input_payload)
+    print(f"  [>] 发送 {len(input_payload)} 条候选新闻 + {len(history_lines)} 条历史记录给 AI...")
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-    }
-    
     # 注入历史记录到提示词
     final_system_prompt = SYSTEM_PROMPT.format(history_context_str=history_str)
     
@@ -267,17 +248,63 @@ def call_deepseek_api(all_news_items, history_context, max_retries=3):
             {"role": "user", "content": json_payload_str}
         ],
         "temperature": 0.3,
-        "response_format": {"type": "json_object"},
-        "stream": False
+        "response_format": {"type": "json_object"}
     }
 
+    # 相同模型/提示词/候选/历史直接复用上次通过校验的响应
+    cache_key = llm_cache.make_key("home_polish", data, llm_cache.template_version(SYSTEM_PROMPT))
+
+    def restore(news_list):
+        prompt_builder.restore(news_list, candidates_by_id, RESTORED_FIELDS)
+        for item in news_list:
+            item['source'] = item.get('author', '')
+        return news_list
+
+    def forward(item):
+        if on_item:
+            on_item(restore([dict(item)])[0])
+
+    # 两段式：短选择调用 + 并发单条改写 + 总结标题；任一阶段失败时退回单次调用
+    if polish_stages.enabled():
+        news_list = polish_stages.run(
+            "home_polish", input_payload, SELECT_COUNT, DEEPSEEK_API_KEY, "home_polish",
+            llm_cache.template_version(SELECT_PROMPT, REWRITE_PROMPT, HEADLINE_PROMPT),
+            select_messages=[
+                {"role": "system", "content": SELECT_PROMPT.format(count=SELECT_COUNT, history_context_str=history_str)},
+                {"role": "user", "content": json_payload_str}
+            ],
+            build_rewrite_messages=lambda entry: [
+                {"role": "system", "content": REWRITE_PROMPT},
+                {"role": "user", "content": prompt_builder.compact_json({k: v for k, v in entry.items() if k != "id"})}
+            ],
+            build_headline_messages=lambda items: [
+                {"role": "system", "content": HEADLINE_PROMPT},
+                {"role": "user", "content": prompt_builder.compact_json([item["title"] for item in items])}
+            ],
+            on_item=forward)
+        if news_list:
+            return {"news": restore(news_list)}
+        print("  [!] 两段式润色失败，改用单次调用")
+
+    partial = []
     for attempt in range(max_retries):
         try:
             start_time = time.time()
-            response = requests.post(DEEPSEEK_BASE_URL, headers=headers, json=data, timeout=120)
-            response.raise_for_status()
-            result_json = response.json()
-            answer_content = result_json["choices"][0]["message"]["content"]
+            answer_content = llm_cache.get(cache_key) if attempt == 0 else None
+            fresh = answer_content is None
+            if fresh:
+                answer_content, usage, streamed, complete = deepseek_client.chat(
+                    data, DEEPSEEK_API_KEY, on_item=forward)
+                prompt_builder.log_usage("home_polish", data["messages"], {"usage": usage},
+                                         completion_text=answer_content)
+                if not complete:
+                    # 输出被截断：记下已完整的条目后重试，全部重试都截断时使用条目最多的一次
+                    print(f"  [!] AI 输出不完整 (尝试 {attempt + 1}/{max_retries})，已完整 {len(streamed)} 条")
+                    if len(streamed) > len(partial):
+                        partial = streamed
+                    continue
+            else:
+                prompt_builder.log_usage("home_polish", data["messages"], completion_text=answer_content)
             parsed_data = json.loads(answer_content)
             
             elapsed = time.time() - start_time
@@ -295,6 +322,9 @@ def call_deepseek_api(all_news_items, history_context, max_retries=3):
                 if len(news_list) < 10:
                     print(f"  [!] 警告: AI 返回条目少于预期 ({len(news_list)}/10)")
                 
+                if fresh:
+                    llm_cache.put(cache_key, answer_content, "home_polish")
+                restore(news_list)
                 return parsed_data
             else:
                 print(f"  [!] API response format unexpected.")
@@ -303,12 +333,19 @@ def call_deepseek_api(all_news_items, history_context, max_retries=3):
             print(f"  [!] AI API 调用失败 (尝试 {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
                 time.sleep(3)
-                
+    
+    if partial:
+        print(f"  [!] 所有重试输出均不完整，使用已完整的 {len(partial)} 条")
+        return {"news": restore(partial)}
     print("  [!] 所有重试均失败。")
     return None
 
-def main(count=9):
-    """主流程"""
+def main(count=9, update_history=True, on_item=None):
+    """
+    主流程
+    :param update_history: 是否立即写入历史库（pipeline 在打包成功后再写，打包失败重跑时提示词不变，可命中 AI 响应缓存）
+    :param on_item: AI 每生成完一条新闻立即回调（pipeline 借此提前下载图片）
+    """
     print("\n" + "="*30)
     print("🚀 [Home News] 开始润色流程")
     print("="*30)
@@ -328,8 +365,11 @@ def main(count=9):
         print("  [!] 未能抓取任何新闻")
         return None
     
+    # 本地预筛：跨平台同一事件只留一条，剔除历史库中（回看 HISTORY_DEDUP_DAYS 天）已发布的事件
+    all_news = dedup.filter_candidates(all_news, HISTORY.within_days(), label="[Home] ", min_keep=count + 3)
+    
     # 调用DeepSeek API进行润色
-    polished_data = call_deepseek_api(all_news, history_items)
+    polished_data = call_deepseek_api(all_news, history_items, on_item=on_item)
     
     if not polished_data:
         print("  [!] AI润色失败")
@@ -358,8 +398,9 @@ def main(count=9):
     print(f"  [✓] 新闻润色完成，共 {len(news_list)} 条。")
     
     # 更新历史库
-    print("  正在更新历史库...")
-    save_history(news_list)
+    if update_history:
+        print("  正在更新历史库...")
+        save_history(news_list)
     
     # 返回给 pipeline 的数据（不包含 timestamp）
     return {"news": news_list}
@@ -0,0 +1,39 @@
+"""
+HTML 解析后端
+- 统一创建 BeautifulSoup，默认使用 lxml（C 实现），未安装时回退到 html.parser
+- 可通过环境变量 HTML_PARSER 指定后端（lxml / html.parser / html5lib）
+- 支持 SoupStrainer，只解析需要的标签
+"""
+
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+FALLBACK_PARSER = "html.parser"
+
+def _detect_parser():
+    """选择可用的最快解析后端"""
+    preferred = os.getenv("HTML_PARSER", "").strip()
+    if preferred:
+        return preferred
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return FALLBACK_PARSER
+
+PARSER = _detect_parser()
+
+def make_soup(markup, parse_only=None, parser=None):
+    """
+    解析 HTML
+    :param markup: HTML 文本或字节
+    :param parse_only: SoupStrainer，只保留匹配的标签（及其子树）
+    :param parser: 指定解析后端，默认使用 PARSER
+    :return: BeautifulSoup 对象
+    """
+    return BeautifulSoup(markup, parser or PARSER, parse_only=parse_only)
+
+def only_tags(*names):
+    """只解析指定标签的 SoupStrainer"""
+    return SoupStrainer(list(names))
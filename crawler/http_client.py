@@ -0,0 +1,172 @@
+"""
+爬虫公共 HTTP 客户端模块
+- 全局共享 Session，按 host 复用 keep-alive 连接池（避免重复 TLS 握手）
+- 统一超时、重试与退避策略
+- 按 host 限制并发请求数
+- 支持录制/回放（离线基准测试，见 benchmarks/）
+"""
+
+import os
+import threading
+from urllib.parse import quote, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 默认超时（连接超时, 读取超时），调用方显式传入 timeout 时以调用方为准
+DEFAULT_TIMEOUT = (5, 15)
+
+# 连接池：缓存的 host 数量 / 每个 host 保持的连接数
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 16
+
+# 传输层重试：连接失败与限流/网关错误时指数退避（0.5s, 1s, ...）
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.5
+RETRY_STATUS = (429, 502, 503, 504)
+
+# 每个 host 的最大并发请求数（未配置的 host 使用默认值）
+DEFAULT_HOST_CONCURRENCY = 4
+HOST_CONCURRENCY = {
+    "top.baidu.com": 2,
+    "www.baidu.com": 3,
+    "baijiahao.baidu.com": 2,
+    "www.toutiao.com": 2,
+    "www.douyin.com": 2,
+}
+
+# 回放服务器地址（如 http://127.0.0.1:8765）：设置后所有请求改发到本地回放服务器
+REPLAY_SERVER = os.getenv("HTTP_REPLAY_SERVER", "").rstrip("/")
+# 回放服务器通过该响应头返回录制时的最终 URL（重定向后）
+REPLAY_URL_HEADER = "X-Replay-Url"
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_host_semaphores = {}
+_host_lock = threading.Lock()
+_response_hooks = []
+
+def _build_session(trust_env):
+    """创建带连接池和重试策略的 Session"""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.trust_env = trust_env
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(trust_env=True):
+    """
+    获取全局共享的 Session
+    :param trust_env: False 时不使用系统代理（国内站点）
+    :return: requests.Session
+    """
+    with _sessions_lock:
+        session = _sessions.get(trust_env)
+        if session is None:
+            session = _build_session(trust_env)
+            _sessions[trust_env] = session
+        return session
+
+def _get_host_semaphore(host):
+    with _host_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            limit = HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY)
+            semaphore = threading.BoundedSemaphore(limit)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+def _hold_until_close(response, semaphore):
+    """流式响应：并发名额占用到调用方 close()（只释放一次）"""
+    original_close = response.close
+    released = threading.Lock()
+
+    def close():
+        try:
+            original_close()
+        finally:
+            if released.acquire(blocking=False):
+                semaphore.release()
+
+    response.close = close
+
+def set_replay_server(base_url):
+    """
+    切换回放模式
+    :param base_url: 回放服务器地址，传空字符串恢复真实网络请求
+    """
+    global REPLAY_SERVER
+    REPLAY_SERVER = (base_url or "").rstrip("/")
+
+def add_response_hook(hook):
+    """
+    注册响应回调（录制用）
+    :param hook: callable(method, url, response)，每个成功返回的响应都会调用
+    """
+    _response_hooks.append(hook)
+
+def remove_response_hook(hook):
+    """注销响应回调"""
+    if hook in _response_hooks:
+        _response_hooks.remove(hook)
+
+def _replay(method, url, timeout, **kwargs):
+    """把请求转发到本地回放服务器，并还原录制时的响应 URL"""
+    replay_url = f"{REPLAY_SERVER}/replay?method={method}&url={quote(url, safe='')}"
+    kwargs.pop("verify", None)
+    response = get_session(False).request(method, replay_url, timeout=timeout, **kwargs)
+    response.url = response.headers.get(REPLAY_URL_HEADER, url)
+    return response
+
+def request(method, url, trust_env=True, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    发送 HTTP 请求（共享连接池 + 统一重试 + host 并发限制）
+    :param method: HTTP 方法
+    :param url: 请求地址
+    :param trust_env: False 时不使用系统代理
+    :param timeout: 超时时间（秒或 (连接, 读取) 元组）
+    :return: requests.Response
+    stream=True 时 host 并发名额一直占用到调用方 close() 响应（响应体下载同样受并发限制），
+    调用方读完或放弃响应体后必须 close()
+    """
+    semaphore = _get_host_semaphore(urlsplit(url).netloc.lower())
+    semaphore.acquire()
+    try:
+        if REPLAY_SERVER:
+            response = _replay(method, url, timeout, **kwargs)
+        else:
+            response = get_session(trust_env).request(method, url, timeout=timeout, **kwargs)
+    except BaseException:
+        semaphore.release()
+        raise
+    if kwargs.get("stream"):
+        _hold_until_close(response, semaphore)
+    else:
+        semaphore.release()
+    for hook in list(_response_hooks):
+        hook(method, url, response)
+    return response
+
+def get(url, trust_env=True, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """发送 GET 请求，参数同 request()"""
+    return request("GET", url, trust_env=trust_env, timeout=timeout, **kwargs)
+
+def close():
+    """关闭所有共享 Session（进程结束前调用）"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,230 @@
+"""
+跨运行的图片缓存
+- 按 URL 记录 ETag / Last-Modified，下次运行用条件请求重新验证（304 直接复用）
+- 按原图内容哈希（sha256）存放处理后的图片（主图与额外尺寸/格式）与元数据（尺寸、是否长图）
+  不同 URL 指向同一张图时只处理一次；处理参数（variant）变化后自动失效
+- 命中时直接返回处理好的图片字节，不做任何解码
+- 头部探测即判定为长图的 URL 只记录元数据（未下载完整内容）
+- 按最近使用时间（LRU）淘汰，总大小不超过 IMAGE_CACHE_MAX_MB
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+import state_store
+
+# 缓存目录（CI 中通过 actions/cache 在两次运行间保留）
+CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(".cache", "images"))
+INDEX_FILE = os.path.join(CACHE_DIR, "index.json")
+BLOBS_DIR = os.path.join(CACHE_DIR, "blobs")
+# 处理后图片总大小上限
+MAX_BYTES = int(float(os.getenv("IMAGE_CACHE_MAX_MB", "200")) * 1024 * 1024)
+# 超过该时间未使用的条目直接淘汰（秒）
+MAX_IDLE = int(os.getenv("IMAGE_CACHE_MAX_IDLE_DAYS", "14")) * 24 * 3600
+# 设为 0 关闭缓存
+ENABLED = os.getenv("IMAGE_CACHE", "1") != "0"
+
+_lock = threading.Lock()
+_index = None
+_dirty = False
+
+def _load():
+    """按需加载索引：{"urls": {url: {...}}, "blobs": {hash: {...}}}"""
+    global _index
+    if _index is None:
+        _index = {"urls": {}, "blobs": {}}
+        if os.path.exists(INDEX_FILE):
+            try:
+                with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                _index["urls"] = data.get("urls", {})
+                _index["blobs"] = data.get("blobs", {})
+            except Exception as e:
+                print(f"    [!] 图片缓存索引损坏，已重建: {type(e).__name__}")
+    return _index
+
+def _blob_path(content_hash, suffix=""):
+    """suffix 为空是主图，否则为额外输出（如 "_w480.jpg"、".webp"）"""
+    return os.path.join(BLOBS_DIR, f"{content_hash}{suffix or '.jpg'}")
+
+def _remove_blob(content_hash, blob):
+    for suffix in blob.get("suffixes", [""]):
+        try:
+            os.remove(_blob_path(content_hash, suffix))
+        except OSError:
+            pass
+
+def content_hash(content):
+    """原图内容哈希"""
+    return hashlib.sha256(content).hexdigest()
+
+def _usable(blob, content_hash, variant):
+    """长图只需元数据；普通图需处理参数一致且处理后的文件都还在"""
+    if blob is None:
+        return False
+    if blob["is_long"]:
+        return True
+    return blob.get("variant", "") == variant and all(
+        os.path.exists(_blob_path(content_hash, suffix)) for suffix in blob.get("suffixes", [""])
+    )
+
+def lookup(url, variant=""):
+    """
+    查找 URL 对应的缓存
+    :param variant: 当前图片处理参数签名
+    :return: (content_hash, url_entry, blob)；未命中返回 None
+    """
+    if not ENABLED:
+        return None
+    with _lock:
+        entry = _load()["urls"].get(url)
+        if entry is None:
+            return None
+        blob = _index["blobs"].get(entry["hash"])
+        if not _usable(blob, entry["hash"], variant):
+            return None
+        return entry["hash"], dict(entry), dict(blob)
+
+def lookup_hash(content_hash, variant=""):
+    """按内容哈希查找（不同 URL 同一张图）"""
+    if not ENABLED:
+        return None
+    with _lock:
+        blob = _load()["blobs"].get(content_hash)
+        return dict(blob) if _usable(blob, content_hash, variant) else None
+
+def conditional_headers(url_entry):
+    """由缓存的校验信息构造条件请求头"""
+    headers = {}
+    if url_entry:
+        if url_entry.get("etag"):
+            headers["If-None-Match"] = url_entry["etag"]
+        if url_entry.get("last_modified"):
+            headers["If-Modified-Since"] = url_entry["last_modified"]
+    return headers
+
+def _touch_url(url, content_hash, response=None):
+    """更新 URL -> 哈希映射；有新响应时刷新校验信息（调用方持锁）"""
+    global _dirty
+    now = time.time()
+    entry = _index["urls"].get(url) or {}
+    entry["hash"] = content_hash
+    entry["last_used"] = now
+    if response is not None:
+        entry["etag"] = response.headers.get("ETag", "")
+        entry["last_modified"] = response.headers.get("Last-Modified", "")
+    _index["urls"][url] = entry
+    blob = _index["blobs"].get(content_hash)
+    if blob is not None:
+        blob["last_used"] = now
+    _dirty = True
+
+def serve(url, content_hash, blob, response=None):
+    """
+    使用缓存结果
+    :param response: 重新验证时拿到的响应（用于刷新 ETag / Last-Modified）
+    :return: 处理好的输出 [(后缀, 字节), ...]；缓存记录为长图时返回 None（需使用公版图片）
+    """
+    with _lock:
+        _load()
+        _touch_url(url, content_hash, response)
+    if blob["is_long"]:
+        print(f"    [✓] 图片缓存命中（长图 {blob['width']}x{blob['height']}），使用公版图片")
+        return None
+    outputs = []
+    for suffix in blob.get("suffixes", [""]):
+        with open(_blob_path(content_hash, suffix), 'rb') as f:
+            outputs.append((suffix, f.read()))
+    print(f"    [✓] 图片缓存命中，跳过下载处理 ({blob['width']}x{blob['height']})")
+    return outputs
+
+def store(url, content_hash, response, width, height, is_long, outputs=None, variant=""):
+    """
+    写入缓存
+    :param outputs: 处理后的输出 [(后缀, 字节), ...]，主图后缀为空（长图为 None）
+    :param variant: 图片处理参数签名
+    """
+    global _dirty
+    if not ENABLED:
+        return
+    size = 0
+    suffixes = []
+    if outputs and not is_long:
+        try:
+            os.makedirs(BLOBS_DIR, exist_ok=True)
+            for suffix, data in outputs:
+                blob_path = _blob_path(content_hash, suffix)
+                tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, blob_path)
+                size += len(data)
+                suffixes.append(suffix)
+        except OSError as e:
+            print(f"    [!] 图片缓存写入失败: {type(e).__name__}")
+            return
+    with _lock:
+        _load()
+        _index["blobs"][content_hash] = {
+            "width": width,
+            "height": height,
+            "is_long": is_long,
+            "size": size,
+            "suffixes": suffixes,
+            "variant": variant,
+            "last_used": time.time(),
+        }
+        _touch_url(url, content_hash, response)
+        _dirty = True
+
+def store_probe(url, response, width, height):
+    """
+    记录头部探测即判定为长图的 URL（没有完整内容，以 URL 哈希代替内容哈希）
+    """
+    if not ENABLED:
+        return
+    store(url, "url-" + content_hash(url.encode('utf-8')), response, width, height, is_long=True)
+
+def _evict():
+    """淘汰过期与超出容量的条目（调用方持锁）"""
+    now = time.time()
+    blobs = _index["blobs"]
+    expired = [h for h, blob in blobs.items() if now - blob.get("last_used", 0) > MAX_IDLE]
+    total = sum(blob.get("size", 0) for blob in blobs.values())
+    by_age = sorted(blobs.items(), key=lambda pair: pair[1].get("last_used", 0))
+    for content_hash, blob in by_age:
+        if total <= MAX_BYTES:
+            break
+        if content_hash not in expired:
+            expired.append(content_hash)
+    for content_hash in expired:
+        blob = blobs.pop(content_hash)
+        total -= blob.get("size", 0)
+        _remove_blob(content_hash, blob)
+    # 清理指向已淘汰内容或长期未使用的 URL
+    _index["urls"] = {
+        url: entry for url, entry in _index["urls"].items()
+        if entry.get("hash") in blobs and now - entry.get("last_used", 0) <= MAX_IDLE
+    }
+    return len(expired)
+
+def flush():
+    """淘汰并写回索引（流水线结束时调用，同时注册 atexit 兜底）"""
+    global _dirty
+    if not ENABLED:
+        return
+    with _lock:
+        if _index is None or not _dirty:
+            return
+        evicted = _evict()
+        state_store.write(INDEX_FILE, _index)
+        _dirty = False
+        total = sum(blob.get("size", 0) for blob in _index["blobs"].values())
+    print(f"    [✓] 图片缓存已保存: {len(_index['blobs'])} 张, {total / 1024 / 1024:.1f} MB"
+          + (f", 淘汰 {evicted} 张" if evicted else ""))
+
+atexit.register(flush)
@@ -8,7 +8,12 @@
 
 import os
 import requests
-import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+import http_client
+import image_cache
 from PIL import Image
 from io import BytesIO
 
@@ -54,17 +59,44 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
-def get_placeholder_path(author):
+# 长图判定：高:宽 > LONG_IMAGE_RATIO
+LONG_IMAGE_RATIO = 3
+
+# 流式下载：先从头部读出尺寸，长图或超过字节预算的图片提前中断传输
+CHUNK_SIZE = 16 * 1024
+# 在前 PROBE_BYTES 字节内尝试解析尺寸（JPEG EXIF 过大时放弃探测，按完整下载处理）
+PROBE_BYTES = 256 * 1024
+# 单张图片字节预算
+MAX_IMAGE_BYTES = int(float(os.getenv("MAX_IMAGE_MB", "5")) * 1024 * 1024)
+
+# 输出尺寸与编码：按客户端显示宽度缩放，渐进式 JPEG，不保留 EXIF/ICC 等元数据
+TARGET_WIDTH = int(os.getenv("IMAGE_TARGET_WIDTH", "1080"))
+JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+# 额外尺寸（如 "480,720"），输出为 <文件名>_w480.jpg
+EXTRA_WIDTHS = [int(w) for w in os.getenv("IMAGE_EXTRA_WIDTHS", "").split(",") if w.strip()]
+# 额外格式（如 "webp,avif"），与 JPEG 同名不同扩展名；Pillow 不支持的格式自动跳过
+EXTRA_FORMATS = [f.strip().lower() for f in os.getenv("IMAGE_EXTRA_FORMATS", "").split(",") if f.strip()]
+EXTRA_FORMAT_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 60},
+}
+# 处理参数签名（参数变化后旧缓存不再复用）
+TRANSFORM_SIGNATURE = f"w{TARGET_WIDTH}-q{JPEG_QUALITY}-{EXTRA_WIDTHS}-{EXTRA_FORMATS}"
+
+def _index_cover_pictures():
+    """索引 CoverPictures 目录：文件名 -> 路径（只在导入时扫描一次）"""
+    try:
+        names = sorted(f for f in os.listdir(COVER_PICTURES_DIR) if f.endswith('.jpg'))
+    except OSError:
+        names = []
+    return {name: os.path.join(COVER_PICTURES_DIR, name) for name in names}
+
+COVER_PICTURES = MappingProxyType(_index_cover_pictures())
+
+def _resolve_placeholder(author_key):
     """
-    根据 author 获取公版图片路径
-    支持多种名称格式和备选方案
+    author -> 公版图片路径（精确匹配 -> 模糊匹配 -> default.jpg；文件缺失时找名字相似或任意一张）
     """
-    if not author:
-        author = "default"
-    
-    # 规范化 author（小写）
-    author_key = author.lower().strip()
-    
     # 直接查找映射
     if author_key in PLACEHOLDER_MAPPING:
         filename = PLACEHOLDER_MAPPING[author_key]
@@ -80,34 +112,60 @@ def get_placeholder_path(author):
         if not filename:
             filename = "default.jpg"
     
-    placeholder_path = os.path.join(COVER_PICTURES_DIR, filename)
+    if filename in COVER_PICTURES:
+        return COVER_PICTURES[filename]
     
-    # 如果指定的文件不存在，尝试备选方案
-    if not os.path.exists(placeholder_path):
-        # 尝试找任何 jpg 文件作为备选
-        try:
-            if os.path.exists(COVER_PICTURES_DIR):
-                files = [f for f in os.listdir(COVER_PICTURES_DIR) 
-                        if f.endswith('.jpg') and f != 'default.jpg']
-                if files:
-                    # 优先选择名字相似的
-                    for f in files:
-                        if author_key in f.lower() or f.lower() in author_key:
-                            placeholder_path = os.path.join(COVER_PICTURES_DIR, f)
-                            break
-                    # 如果没有相似的，就用第一个
-                    if not os.path.exists(placeholder_path) and files:
-                        placeholder_path = os.path.join(COVER_PICTURES_DIR, files[0])
-        except:
-            pass
+    # 如果指定的文件不存在，尝试备选方案：优先选择名字相似的，否则用第一个
+    files = [f for f in COVER_PICTURES if f != 'default.jpg']
+    for f in files:
+        if author_key in f.lower() or f.lower() in author_key:
+            return COVER_PICTURES[f]
+    if files:
+        return COVER_PICTURES[files[0]]
     
     # 最后的兜底方案
-    if not os.path.exists(placeholder_path):
-        default_path = os.path.join(COVER_PICTURES_DIR, "default.jpg")
-        if os.path.exists(default_path):
-            placeholder_path = default_path
+    return COVER_PICTURES.get("default.jpg", os.path.join(COVER_PICTURES_DIR, filename))
+
+# 预先解析所有已知名称（含文件名本身）；其他名称首次解析后缓存
+PLACEHOLDER_TABLE = MappingProxyType({
+    key: _resolve_placeholder(key)
+    for key in list(PLACEHOLDER_MAPPING) + [os.path.splitext(f)[0] for f in COVER_PICTURES]
+})
+
+@lru_cache(maxsize=256)
+def _resolve_placeholder_cached(author_key):
+    return _resolve_placeholder(author_key)
+
+def get_placeholder_path(author):
+    """
+    根据 author 获取公版图片路径
+    支持多种名称格式和备选方案
+    """
+    if not author:
+        author = "default"
     
-    return placeholder_path
+    # 规范化 author（小写）
+    author_key = author.lower().strip()
+    path = PLACEHOLDER_TABLE.get(author_key)
+    if path is None:
+        path = _resolve_placeholder_cached(author_key)
+    return path
+
+def placeholder_arcname(placeholder_path):
+    """公版图片在 ZIP 中的共享路径（同一张公版图片只打包一次）"""
+    return f"images/placeholders/{os.path.basename(placeholder_path)}"
+
+def resolve_placeholder(author):
+    """
+    获取可用的公版图片路径
+    :return: 路径；公版图片不存在时返回 None
+    """
+    placeholder_src = get_placeholder_path(author)
+    if placeholder_src not in COVER_PICTURES.values():
+        print(f"    [!] 公版图片不存在: {placeholder_src}")
+        return None
+    print(f"    [*] 使用公版图片: {os.path.basename(placeholder_src)}")
+    return placeholder_src
 
 def download_image(url, local_path, timeout=10):
     """
@@ -124,7 +182,7 @@ def download_image(url, local_path, timeout=10):
     print(f"    [*] 正在下载图片: {url[:80]}...")
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=timeout, verify=False)
+        response = http_client.get(url, headers=HEADERS, timeout=timeout, verify=False)
         response.raise_for_status()
         
         # 尝试打开为 PIL Image
@@ -148,12 +206,18 @@ def is_long_image(img):
     :param img: PIL Image 对象
     :return: True 为长图，False 为普通图
     """
-    width, height = img.size
+    return is_long_size(*img.size)
+
+def is_long_size(width, height):
+    """
+    按尺寸判断是否为长图（高:宽 > LONG_IMAGE_RATIO）
+    :return: True 为长图，False 为普通图
+    """
     if width == 0:
         return False
     
     ratio = height / width
-    is_long = ratio > 3
+    is_long = ratio > LONG_IMAGE_RATIO
     print(f"    [*] 图片尺寸检查: {width}x{height}, 宽高比: {ratio:.2f}, 是否长图: {is_long}")
     return is_long
 
@@ -171,60 +235,309 @@ def convert_rgba_to_rgb(img):
         return background
     return img
 
-def download_and_process(remote_url, local_path):
+def _supported_formats():
+    """Pillow 可写的额外格式"""
+    available = set(Image.registered_extensions().values())
+    return [fmt for fmt in EXTRA_FORMATS if fmt.upper() in available]
+
+def to_rgb(img):
+    """转换为 JPEG 可保存的 RGB/L 模式（透明背景填白）"""
+    if img.mode in ('P', 'LA', 'PA'):
+        img = img.convert('RGBA')
+    img = convert_rgba_to_rgb(img)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    return img
+
+def resize_to_width(img, width):
+    """等比缩小到指定宽度（不放大）"""
+    if img.width <= width:
+        return img
+    height = max(1, round(img.height * width / img.width))
+    resized = img.copy()
+    # reducing_gap：先用 reduce() 整数倍缩小，再做高质量重采样
+    resized.thumbnail((width, height), Image.LANCZOS, reducing_gap=3.0)
+    return resized
+
+def variant_path(local_path, suffix):
+    """主文件路径 + 后缀 -> 额外输出路径（后缀为空即主文件）"""
+    if not suffix:
+        return local_path
+    return os.path.splitext(local_path)[0] + suffix
+
+def _encode(img, fmt, **options):
+    buffer = BytesIO()
+    img.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+def transform_image(img):
+    """
+    缩放并编码输出图片（在内存中完成，不落盘）
+    - JPEG 先用 draft() 在解码阶段按 2 的幂缩小，避免全尺寸解码
+    - 主图缩放到 TARGET_WIDTH，编码为渐进式 JPEG（不带元数据）
+    - 按配置额外输出其他宽度与 WebP/AVIF
+    :return: [(后缀, 字节), ...]，主图后缀为空
+    """
+    if img.format == 'JPEG' and img.width > TARGET_WIDTH:
+        img.draft('RGB', (TARGET_WIDTH, round(img.height * TARGET_WIDTH / img.width)))
+    img = to_rgb(img)
+
+    main = resize_to_width(img, TARGET_WIDTH)
+    print(f"    [*] 编码图片: {main.width}x{main.height}")
+    jpeg_options = {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}
+    outputs = [("", _encode(main, 'JPEG', **jpeg_options))]
+
+    sized = [(f"_w{w}", resize_to_width(main, w)) for w in EXTRA_WIDTHS]
+    for tag, resized in sized:
+        outputs.append((f"{tag}.jpg", _encode(resized, 'JPEG', **jpeg_options)))
+
+    for fmt in _supported_formats():
+        for tag, resized in [("", main)] + sized:
+            outputs.append((f"{tag}.{fmt}", _encode(resized, fmt.upper(), **EXTRA_FORMAT_OPTIONS.get(fmt, {}))))
+    return outputs
+
+class TransformStats:
+    """板块内图片体积统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.cached = 0
+        self.original_bytes = 0
+        self.output_bytes = 0
+
+    def add(self, original_bytes, output_bytes):
+        with self._lock:
+            self.processed += 1
+            self.original_bytes += original_bytes
+            self.output_bytes += output_bytes
+
+    def add_cached(self):
+        with self._lock:
+            self.cached += 1
+
+    def merge(self, other):
+        """并入另一份统计（如提前下载任务的统计）"""
+        with other._lock:
+            counts = (other.processed, other.cached, other.original_bytes, other.output_bytes)
+        with self._lock:
+            self.processed += counts[0]
+            self.cached += counts[1]
+            self.original_bytes += counts[2]
+            self.output_bytes += counts[3]
+
+    def report(self, label):
+        """打印节省的字节数"""
+        if not self.processed and not self.cached:
+            return
+        saved = self.original_bytes - self.output_bytes
+        ratio = saved / self.original_bytes * 100 if self.original_bytes else 0
+        print(f"  [✓] [{label}] 图片处理 {self.processed} 张: 原图 {self.original_bytes / 1024:.0f} KB -> "
+              f"{self.output_bytes / 1024:.0f} KB，节省 {saved / 1024:.0f} KB ({ratio:.0f}%)"
+              + (f"，缓存命中 {self.cached} 张" if self.cached else ""))
+
+def fetch_image(url, extra_headers=None, timeout=10, stream=False):
+    """
+    请求图片（可带条件请求头）
+    :param stream: True 时只读取响应头，响应体由调用方按需读取
+    :return: requests.Response（200 或 304）；失败返回 None
     """
-    下载并处理图片：
-    1. 下载图片
-    2. 检查是否为长图（高:宽 > 3）
-    3. 如果是长图，返回 False（使用公版图片）
-    4. 如果是普通图片，直接保存并返回 True
+    headers = dict(HEADERS)
+    headers.update(extra_headers or {})
+    response = None
+    try:
+        response = http_client.get(url, headers=headers, timeout=timeout, verify=False, stream=stream)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+    except requests.exceptions.HTTPError as e:
+        # 流式响应占用着 host 并发名额，出错时必须关闭
+        response.close()
+        print(f"    [!] 图片下载失败: {type(e).__name__} - {str(e)[:60]}")
+        return None
+    except requests.exceptions.Timeout:
+        print(f"    [!] 图片下载超时 (>{timeout}秒)")
+    except requests.exceptions.ConnectionError as e:
+        print(f"    [!] 连接错误: {type(e).__name__}")
+    except Exception as e:
+        print(f"    [!] 图片下载失败: {type(e).__name__} - {str(e)[:60]}")
+    return None
+
+def _webp_size(data):
+    """解析 WebP 头部（Pillow 打开 WebP 需要完整数据，这里直接读 VP8/VP8L/VP8X 块）"""
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width = int.from_bytes(data[26:28], "little") & 0x3FFF
+        height = int.from_bytes(data[28:30], "little") & 0x3FFF
+        return width, height
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+def probe_size(data):
+    """
+    只解析图片头部获取尺寸（JPEG/PNG/GIF 等由 Pillow 解析，WebP 直接读头部）
+    :param data: 已下载的前若干字节
+    :return: (width, height)；数据不足以解析时返回 None
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _webp_size(data)
+    try:
+        with Image.open(BytesIO(data)) as img:
+            return img.size
+    except Exception:
+        return None
+
+def read_image_body(response, max_bytes=MAX_IMAGE_BYTES):
+    """
+    流式读取图片：拿到尺寸后若为长图立即中断，超过字节预算也立即中断
+    :return: (content, size, reason)
+             content 为完整字节（被中断时为 None）；size 为头部解析出的尺寸（可能为 None）；
+             reason 为中断原因 "long" / "too_large"，正常读完为 ""
+    """
+    content_length = response.headers.get("Content-Length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        response.close()
+        print(f"    [!] 图片过大 ({int(content_length) / 1024 / 1024:.1f} MB)，不下载")
+        return None, None, "too_large"
+
+    chunks = []
+    received = 0
+    size = None
+    probing = True
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            chunks.append(chunk)
+            received += len(chunk)
+            if received > max_bytes:
+                print(f"    [!] 图片超过 {max_bytes / 1024 / 1024:.0f} MB 预算，已中断下载")
+                return None, size, "too_large"
+            if probing:
+                size = probe_size(b"".join(chunks))
+                if size is not None:
+                    probing = False
+                    if is_long_size(*size):
+                        print(f"    [!] 头部探测为长图，已中断下载 (读取 {received / 1024:.0f} KB)")
+                        return None, size, "long"
+                elif received >= PROBE_BYTES:
+                    probing = False
+    finally:
+        response.close()
+    return b"".join(chunks), size, ""
+
+def _serve_cached(remote_url, content_hash, blob, response, stats):
+    """复用缓存的处理结果并计入统计"""
+    outputs = image_cache.serve(remote_url, content_hash, blob, response)
+    if outputs and stats is not None:
+        stats.add_cached()
+    return outputs
+
+def download_and_transform(remote_url, stats=None):
+    """
+    下载并处理图片（结果留在内存中，供打包直接写入 ZIP）：
+    1. 已缓存的 URL 发条件请求，304 或内容未变时直接复用缓存（不解码）
+    2. 流式下载图片，从头部读出尺寸，长图（高:宽 > 3）或超过字节预算时立即中断
+    3. 如果是长图或过大，返回 None（使用公版图片）
+    4. 如果是普通图片，缩放编码（见 transform_image）
     :param remote_url: 远程图片 URL
-    :param local_path: 本地保存路径
-    :return: True 成功，False 失败（需要使用公版图片）
+    :param stats: TransformStats，累计体积统计
+    :return: [(后缀, 字节), ...]，主图后缀为空；失败返回 None（需要使用公版图片）
     """
-    success, img = download_image(remote_url, local_path)
-    
-    if not success or img is None:
-        return False
-    
+    cached = image_cache.lookup(remote_url, TRANSFORM_SIGNATURE)
+    url_entry = cached[1] if cached else None
+
+    print(f"    [*] 正在下载图片: {remote_url[:80]}...")
+    response = fetch_image(remote_url, image_cache.conditional_headers(url_entry), stream=True)
+    if response is None:
+        return None
+
     try:
-        # 检查是否为长图
-        if is_long_image(img):
+        if response.status_code == 304:
+            response.close()
+            if cached:
+                return _serve_cached(remote_url, cached[0], cached[2], response, stats)
+            # 没有缓存却收到 304（缓存已被清理），重新完整下载
+            response = fetch_image(remote_url, stream=True)
+            if response is None:
+                return None
+            if response.status_code == 304:
+                response.close()
+                return None
+
+        # 流式读取：长图/超大图在头部探测后即中断，不下载完整内容
+        content, size, reason = read_image_body(response)
+        if content is None:
+            if reason == "long":
+                image_cache.store_probe(remote_url, response, *size)
+            return None
+
+        # 内容哈希命中（URL 变了或服务器不支持条件请求）：同样跳过解码
+        digest = image_cache.content_hash(content)
+        blob = image_cache.lookup_hash(digest, TRANSFORM_SIGNATURE)
+        if blob is not None:
+            return _serve_cached(remote_url, digest, blob, response, stats)
+
+        img = Image.open(BytesIO(content))
+        print(f"    [✓] 图片下载成功，格式: {img.format}, 尺寸: {img.size}")
+        width, height = img.size
+
+        # 检查是否为长图（头部探测已判定过的无需重复）
+        if size is None and is_long_image(img):
             print(f"    [!] 检测到长图，使用公版图片替代")
-            return False
+            image_cache.store(remote_url, digest, response, width, height, is_long=True)
+            return None
         
-        # 转换 RGBA 为 RGB（避免 JPEG 保存问题）
-        img = convert_rgba_to_rgb(img)
-        
-        # 普通图片直接保存（不裁剪）
-        print(f"    [*] 保存图片到: {local_path}")
-        img.save(local_path, quality=85)
-        print(f"    [✓] 图片保存成功")
-        return True
+        # 缩放、转码
+        outputs = transform_image(img)
+        print(f"    [✓] 图片处理成功")
+        if stats is not None:
+            stats.add(len(content), len(outputs[0][1]))
+        image_cache.store(remote_url, digest, response, width, height, is_long=False,
+                          outputs=outputs, variant=TRANSFORM_SIGNATURE)
+        return outputs
         
     except Exception as e:
         print(f"    [!] 图片处理失败: {type(e).__name__} - {str(e)[:60]}")
-        return False
+        return None
+
+# 提前下载：AI 流式输出每完成一条就开始下载其图片，打包时直接取结果
+PREFETCH_WORKERS = int(os.getenv("IMAGE_PREFETCH_WORKERS", "4"))
+_prefetch_lock = threading.Lock()
+_prefetch_executor = None
+_prefetched = {}
 
-def copy_placeholder(author, local_path):
+def prefetch(remote_url):
     """
-    复制公版图片到本地
-    :param author: 作者/平台信息
-    :param local_path: 本地保存路径
-    :return: True 成功，False 失败
+    后台下载并处理图片（同一 URL 只提交一次），结果由 take_prefetched 取走
+    每个任务带独立的 TransformStats，取走后由调用方并入板块统计
     """
-    try:
-        placeholder_src = get_placeholder_path(author)
-        
-        if not os.path.exists(placeholder_src):
-            print(f"    [!] 公版图片不存在: {placeholder_src}")
-            return False
-        
-        print(f"    [*] 使用公版图片: {os.path.basename(placeholder_src)}")
-        shutil.copy2(placeholder_src, local_path)
-        print(f"    [✓] 公版图片已复制")
-        return True
-        
-    except Exception as e:
-        print(f"    [!] 公版图片复制失败: {type(e).__name__}")
-        return False
+    global _prefetch_executor
+    if not remote_url or not remote_url.startswith("http"):
+        return
+    with _prefetch_lock:
+        if remote_url in _prefetched:
+            return
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS,
+                                                    thread_name_prefix="image-prefetch")
+        stats = TransformStats()
+        _prefetched[remote_url] = (_prefetch_executor.submit(download_and_transform, remote_url, stats), stats)
+
+def take_prefetched(remote_url):
+    """取走提前下载的任务：(Future, TransformStats)，没有则返回 None"""
+    with _prefetch_lock:
+        return _prefetched.pop(remote_url, None)
+
+def shutdown_prefetch():
+    """丢弃未取走的结果，取消尚未开始的下载"""
+    global _prefetch_executor
+    with _prefetch_lock:
+        _prefetched.clear()
+        executor, _prefetch_executor = _prefetch_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
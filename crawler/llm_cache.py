@@ -0,0 +1,87 @@
+"""
+DeepSeek 响应缓存
+- 键：命名空间 + 提示词模板版本 + 完整请求体（模型、参数、候选新闻与历史记录都在提示词里）的哈希
+- 值：模型返回的原始文本，命中时照常走调用方的解析/校验逻辑
+- 每个键一个文件，超过 LLM_CACHE_TTL_HOURS 视为过期；写入新条目时顺带清理过期文件
+- 相同输入（手动重跑、打包失败后重跑）直接返回，不再等待推理
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import state_store
+
+# 缓存目录（CI 中通过 actions/cache 在两次运行间保留）
+CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+# 过期时间（秒）
+TTL = float(os.getenv("LLM_CACHE_TTL_HOURS", "48")) * 3600
+# 设为 0 关闭缓存
+ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+_prune_lock = threading.Lock()
+_pruned = False
+
+def make_key(namespace, request_body, template_version=""):
+    """
+    :param namespace: 调用方（如 "home_polish"）
+    :param request_body: 发给 API 的完整请求体
+    :param template_version: 提示词模板版本
+    """
+    payload = json.dumps([namespace, template_version, request_body], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def template_version(*templates):
+    """由提示词模板文本计算版本号（模板改动后旧缓存自动失效）"""
+    return hashlib.sha256("\n".join(templates).encode('utf-8')).hexdigest()[:12]
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+def get(key):
+    """
+    :return: 缓存的响应文本；未命中或已过期返回 None
+    """
+    if not ENABLED:
+        return None
+    entry = state_store.read(_path(key))
+    if not isinstance(entry, dict) or time.time() - entry.get("created", 0) > TTL:
+        return None
+    age_min = (time.time() - entry["created"]) / 60
+    print(f"  [✓] AI 响应缓存命中 ({entry.get('namespace', '')}, {age_min:.0f} 分钟前)，跳过推理")
+    return entry.get("content")
+
+def put(key, content, namespace=""):
+    """保存通过校验的响应文本"""
+    if not ENABLED:
+        return
+    try:
+        state_store.write(_path(key), {"namespace": namespace, "created": time.time(), "content": content})
+    except OSError as e:
+        print(f"  [!] AI 响应缓存写入失败: {type(e).__name__}")
+        return
+    _prune()
+
+def _prune():
+    """删除过期文件（每个进程只清理一次；并发改写时其他线程可能已删掉同一文件）"""
+    global _pruned
+    with _prune_lock:
+        if _pruned:
+            return
+        _pruned = True
+    now = time.time()
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for f in names:
+        if not f.endswith(".json"):
+            continue
+        path = os.path.join(CACHE_DIR, f)
+        try:
+            if now - os.path.getmtime(path) > TTL:
+                os.remove(path)
+        except OSError:
+            continue
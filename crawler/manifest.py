@@ -0,0 +1,96 @@
+"""
+内容寻址的发布清单与增量包
+- 每条新闻按内容（不含排名）计算哈希，图片按处理后的主图字节计算哈希，ZIP 内图片以哈希命名
+- 每个板块发布一份清单 {Section}_{timestamp}_manifest.json：有序的新闻哈希 + 图片哈希
+- 与上一版清单对比，生成只包含新增新闻与新增图片的增量包 {Section}_{timestamp}_delta.zip
+  客户端本地版本等于增量包的 base 时只需下载增量包，否则下载完整包
+"""
+
+import hashlib
+import json
+import os
+
+import image_utils
+import state_store
+
+# 截取的哈希长度（十六进制字符）
+HASH_LENGTH = 16
+MANIFEST_SUFFIX = "_manifest.json"
+DELTA_SUFFIX = "_delta.zip"
+# 增量包内的新闻文件：{"base", "timestamp", "order": [{"rank", "hash"}], "news": [新增新闻]}
+DELTA_JSON_NAME = "delta.json"
+
+def content_hash(data):
+    """字节内容哈希"""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def item_hash(cleaned_item):
+    """新闻哈希：排名变化不算内容变化"""
+    fields = {k: v for k, v in cleaned_item.items() if k not in ("rank", "hash")}
+    return content_hash(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+def image_arcname(digest):
+    """图片在 ZIP 中的内容寻址路径"""
+    return f"images/{digest}.jpg"
+
+def manifest_name(section_prefix, timestamp_str):
+    return f"{section_prefix}_{timestamp_str}{MANIFEST_SUFFIX}"
+
+def delta_name(section_prefix, timestamp_str):
+    return f"{section_prefix}_{timestamp_str}{DELTA_SUFFIX}"
+
+def find_previous(section_prefix, exclude_version, search_dirs):
+    """
+    查找上一版清单（CI 中 output/ 每次都是空的，上一版在已发布的 docs/ 中）
+    :return: 清单 dict；没有可用的上一版时返回 None
+    """
+    candidates = []
+    for directory in search_dirs:
+        if not os.path.isdir(directory):
+            continue
+        for f in os.listdir(directory):
+            if f.startswith(f"{section_prefix}_") and f.endswith(MANIFEST_SUFFIX):
+                candidates.append((f, os.path.join(directory, f)))
+    for _, path in sorted(candidates, reverse=True):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"    [!] 清单读取失败 {os.path.basename(path)}: {type(e).__name__}")
+            continue
+        if manifest.get("version") != exclude_version:
+            return manifest
+    return None
+
+def known_images(previous):
+    """上一版清单中的图片哈希；图片处理参数变化后全部视为新图片"""
+    if not previous or previous.get("transform") != image_utils.TRANSFORM_SIGNATURE:
+        return set()
+    return set(previous.get("images", {}).values())
+
+def build_manifest(section_prefix, zip_name, timestamp_str, cleaned_news, images):
+    """
+    :param cleaned_news: 已带 hash 字段的新闻列表
+    :param images: {arcname: 图片哈希}
+    """
+    return {
+        "section": section_prefix,
+        "version": zip_name,
+        "timestamp": timestamp_str,
+        "transform": image_utils.TRANSFORM_SIGNATURE,
+        "items": [{"rank": item["rank"], "hash": item["hash"]} for item in cleaned_news],
+        "images": images,
+    }
+
+def build_delta(previous, timestamp_str, cleaned_news):
+    """增量包的新闻部分：完整顺序 + 上一版没有的新闻"""
+    known_items = {entry["hash"] for entry in previous.get("items", [])}
+    return {
+        "base": previous["version"],
+        "timestamp": timestamp_str,
+        "order": [{"rank": item["rank"], "hash": item["hash"]} for item in cleaned_news],
+        "news": [item for item in cleaned_news if item["hash"] not in known_items],
+    }
+
+def write_manifest(path, manifest):
+    state_store.write(path, manifest, indent=4)
@@ -0,0 +1,70 @@
+"""
+Selenium 页面就绪等待工具
+- 用事件驱动的就绪条件替代固定 time.sleep
+- 条件满足立即返回，超时时间封顶最坏情况
+- 条件均为 callable(driver) -> bool，可用 any_of 组合
+"""
+
+import time
+
+try:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 8
+POLL_FREQUENCY = 0.2
+
+def wait_ready(driver, condition, timeout=DEFAULT_TIMEOUT, poll=POLL_FREQUENCY):
+    """
+    等待页面满足就绪条件
+    :param driver: Selenium WebDriver
+    :param condition: 就绪条件 callable(driver) -> bool
+    :param timeout: 最长等待时间（秒）
+    :param poll: 轮询间隔（秒）
+    :return: True 就绪，False 超时
+    """
+    start = time.time()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll).until(condition)
+        return True
+    except TimeoutException:
+        print(f"        [!] 页面就绪等待超时 ({time.time() - start:.1f}s)")
+        return False
+
+def selector_present(css):
+    """DOM 中出现匹配 CSS 选择器的元素"""
+    def _check(driver):
+        return len(driver.find_elements(By.CSS_SELECTOR, css)) > 0
+    return _check
+
+def source_contains(*markers):
+    """页面 HTML 中出现任一标记（在浏览器端查找，不回传整页源码）"""
+    def _check(driver):
+        return driver.execute_script(
+            "var html = document.documentElement.outerHTML;"
+            "return arguments[0].some(function (m) { return html.indexOf(m) !== -1; });",
+            list(markers),
+        )
+    return _check
+
+def title_contains(text):
+    """页面标题包含指定文本"""
+    def _check(driver):
+        return text in (driver.title or "")
+    return _check
+
+def scroll_height_grows(last_height):
+    """滚动后页面高度增长（新内容已加载）"""
+    def _check(driver):
+        return driver.execute_script("return document.body.scrollHeight") > last_height
+    return _check
+
+def any_of(*conditions):
+    """任一条件满足即就绪"""
+    def _check(driver):
+        return any(condition(driver) for condition in conditions)
+    return _check
@@ -3,6 +3,10 @@ import json
 import sys
 import shutil
 import zipfile
+import traceback
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
 
 # Add crawler subdirectories to path
@@ -13,145 +17,256 @@ from homenews import home_polish
 from worldnews import world_polish
 from entertainment import ent_polish
 import image_utils
+import image_cache
+import article_cache
+import manifest
+import state_store
+import http_client
+import browser_pool
 
 # --- Configuration ---
 OUTPUT_DIR = "output"
 LATEST_VERSION_FILE = os.path.join(OUTPUT_DIR, "latest_versions.json")
+# 已发布目录（CI 中 output/ 每次为空，上一版清单从这里读取，用于生成增量包）
+PUBLISHED_DIR = os.getenv("PUBLISHED_DIR", "docs")
+# 板块并发数（Home/World/Entertainment 三个板块并行执行，设为 1 即退化为串行）
+SECTION_WORKERS = int(os.getenv("SECTION_WORKERS", "3"))
+
+# 每个板块的图片并发下载/处理数，以及图片阶段的总时限（秒）
+# 超过时限仍未完成的图片改用公版图片
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "6"))
+IMAGE_DEADLINE = float(os.getenv("IMAGE_DEADLINE", "45"))
 
 def ensure_dirs():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def update_latest_version(section, zip_filename):
-    """Updates the latest_versions.json file."""
-    versions = {}
-    if os.path.exists(LATEST_VERSION_FILE):
-        try:
-            with open(LATEST_VERSION_FILE, 'r') as f:
-                versions = json.load(f)
-        except:
-            pass
-    
-    versions[section] = zip_filename
-    
-    with open(LATEST_VERSION_FILE, 'w') as f:
-        json.dump(versions, f, indent=4)
-    print(f"  [✓] 更新最新版本记录: {section} -> {zip_filename}")
+def update_latest_version(section, zip_filename, delta=None):
+    """
+    Updates the latest_versions.json file.
+    板块键仍指向完整包（兼容旧客户端）；delta 记录增量包 {"base": 上一版完整包, "file": 增量包}
+    多个板块可能同时完成打包，由 state_store 加锁读改写并原子替换
+    """
+    def _apply(versions):
+        versions[section] = zip_filename
+        deltas = versions.setdefault("delta", {})
+        if delta:
+            deltas[section] = delta
+        else:
+            deltas.pop(section, None)
+
+    state_store.update(LATEST_VERSION_FILE, _apply, default=dict, indent=4)
+    print(f"  [✓] 更新最新版本记录: {section} -> {zip_filename}"
+          + (f" (增量包: {delta['file']})" if delta else ""))
+
+def process_section_images(section_prefix, image_jobs, on_ready,
+                           deadline=IMAGE_DEADLINE, max_workers=IMAGE_WORKERS):
+    """
+    并发下载并处理板块图片（Pillow 解码/编码会释放 GIL，线程池即可并行）
+    :param image_jobs: [(item, remote_url, author, key), ...]
+    :param on_ready: on_ready(key, outputs)，在调用线程中按完成顺序回调（写入 ZIP）
+    :param deadline: 整体时限（秒），超时未完成的图片视为失败
+    :return: 按时处理成功的 key 集合
+    """
+    downloaded = set()
+    tasks = [(remote_url, key) for _, remote_url, _, key in image_jobs
+             if remote_url and remote_url.startswith("http")]
+    if not tasks:
+        return downloaded
+
+    stats = image_utils.TransformStats()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    prefetched_stats = {}
+    for remote_url, key in tasks:
+        # AI 流式输出时已提前开始下载的图片直接取结果，完成后并入本板块统计
+        prefetched = image_utils.take_prefetched(remote_url)
+        if prefetched:
+            future, prefetched_stats[future] = prefetched
+        else:
+            future = executor.submit(image_utils.download_and_transform, remote_url, stats)
+        futures[future] = key
+
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            key = futures[future]
+            if future in prefetched_stats:
+                stats.merge(prefetched_stats[future])
+            try:
+                outputs = future.result()
+                if outputs:
+                    on_ready(key, outputs)
+                    downloaded.add(key)
+            except Exception as e:
+                print(f"    [!] 图片处理异常: {type(e).__name__}")
+    except FuturesTimeoutError:
+        pending = sum(1 for future in futures if not future.done())
+        print(f"  [!] [{section_prefix}] 图片处理超过 {deadline:.0f}s 时限，{pending} 张改用公版图片")
+    finally:
+        # 不等待超时的下载线程（结果只在内存中，迟到的直接丢弃），未开始的任务直接取消
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    stats.report(section_prefix)
+    return downloaded
 
 def package_section(section_prefix, polished_data, timestamp_str):
     """
     通用打包函数：
-    1. 下载/处理图片 (长图用公版替代)
-    2. 失败则使用公版图片
-    3. 生成 ZIP 包
+    1. 下载/处理图片 (长图用公版替代)，处理完一张就直接写入 ZIP（不经过临时目录）
+    2. 失败则使用公版图片（每张公版图片在 ZIP 中只存一份，多条新闻共享）
+    3. 写入 JSON，完成 ZIP 包（图片已压缩，用 ZIP_STORED；只有 JSON 使用 DEFLATE）
+    4. 图片按内容哈希命名，每条新闻带内容哈希；发布清单，并相对上一版清单生成增量包
+       （只含上一版没有的新闻与图片）
     """
     print(f"\n[{section_prefix}] 正在打包数据...")
     
-    # 临时目录
-    temp_dir = os.path.join(OUTPUT_DIR, f"temp_{section_prefix}_{timestamp_str}")
-    temp_images_dir = os.path.join(temp_dir, "images")
-    os.makedirs(temp_images_dir, exist_ok=True)
+    polished_items = polished_data.get("news", [])
     
-    try:
-        polished_items = polished_data.get("news", [])
-        
-        # 先保存调试版（保存原始的 polished_data，图片URL未修改）
-        debug_json_path = os.path.join(OUTPUT_DIR, f"test_{section_prefix}_{timestamp_str}.json")
-        with open(debug_json_path, 'w', encoding='utf-8') as f:
-            json.dump(polished_data, f, ensure_ascii=False, indent=4)
-        print(f"  [✓] 调试文件已保存: test_{section_prefix}_{timestamp_str}.json")
-        
-        # 1. 处理图片
-        print(f"  正在处理 {len(polished_items)-1} 条新闻图片...")
-        
-        for item in polished_items:
-            rank = item.get("rank", 0)
-            if rank == 0: 
-                continue
+    # 先保存调试版（保存原始的 polished_data，图片URL未修改）
+    debug_json_path = os.path.join(OUTPUT_DIR, f"test_{section_prefix}_{timestamp_str}.json")
+    with open(debug_json_path, 'w', encoding='utf-8') as f:
+        json.dump(polished_data, f, ensure_ascii=False, indent=4)
+    print(f"  [✓] 调试文件已保存: test_{section_prefix}_{timestamp_str}.json")
+    
+    zip_name = f"{section_prefix}_{timestamp_str}.zip"
+    zip_path = os.path.join(OUTPUT_DIR, zip_name)
+    # 先写 .part，完成后再改名，避免发布半成品
+    partial_zip_path = f"{zip_path}.part"
 
-            remote_url = item.get("image", "")
-            title = item.get('title', 'NoTitle')
-            author = item.get('author', '')
-            
-            # 生成安全文件名
-            raw_prefix = title[:6]
-            safe_prefix = "".join([c if c.isalnum() or c in ('-', '_') else '_' for c in raw_prefix])
-            if not safe_prefix: 
-                safe_prefix = "Img"
-            
-            # 强制统一使用 jpg 格式
-            ext = ".jpg"
-            
-            filename = f"rank{rank}_{safe_prefix}_{timestamp_str}{ext}"
-            local_path = os.path.join(temp_images_dir, filename)
-            rel_path = f"images/{filename}"
+    # 上一版清单：存在时同时生成增量包
+    previous = manifest.find_previous(section_prefix, zip_name, [OUTPUT_DIR, PUBLISHED_DIR])
+    previous_images = manifest.known_images(previous)
+    delta_name = manifest.delta_name(section_prefix, timestamp_str)
+    delta_path = os.path.join(OUTPUT_DIR, delta_name)
+    partial_delta_path = f"{delta_path}.part"
+    
+    try:
+        print(f"  正在生成压缩包: {zip_name}")
+        if previous:
+            print(f"  同时生成增量包: {delta_name} (基于 {previous['version']})")
+        delta_zip = zipfile.ZipFile(partial_delta_path, 'w') if previous else nullcontext()
+        with zipfile.ZipFile(partial_zip_path, 'w') as zf, delta_zip as dzf:
+            # 1. 处理图片
+            print(f"  正在处理 {len(polished_items)-1} 条新闻图片...")
             
-            success = False
+            image_jobs = []
+            for item in polished_items:
+                rank = item.get("rank", 0)
+                if rank == 0: 
+                    continue
+
+                remote_url = item.get("image", "")
+                author = item.get('author', '')
+                image_jobs.append((item, remote_url, author, f"rank{rank}"))
+
+            # arcname -> 图片哈希（写入清单）；任务 key -> arcname
+            images = {}
+            image_arcnames = {}
+
+            def add_entry(arcname, digest, outputs):
+                # 同一张图只写一次；上一版没有的图片同时写入增量包
+                if arcname in images:
+                    return
+                images[arcname] = digest
+                targets = [zf] if dzf is None or digest in previous_images else [zf, dzf]
+                for suffix, data in outputs:
+                    for target in targets:
+                        target.writestr(image_utils.variant_path(arcname, suffix), data,
+                                        compress_type=zipfile.ZIP_STORED)
+
+            def add_image(key, outputs):
+                # 主图与额外尺寸/格式直接从内存写入 ZIP，以主图内容哈希命名
+                digest = manifest.content_hash(dict(outputs)[""])
+                arcname = manifest.image_arcname(digest)
+                image_arcnames[key] = arcname
+                add_entry(arcname, digest, outputs)
+
+            # 并发下载并处理（包含长图检测），整体限时
+            downloaded = process_section_images(section_prefix, image_jobs, add_image)
+
+            # 公版图片在 ZIP 中共享同一份
+            for item, remote_url, author, key in image_jobs:
+                rank = item.get("rank", 0)
+
+                # 更新 item.image 字段
+                if key in downloaded:
+                    item["image"] = image_arcnames[key]
+                    continue
+                
+                # 失败、超时或无效 URL，使用公版图片
+                print(f"    [!] 图片获取失败 (Rank {rank})，使用公版图片: {author}")
+                placeholder_src = image_utils.resolve_placeholder(author)
+                if placeholder_src:
+                    arcname = image_utils.placeholder_arcname(placeholder_src)
+                    if arcname not in images:
+                        with open(placeholder_src, 'rb') as f:
+                            data = f.read()
+                        add_entry(arcname, manifest.content_hash(data), [("", data)])
+                    item["image"] = arcname
+                else:
+                    # 彻底失败，保留空值或使用默认值
+                    item["image"] = ""
             
-            # 尝试下载并处理（包含长图检测）
-            if remote_url and remote_url.startswith("http"):
-                success = image_utils.download_and_process(remote_url, local_path)
+            # 2. 统一化 JSON 格式：只保留必要字段
+            # 对于 ZIP 包内的 JSON，只保留：rank, title, source_platform, source_url, content, image
+            # 以及内容哈希 hash（客户端据此在增量更新时复用本地已有的新闻）
+            cleaned_news = []
+            for item in polished_items:
+                cleaned_item = {
+                    "rank": item.get("rank", 0),
+                    "title": item.get("title", ""),
+                    "original_title": item.get("title0", ""),
+                    "source_platform": item.get("source_platform", ""),
+                    "source_url": item.get("source_url", ""),
+                    "content": item.get("content", ""),
+                    "image": item.get("image", "")
+                }
+                cleaned_item["hash"] = manifest.item_hash(cleaned_item)
+                cleaned_news.append(cleaned_item)
+                
+            # 3. 写入 zip 内的 json（图片路径已修改为本地相对路径）
+            json_filename_in_zip = f"polished_all_{timestamp_str}.json"
             
-            # 失败或无效 URL，使用公版图片
-            if not success:
-                print(f"    [!] 图片获取失败 (Rank {rank})，使用公版图片: {author}")
-                success = image_utils.copy_placeholder(author, local_path)
-
-            # 更新 item.image 字段
-            if success:
-                item["image"] = rel_path
-            else:
-                # 彻底失败，保留空值或使用默认值
-                item["image"] = ""
-        
-        # 2. 统一化 JSON 格式：只保留必要字段
-        # 对于 ZIP 包内的 JSON，只保留：rank, title, source_platform, source_url, content, image
-        cleaned_news = []
-        for item in polished_items:
-            cleaned_item = {
-                "rank": item.get("rank", 0),
-                "title": item.get("title", ""),
-                "original_title": item.get("title0", ""),
-                "source_platform": item.get("source_platform", ""),
-                "source_url": item.get("source_url", ""),
-                "content": item.get("content", ""),
-                "image": item.get("image", "")
+            # 重新组织 JSON 顺序：news 数组 + timestamp
+            polished_data_ordered = {
+                "news": cleaned_news,
+                "timestamp": timestamp_str
             }
-            cleaned_news.append(cleaned_item)
             
-        # 3. 保存用于 zip 的 json（图片路径已修改为本地相对路径）
-        json_filename_in_zip = f"polished_all_{timestamp_str}.json"
-        json_path_temp = os.path.join(temp_dir, json_filename_in_zip)
-        
-        # 重新组织 JSON 顺序：news 数组 + timestamp
-        polished_data_ordered = {
-            "news": cleaned_news,
-            "timestamp": timestamp_str
-        }
-        
-        with open(json_path_temp, 'w', encoding='utf-8') as f:
-            json.dump(polished_data_ordered, f, ensure_ascii=False, indent=4)
-            
-        # 4. 创建 ZIP
-        zip_name = f"{section_prefix}_{timestamp_str}.zip"
-        zip_path = os.path.join(OUTPUT_DIR, zip_name)
+            zf.writestr(json_filename_in_zip,
+                        json.dumps(polished_data_ordered, ensure_ascii=False, indent=4),
+                        compress_type=zipfile.ZIP_DEFLATED)
+
+            # 增量包：完整顺序 + 新增新闻
+            delta = None
+            if dzf is not None:
+                delta_data = manifest.build_delta(previous, timestamp_str, cleaned_news)
+                dzf.writestr(manifest.DELTA_JSON_NAME,
+                             json.dumps(delta_data, ensure_ascii=False, indent=4),
+                             compress_type=zipfile.ZIP_DEFLATED)
+                delta = {"base": previous["version"], "file": delta_name}
+                new_images = sum(1 for digest in images.values() if digest not in previous_images)
+                print(f"  [✓] 增量包: 新增 {len(delta_data['news'])}/{len(cleaned_news)} 条新闻, "
+                      f"{new_images}/{len(images)} 张图片")
         
-        print(f"  正在生成压缩包: {zip_name}")
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.write(json_path_temp, arcname=json_filename_in_zip)
-            for root, _, files in os.walk(temp_images_dir):
-                for file in files:
-                    abs_path = os.path.join(root, file)
-                    rel_path = f"images/{file}"
-                    zf.write(abs_path, arcname=rel_path)
-                        
+        os.replace(partial_zip_path, zip_path)
+        if delta:
+            os.replace(partial_delta_path, delta_path)
+        manifest.write_manifest(
+            os.path.join(OUTPUT_DIR, manifest.manifest_name(section_prefix, timestamp_str)),
+            manifest.build_manifest(section_prefix, zip_name, timestamp_str, cleaned_news, images))
         print(f"  [✓] 打包完成。")
-        update_latest_version(section_prefix.lower(), zip_name)
+        update_latest_version(section_prefix.lower(), zip_name, delta)
         
         return True
 
     finally:
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+        for path in (partial_zip_path, partial_delta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+def prefetch_item_image(item):
+    """AI 流式输出每完成一条新闻就提前下载其图片（打包时直接取结果）"""
+    image_utils.prefetch(item.get("image", ""))
 
 # --- HOME NEWS PIPELINE ---
 def run_home_news(count=9):
@@ -161,7 +276,8 @@ def run_home_news(count=9):
     
     try:
         # 调用主流程，传入新闻数量参数
-        polished = home_polish.main(count=count)
+        polished = home_polish.main(count=count, update_history=False,
+                                    on_item=prefetch_item_image)
         
         if not polished or "news" not in polished:
             print("  [!] 国内新闻润色失败。")
@@ -183,7 +299,7 @@ def run_world_news(count=9):
     
     try:
         # 调用主流程，传入新闻数量参数（使用 limit 参数名）
-        world_polish.main(limit=count)
+        world_polish.main(limit=count, update_history=False, on_item=prefetch_item_image)
         
         # 从 worldnews/output 读取最新生成的文件
         worldnews_output = os.path.join(os.path.dirname(__file__), "worldnews", "output")
@@ -221,7 +337,7 @@ def run_entertainment_news(count=9):
     
     try:
         # 调用主流程，传入新闻数量参数
-        polished_data = ent_polish.aggregate_news(count=count)
+        polished_data = ent_polish.aggregate_news(count=count, update_history=False)
         
         if not polished_data or not polished_data.get("news"):
             print("  [!] 娱乐新闻聚合失败。")
@@ -235,13 +351,68 @@ def run_entertainment_news(count=9):
         traceback.print_exc()
         return None
 
+# 板块名称 -> 采集/润色入口, 历史库写入
+SECTIONS = [
+    ("Home", run_home_news, home_polish.save_history),
+    ("World", run_world_news, world_polish.save_history),
+    ("Entertainment", run_entertainment_news, ent_polish.save_history),
+]
+
+def run_section(section_prefix, runner, save_history, count, timestamp_str):
+    """
+    执行单个板块：采集 + 润色完成后立即打包，不等待其他板块
+    打包成功后才写入历史库：打包失败重跑时历史不变，润色请求可直接命中 AI 响应缓存
+    :return: True 打包成功，False 失败
+    """
+    polished = runner(count=count)
+    if not polished:
+        print(f"  [!] {section_prefix} 无可打包数据，跳过。")
+        return False
+    # package_section 会改写 image 字段，历史库只需要标题与正文，先取一份
+    history_items = [dict(item) for item in polished.get("news", []) if item.get("rank", 0) > 0]
+    if not package_section(section_prefix, polished, timestamp_str):
+        return False
+    print(f"  [{section_prefix}] 正在更新历史库...")
+    save_history(history_items)
+    return True
+
+def run_sections_concurrently(count, timestamp_str, max_workers=SECTION_WORKERS):
+    """
+    并发调度三大板块，单个板块失败不影响其他板块
+    :param count: 每个平台抓取的新闻数量
+    :param timestamp_str: 全局打包时间戳
+    :param max_workers: 并发板块数
+    :return: {section_prefix: 是否成功}
+    """
+    max_workers = max(1, min(max_workers, len(SECTIONS)))
+    print(f"  并发板块数: {max_workers}")
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section") as executor:
+        futures = {
+            executor.submit(run_section, prefix, runner, save_history, count, timestamp_str): prefix
+            for prefix, runner, save_history in SECTIONS
+        }
+        for future in as_completed(futures):
+            prefix = futures[future]
+            try:
+                results[prefix] = bool(future.result())
+            except Exception as e:
+                print(f"  [!] {prefix} 板块异常: {e}")
+                traceback.print_exc()
+                results[prefix] = False
+            status = "✓" if results[prefix] else "✗"
+            print(f"  [{status}] {prefix} 板块结束")
+    
+    return results
+
 def cleanup_output_directory():
     """
     清理 output 目录：
-    1. 删除其他非 ZIP、非 latest_versions.json、非 test_*.json 的文件
-    2. 对于每个平台（Home/World/Entertainment），只保留最新的 1 个 ZIP
+    1. 删除其他非 ZIP、非 latest_versions.json、非 test_*.json、非清单的文件
+    2. 对于每个平台（Home/World/Entertainment），只保留最新的 1 个 ZIP、1 个增量包与 1 份清单
     3. 保留最新的 3 个 test_*.json 调试文件（每个平台 1 个）
-    4. 最终结果：3 个最新 ZIP + 3 个 test JSON + latest_versions.json
+    4. 最终结果：3 个最新 ZIP + 增量包 + 清单 + 3 个 test JSON + latest_versions.json
     """
     print("\n" + "="*40)
     print("🧹 [Cleanup] 清理输出目录")
@@ -253,13 +424,14 @@ def cleanup_output_directory():
     
     all_files = os.listdir(OUTPUT_DIR)
     
-    # 1. 删除其他非 ZIP、非 latest_versions.json、非 test_*.json 的文件
+    # 1. 删除其他非 ZIP、非 latest_versions.json、非 test_*.json、非清单的文件
     print("  正在删除无效文件...")
     invalid_files = [
         f for f in all_files 
         if not f.endswith('.zip') 
         and f != 'latest_versions.json' 
         and not f.startswith('test_')
+        and not f.endswith(manifest.MANIFEST_SUFFIX)
         and not f.startswith('temp_')
         and not f.endswith('_history.json') # 防止误删历史记录文件
     ]
@@ -272,30 +444,38 @@ def cleanup_output_directory():
         except Exception as e:
             print(f"    [!] 删除失败 {f}: {e}")
     
-    # 2. 清理过期的 ZIP 包（每个平台只保留最新的 1 个）
+    # 2. 清理过期的 ZIP 包、增量包与清单（每个平台各只保留最新的 1 个）
     print("  正在清理过期 ZIP 包...")
     prefixes = ["Home_", "World_", "Entertainment_"]
     
     for prefix in prefixes:
-        zip_files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith(prefix) and f.endswith(".zip")]
-        
-        if not zip_files:
-            print(f"    {prefix}: 未找到 ZIP 文件")
-            continue
-        
-        # 按时间戳倒序排序（最新的在前）
-        zip_files.sort(reverse=True)
+        all_names = os.listdir(OUTPUT_DIR)
+        groups = [
+            ("ZIP", [f for f in all_names if f.startswith(prefix) and f.endswith(".zip")
+                     and not f.endswith(manifest.DELTA_SUFFIX)]),
+            ("增量包", [f for f in all_names if f.startswith(prefix) and f.endswith(manifest.DELTA_SUFFIX)]),
+            ("清单", [f for f in all_names if f.startswith(prefix) and f.endswith(manifest.MANIFEST_SUFFIX)]),
+        ]
         
-        print(f"    {prefix}: 现有 {len(zip_files)} 个，保留最新 1 个")
-        
-        # 删除除了最新的以外的所有文件
-        for zip_file in zip_files[1:]:
-            try:
-                full_path = os.path.join(OUTPUT_DIR, zip_file)
-                os.remove(full_path)
-                print(f"      [✓] 删除旧版本: {zip_file}")
-            except Exception as e:
-                print(f"      [!] 删除失败 {zip_file}: {e}")
+        for kind, files in groups:
+            if not files:
+                if kind == "ZIP":
+                    print(f"    {prefix}: 未找到 ZIP 文件")
+                continue
+            
+            # 按时间戳倒序排序（最新的在前）
+            files.sort(reverse=True)
+            
+            print(f"    {prefix}: 现有 {len(files)} 个{kind}，保留最新 1 个")
+            
+            # 删除除了最新的以外的所有文件
+            for old_file in files[1:]:
+                try:
+                    full_path = os.path.join(OUTPUT_DIR, old_file)
+                    os.remove(full_path)
+                    print(f"      [✓] 删除旧版本: {old_file}")
+                except Exception as e:
+                    print(f"      [!] 删除失败 {old_file}: {e}")
     
     # 3. 清理过期的 test_*.json 调试文件（每个平台只保留最新的 1 个）
     print("  正在清理过期调试文件...")
@@ -323,6 +503,7 @@ def cleanup_output_directory():
     print("\n  最终文件状态：")
     remaining_files = os.listdir(OUTPUT_DIR)
     zip_count = 0
+    delta_count = 0
     test_count = 0
     
     for f in sorted(remaining_files):
@@ -337,12 +518,14 @@ def cleanup_output_directory():
                 size_str = f"{size} B"
             print(f"    ✓ {f} ({size_str})")
             
-            if f.endswith('.zip'):
+            if f.endswith(manifest.DELTA_SUFFIX):
+                delta_count += 1
+            elif f.endswith('.zip'):
                 zip_count += 1
             elif f.startswith('test_') and f.endswith('.json'):
                 test_count += 1
     
-    print(f"\n  [✓] 清理完成。保留 {zip_count} 个 ZIP + {test_count} 个调试文件 + latest_versions.json")
+    print(f"\n  [✓] 清理完成。保留 {zip_count} 个 ZIP + {delta_count} 个增量包 + {test_count} 个调试文件 + latest_versions.json")
 
 def cleanup_intermediate_dirs():
     """清理临时目录"""
@@ -376,32 +559,28 @@ def main():
     # 配置：每个平台抓取的新闻数量
     news_count = 9
     
-    # 运行三大板块，只传入新闻数量参数
+    # 并发运行三大板块：每个板块润色完成后立即打包（使用全局时间戳命名 ZIP）
     print("\n" + "="*50)
-    print("📋 启动各平台数据采集和润色")
+    print("📋 启动各平台数据采集、润色与打包")
     print("="*50)
     
-    home_data = run_home_news(count=news_count)
-    world_data = run_world_news(count=news_count)
-    ent_data = run_entertainment_news(count=news_count)
+    results = run_sections_concurrently(news_count, timestamp)
     
-    # 打包阶段：使用时间戳为 ZIP 命名
     print("\n" + "="*50)
-    print("📦 启动数据打包阶段")
+    print("📦 板块执行结果")
     print("="*50)
-    
-    if home_data:
-        package_section("Home", home_data, timestamp)
-    
-    if world_data:
-        package_section("World", world_data, timestamp)
-    
-    if ent_data:
-        package_section("Entertainment", ent_data, timestamp)
+    for prefix, _, _ in SECTIONS:
+        status = "✓ 成功" if results.get(prefix) else "✗ 失败"
+        print(f"  {prefix}: {status}")
     
     # 收尾
     cleanup_output_directory()
     cleanup_intermediate_dirs()
+    browser_pool.shutdown()
+    image_utils.shutdown_prefetch()
+    http_client.close()
+    image_cache.flush()
+    article_cache.flush()
     
     print("\n" + "#"*50)
     print("✅ 全流程任务执行完毕！")
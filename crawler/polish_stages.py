@@ -0,0 +1,139 @@
+"""
+两段式润色（home / world 共用的调用流程，提示词由各板块提供）
+1. 选择：一次短调用只返回选中候选的 id（与 ent_polish 的 selected_indices 相同思路）
+2. 改写：对每条选中新闻并发发起独立调用（翻译、缩写），每完成一条立即回调
+3. 总结：最后一次短调用根据改写后的标题生成 Rank 0 标题
+总耗时约为 选择 + 最慢的单条改写 + 总结，而不是整份长输出逐 token 生成的时间
+每次调用都走 AI 响应缓存；任一阶段失败返回 None，由调用方退回单次调用模式
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import deepseek_client
+import llm_cache
+import prompt_builder
+
+# 润色模式：two_stage（两段式）或 single（单次调用完成全部工作）
+MODE = os.getenv("POLISH_MODE", "two_stage")
+# 单条改写的并发数
+REWRITE_WORKERS = int(os.getenv("POLISH_REWRITE_WORKERS", "9"))
+# 选择/总结调用的时限（秒），单条改写的时限
+SHORT_DEADLINE = float(os.getenv("POLISH_SHORT_DEADLINE", "45"))
+REWRITE_DEADLINE = float(os.getenv("POLISH_REWRITE_DEADLINE", "60"))
+
+def enabled():
+    return MODE == "two_stage"
+
+def call_json(label, messages, api_key, namespace, version, model="deepseek-chat",
+              max_tokens=None, deadline=SHORT_DEADLINE):
+    """
+    单次 JSON 输出调用（带响应缓存）
+    :return: 解析后的 dict；失败或输出不完整返回 None
+    """
+    body = {
+        "model": model,
+        "messages": messages,
+        "temperature": 0.3,
+        "response_format": {"type": "json_object"},
+    }
+    if max_tokens:
+        body["max_tokens"] = max_tokens
+    key = llm_cache.make_key(namespace, body, version)
+    try:
+        content = llm_cache.get(key)
+        fresh = content is None
+        if fresh:
+            content, usage, _, complete = deepseek_client.chat(body, api_key, deadline=deadline)
+            prompt_builder.log_usage(label, messages, {"usage": usage}, completion_text=content)
+            if not complete:
+                print(f"  [!] {label}: 输出不完整")
+                return None
+        data = json.loads(content.replace("```json", "").replace("```", "").strip())
+    except Exception as e:
+        print(f"  [!] {label} 调用失败: {type(e).__name__} - {str(e)[:80]}")
+        return None
+    if not isinstance(data, dict):
+        return None
+    # 只保存新请求的结果（命中缓存时不重写，避免延长有效期）
+    if fresh:
+        llm_cache.put(key, content, namespace)
+    return data
+
+def select(label, messages, entries, count, api_key, namespace, version, model="deepseek-chat"):
+    """
+    选择阶段：模型返回 {"selected_ids": [...]}（按推荐顺序）
+    :return: 选中的精简候选列表（去重、剔除无效 id，最多 count 条）
+    """
+    data = call_json(f"{label}_select", messages, api_key, f"{namespace}_select", version,
+                     model=model, max_tokens=200)
+    if not data:
+        return []
+    by_id = {entry["id"]: entry for entry in entries}
+    chosen = []
+    for raw_id in data.get("selected_ids") or []:
+        try:
+            entry = by_id.get(int(raw_id))
+        except (TypeError, ValueError):
+            continue
+        if entry is not None and entry not in chosen:
+            chosen.append(entry)
+    return chosen[:count]
+
+def rewrite(label, chosen, build_messages, api_key, namespace, version, model="deepseek-chat",
+            on_item=None, max_workers=REWRITE_WORKERS):
+    """
+    改写阶段：每条选中新闻一个独立调用，模型返回 {"title": ..., "content": ...}
+    :param build_messages: build_messages(entry) -> messages
+    :param on_item: on_item(item)，每完成一条立即回调（在调用线程中）；回调条目不含 rank，
+                    最终名次要等全部改写结束、跳过失败条目后才确定
+    :return: [{"rank", "id", "title", "content"}, ...]，按选择顺序排列，失败的条目跳过
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chosen))),
+                            thread_name_prefix="rewrite") as executor:
+        futures = {
+            executor.submit(call_json, f"{label}_rewrite#{entry['id']}", build_messages(entry), api_key,
+                            f"{namespace}_rewrite", version, model, 400, REWRITE_DEADLINE): (rank, entry)
+            for rank, entry in enumerate(chosen, 1)
+        }
+        for future in as_completed(futures):
+            rank, entry = futures[future]
+            data = future.result()
+            if not data or not data.get("title"):
+                print(f"  [!] {label}: 第 {rank} 条（id={entry['id']}）改写失败，已跳过")
+                continue
+            item = {"id": entry["id"], "title": data["title"], "content": data.get("content", "")}
+            if on_item:
+                on_item(dict(item))
+            results[rank] = item
+    # 跳过失败条目后按选择顺序连续编号
+    return [{"rank": rank, **results[position]} for rank, position in enumerate(sorted(results), 1)]
+
+def run(label, entries, count, api_key, namespace, version, select_messages, build_rewrite_messages,
+        build_headline_messages, model="deepseek-chat", on_item=None):
+    """
+    两段式润色完整流程
+    :param entries: prompt_builder.fit_candidates 返回的精简候选（含 id）
+    :param select_messages: 选择阶段的 messages
+    :param build_rewrite_messages: build_rewrite_messages(entry) -> 单条改写的 messages
+    :param build_headline_messages: build_headline_messages(items) -> 总结标题的 messages
+    :return: [Rank 0, Rank 1..n]（条目带 id，原始字段由调用方回填）；失败返回 None
+    """
+    print(f"  [*] {label}: 两段式润色（选择 -> 并发改写 -> 总结标题）")
+    chosen = select(label, select_messages, entries, count, api_key, namespace, version, model)
+    if not chosen:
+        print(f"  [!] {label}: 选择阶段没有返回有效 id")
+        return None
+    print(f"  [✓] {label}: 选中 {len(chosen)} 条，开始并发改写")
+
+    items = rewrite(label, chosen, build_rewrite_messages, api_key, namespace, version, model, on_item)
+    if not items:
+        return None
+
+    headline = call_json(f"{label}_headline", build_headline_messages(items), api_key,
+                         f"{namespace}_headline", version, model=model, max_tokens=100)
+    title = (headline or {}).get("title") or items[0]["title"]
+    print(f"  [✓] {label}: 改写完成 {len(items)}/{len(chosen)} 条，总结标题: {title}")
+    return [{"rank": 0, "id": None, "title": title, "content": ""}] + items
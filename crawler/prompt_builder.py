@@ -0,0 +1,131 @@
+"""
+DeepSeek 提示词构建（按 token 预算装入候选与历史）
+- 估算 token：中日韩字符约 0.6 token/字，其余约 0.3 token/字符（偏保守，无需分词器）
+- 候选按优先级装入预算：各抓取平台（author）轮流取（来源多样性），平台内按榜单排名、热度指数
+- 每条候选只发送模型需要阅读的字段并分配短编号 id；链接、图片、原文等由调用方按 id 从原始候选恢复
+- 历史从最新往前装入预算
+- JSON 一律紧凑输出（不缩进）；每次调用记录提示词与输出大小
+"""
+
+import json
+import math
+import os
+import re
+
+# 候选与历史各自的 token 预算
+CANDIDATE_BUDGET = int(os.getenv("PROMPT_CANDIDATE_TOKENS", "9000"))
+HISTORY_BUDGET = int(os.getenv("PROMPT_HISTORY_TOKENS", "2000"))
+
+_CJK_RE = re.compile(r'[　-ヿ㐀-䶿一-鿿가-힯＀-￯]')
+
+def estimate_tokens(text):
+    """粗略估算 token 数"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return math.ceil(cjk * 0.6 + (len(text) - cjk) * 0.3)
+
+def compact_json(data):
+    """紧凑 JSON（不缩进、无多余空格）"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def truncate(text, max_chars):
+    text = (text or "").strip()
+    return text if len(text) <= max_chars else text[:max_chars] + "..."
+
+def _hotness(item):
+    try:
+        return float(item.get("index") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _rank(item):
+    try:
+        return int(item.get("rank") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def prioritize(candidates):
+    """
+    各抓取平台轮流取：每个平台先出排名最靠前（同名次热度更高）的一条
+    :return: 原始候选的下标列表（优先级从高到低）
+    """
+    by_source = {}
+    for position, item in enumerate(candidates):
+        source = item.get("author") or item.get("source_platform") or ""
+        by_source.setdefault(source, []).append(position)
+    queues = [sorted(positions, key=lambda p: (_rank(candidates[p]), -_hotness(candidates[p]), p))
+              for positions in by_source.values()]
+    order = []
+    while any(queues):
+        for queue in queues:
+            if queue:
+                order.append(queue.pop(0))
+    return order
+
+def fit_candidates(candidates, to_entry, budget=CANDIDATE_BUDGET):
+    """
+    按优先级装入候选，直到预算用完
+    :param to_entry: to_entry(candidate) -> 发送给模型的精简 dict（不含 id）
+    :return: (entries, id -> 原始候选)；entries 保持原始候选顺序，id 为原始下标
+    """
+    picked, used = [], 0
+    for position in prioritize(candidates):
+        entry = {"id": position, **to_entry(candidates[position])}
+        cost = estimate_tokens(compact_json(entry)) + 1
+        if used + cost > budget:
+            continue
+        picked.append((position, entry))
+        used += cost
+    picked.sort()
+    if len(picked) < len(candidates):
+        print(f"  [*] 提示词预算 {budget} tokens：装入 {len(picked)}/{len(candidates)} 条候选")
+    return [entry for _, entry in picked], {position: candidates[position] for position, _ in picked}
+
+def fit_history(lines, budget=HISTORY_BUDGET):
+    """从最新一条往前装入预算（lines 为时间升序），返回时间升序"""
+    kept, used = [], 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) < len(lines):
+        print(f"  [*] 历史预算 {budget} tokens：装入最近 {len(kept)}/{len(lines)} 条")
+    return list(reversed(kept))
+
+def lookup_candidate(item, candidates_by_id):
+    """按模型返回的 id 找回原始候选（id 缺失或无效时返回 None）"""
+    try:
+        return candidates_by_id.get(int(item.get("id")))
+    except (TypeError, ValueError):
+        return None
+
+def restore(items, candidates_by_id, fields):
+    """
+    按 id 从原始候选回填不经过模型的字段（链接、图片、原文等）并去掉 id
+    找不到原始候选的条目（如 rank 0）缺失字段补空串
+    """
+    for item in items:
+        original = lookup_candidate(item, candidates_by_id)
+        item.pop("id", None)
+        for field in fields:
+            if original is not None:
+                item[field] = original.get(field, "")
+            else:
+                item.setdefault(field, "")
+    return items
+
+def log_usage(label, messages, response_json=None, completion_text=None):
+    """
+    记录一次调用的大小：估算的提示词 token，以及 API 返回的实际用量（有则打印）
+    """
+    prompt_text = "".join(m.get("content", "") for m in messages)
+    line = f"  [tokens] {label}: 提示词 {len(prompt_text)} 字符 ≈ {estimate_tokens(prompt_text)} tokens"
+    usage = (response_json or {}).get("usage") or {}
+    if usage:
+        line += f"；实际 prompt={usage.get('prompt_tokens')} completion={usage.get('completion_tokens')}"
+    elif completion_text is not None:
+        line += f"；输出 {len(completion_text)} 字符 ≈ {estimate_tokens(completion_text)} tokens"
+    print(line)
@@ -0,0 +1,106 @@
+"""
+JSON 状态文件的原子读写（latest_versions.json、各板块历史库等）
+- 写入：同目录临时文件 -> fsync -> os.replace，进程被杀也不会留下半个文件
+- 读改写：update() 在文件锁（<path>.lock）内完成读取、修改、写回，
+  多个板块并发或多个进程同时更新同一文件时不会互相覆盖
+- 损坏的文件改名为 <path>.corrupt 保留现场，然后按默认值继续
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import msvcrt
+    MSVCRT_AVAILABLE = True
+except ImportError:
+    MSVCRT_AVAILABLE = False
+
+# 同一进程内按路径加锁（文件锁之外再加一层，Windows 上的 msvcrt 锁不可重入）
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+def _thread_lock(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+@contextmanager
+def locked(path):
+    """对 path 加进程内锁 + 跨进程文件锁（锁文件为 <path>.lock）"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with _thread_lock(path):
+        with open(f"{path}.lock", 'a+') as lock_file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            elif MSVCRT_AVAILABLE:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                elif MSVCRT_AVAILABLE:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _default(default):
+    return default() if callable(default) else default
+
+def read(path, default=None):
+    """
+    读取 JSON；文件不存在返回默认值，文件损坏则改名保留并返回默认值
+    :param default: 默认值或工厂函数（如 dict、list）
+    """
+    if not os.path.exists(path):
+        return _default(default)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"    [!] 状态文件损坏，已另存为 .corrupt: {os.path.basename(path)} ({type(e).__name__})")
+        try:
+            os.replace(path, f"{path}.corrupt")
+        except OSError:
+            pass
+        return _default(default)
+
+def write(path, data, indent=None):
+    """原子写入 JSON（不加锁；需要读改写时用 update）"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def update(path, mutate, default=None, indent=None):
+    """
+    加锁读改写
+    :param mutate: mutate(data) 原地修改或返回新值（返回 None 表示已原地修改）
+    :param default: 文件不存在或损坏时的初始值/工厂函数
+    :return: 写回的数据
+    """
+    with locked(path):
+        data = read(path, default)
+        result = mutate(data)
+        if result is not None:
+            data = result
+        write(path, data, indent=indent)
+        return data
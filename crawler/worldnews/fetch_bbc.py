@@ -3,21 +3,36 @@ BBC News Scraper
 抓取 BBC 国际新闻
 """
 import requests
-from bs4 import BeautifulSoup
 import re
+import os
+import sys
 import time
 import urllib3
 from urllib.parse import urljoin
 
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import html_parser
+import article_cache
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://www.bbc.com/news"
+
+# 详情页只解析用到的标签
+DETAIL_STRAINER = html_parser.only_tags('h1', 'article', 'main', 'meta')
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
 def fetch_article_details(url, max_retries=3):
-    """抓取文章详情（带重试机制）"""
+    """抓取文章详情（带重试机制，优先使用跨运行的文章缓存）"""
+    cached = article_cache.get(url)
+    if cached:
+        return {"title": cached["title"], "content": cached["content"], "image_url": cached["image"]}
+
     for attempt in range(max_retries):
         try:
             time.sleep(1 + attempt)  # 逐次增加延迟
@@ -25,9 +40,14 @@ def fetch_article_details(url, max_retries=3):
             if attempt > 0:
                 print(f"        (重试 {attempt}/{max_retries-1})")
             
-            response = requests.get(url, headers=HEADERS, verify=False, timeout=15)
+            headers = {**HEADERS, **article_cache.conditional_headers(url)}
+            response = http_client.get(url, headers=headers, verify=False, timeout=15)
+            if response.status_code == 304:
+                cached = article_cache.revalidated(url, response)
+                if cached:
+                    return {"title": cached["title"], "content": cached["content"], "image_url": cached["image"]}
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = html_parser.make_soup(response.text, parse_only=DETAIL_STRAINER)
 
             # 提取标题
             title_tag = soup.find('h1')
@@ -72,6 +92,9 @@ def fetch_article_details(url, max_retries=3):
             else:
                 print(f"        图片: (无)")
             
+            # 标题与正文都提取成功才缓存（版式变化或同意页下次运行重新抓取）
+            if title_tag and body_text.strip():
+                article_cache.store(url, {"title": title, "content": body_text, "image": image_url}, response)
             return {
                 "title": title,
                 "content": body_text,
@@ -126,9 +149,9 @@ def scrape(limit=10):
     data_list = []
     
     try:
-        response = requests.get(BASE_URL, headers=HEADERS, verify=False, timeout=15)
+        response = http_client.get(BASE_URL, headers=HEADERS, verify=False, timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = html_parser.make_soup(response.text)
         
         # 查找"Most Read"部分
         most_read_section = soup.find(attrs={'data-analytics_group_name': 'Most read'})
@@ -2,12 +2,17 @@
 CNN News Scraper
 抓取 CNN 国际新闻
 """
-import requests
-from bs4 import BeautifulSoup
 import re
+import sys
 import urllib3
-import time
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import html_parser
+import article_cache
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -18,6 +23,27 @@ HEADERS = {
 BASE_URL = 'https://edition.cnn.com'
 WORLD_URL = f'{BASE_URL}/world'
 
+# 详情页只解析用到的标签
+DETAIL_STRAINER = html_parser.only_tags('p', 'meta')
+
+# 目标分类（优先级顺序）
+TARGET_SECTIONS = [
+    "World",
+    "Travel",
+    "Style",
+    "Weather",
+    "Architecture",
+    "Sports",
+    "Tech",
+    "Asia",
+    "Americas",
+    "Europe",
+    "Middle East",
+]
+
+# 详情页并发抓取数
+DETAIL_WORKERS = 6
+
 def sanitize_filename(filename):
     """文件名安全处理"""
     return re.sub(r'[\\/*?:"<>|]', "", filename)
@@ -28,33 +54,42 @@ def absolute_url(url_path):
         return f"{BASE_URL}{url_path}"
     return url_path
 
-def extract_cards_from_section(soup, section_name):
+def is_heading_candidate(tag):
+    """可能是分类标题的元素：h2/h3，或 class 含 title/header 的 span/div/a"""
+    if tag.name in ('h2', 'h3'):
+        return True
+    if tag.name not in ('span', 'div', 'a'):
+        return False
+    classes = ' '.join(tag.get('class', []))
+    return 'title' in classes or 'header' in classes
+
+def find_heading_candidates(soup):
+    """遍历一次页面，收集分类标题候选及其小写文本（供各分类复用）"""
+    return [(tag, tag.get_text(strip=True).lower()) for tag in soup.find_all(is_heading_candidate)]
+
+def extract_cards_from_section(soup, section_name, heading_candidates=None):
     """从指定分类查找所有文章卡片"""
-    candidates = soup.find_all(['h2', 'span', 'div', 'h3', 'a'])
+    if heading_candidates is None:
+        heading_candidates = find_heading_candidates(soup)
+    section_key = section_name.lower()
     target_container = None
     
-    for candidate in candidates:
-        text = candidate.get_text(strip=True)
-        if section_name.lower() in text.lower():
-            classes = ' '.join(candidate.get('class', []))
-            is_title_class = 'title' in classes or 'header' in classes
-            is_heading_tag = candidate.name in ['h2', 'h3']
+    for candidate, text in heading_candidates:
+        if section_key in text:
+            current = candidate
+            possible_container = None
+            for _ in range(6):
+                current = current.parent
+                if not current:
+                    break
+                if current.find(class_=re.compile(r'card|container__item|cards-wrapper')):
+                    possible_container = current
+                    break
             
-            if is_title_class or is_heading_tag:
-                current = candidate
-                possible_container = None
-                for _ in range(6):
-                    current = current.parent
-                    if not current:
-                        break
-                    if current.find(class_=re.compile(r'card|container__item|cards-wrapper')):
-                        possible_container = current
-                        break
-                
-                if possible_container:
-                    target_container = possible_container
-                    if section_name.lower() == text.lower():
-                        break
+            if possible_container:
+                target_container = possible_container
+                if section_key == text:
+                    break
     
     if not target_container:
         return []
@@ -63,18 +98,18 @@ def extract_cards_from_section(soup, section_name):
     valid_cards = [card for card in all_cards if card.find('a')]
     return valid_cards
 
-def process_article_card(article_card, current_rank, processed_urls, section_name):
-    """提取卡片中的文章信息"""
+def parse_article_card(article_card, processed_urls):
+    """解析卡片中的链接、标题和列表图片（不发起网络请求）"""
     # 查找链接
     link_tag = article_card.find('a', class_=re.compile(r'container__link'))
     if not link_tag:
         link_tag = article_card.find('a', href=True)
     if not link_tag:
-        return None, current_rank
+        return None
 
     source_url = absolute_url(link_tag.get('href'))
     if not source_url or source_url in processed_urls:
-        return None, current_rank
+        return None
 
     # 提取标题
     title_span = article_card.find('span', class_='container__headline-text')
@@ -83,7 +118,7 @@ def process_article_card(article_card, current_rank, processed_urls, section_nam
     title = title_span.get_text(strip=True) if title_span else link_tag.get_text(strip=True)
     
     if not title or len(title) < 5:
-        return None, current_rank
+        return None
 
     # 提取图片
     img_tag = article_card.find('img', class_='image__dam-img')
@@ -97,33 +132,56 @@ def process_article_card(article_card, current_rank, processed_urls, section_nam
         elif 'data-src' in img_tag.attrs:
             img_url = absolute_url(img_tag.get('data-src'))
 
-    # 如果列表页没有图片，或者我们需要获取内容，进入详情页
+    return {
+        "source_url": source_url,
+        "title": title,
+        "image": img_url,
+    }
+
+def process_article_card(candidate, current_rank, section_name):
+    """访问详情页补全内容和图片，生成标准格式记录"""
+    source_url = candidate["source_url"]
+    title = candidate["title"]
+    img_url = candidate["image"]
+
+    # 强制进入详情页获取内容（列表页没有图片时同时补全图片），优先使用跨运行的文章缓存
     content = ""
     try:
-        if not img_url or True: # 强制进入详情页获取内容
+        cached = article_cache.get(source_url)
+        resp = None
+        if cached is None:
             print(f"      ℹ 访问详情页获取内容: {source_url[:60]}...")
-            resp = requests.get(source_url, headers=HEADERS, verify=False, timeout=10)
-            if resp.status_code == 200:
-                detail_soup = BeautifulSoup(resp.content, 'html.parser')
-                
-                # 获取图片
-                if not img_url:
-                    og_img = detail_soup.find('meta', property='og:image')
-                    if og_img:
-                        img_url = og_img.get('content', '')
-                        print(f"      ✓ 详情页获取图片成功")
-                
-                # 获取内容
-                # CNN 新闻内容通常在 class 包含 "article__content" 或 "paragraph" 的标签中
-                paragraphs = detail_soup.find_all('p', class_=re.compile(r'paragraph|article__content'))
-                if not paragraphs:
-                    paragraphs = detail_soup.find_all('p')
-                
-                if paragraphs:
-                    # 过滤掉太短的段落
-                    valid_paragraphs = [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 20]
-                    content = "\n\n".join(valid_paragraphs[:3])
-                    print(f"      ✓ 详情页获取内容成功 ({len(valid_paragraphs)} 段)")
+            headers = {**HEADERS, **article_cache.conditional_headers(source_url)}
+            resp = http_client.get(source_url, headers=headers, verify=False, timeout=10)
+            if resp.status_code == 304:
+                cached = article_cache.revalidated(source_url, resp)
+        if cached:
+            content = cached["content"]
+            img_url = img_url or cached["image"]
+        elif resp.status_code == 200:
+            detail_soup = html_parser.make_soup(resp.content, parse_only=DETAIL_STRAINER)
+            
+            # 获取图片（详情页图片一并缓存，列表页有图时仍优先列表页）
+            og_img = detail_soup.find('meta', property='og:image')
+            detail_img = og_img.get('content', '') if og_img else ""
+            if not img_url and detail_img:
+                img_url = detail_img
+                print(f"      ✓ 详情页获取图片成功")
+            
+            # 获取内容
+            # CNN 新闻内容通常在 class 包含 "article__content" 或 "paragraph" 的标签中
+            paragraphs = detail_soup.find_all('p', class_=re.compile(r'paragraph|article__content'))
+            if not paragraphs:
+                paragraphs = detail_soup.find_all('p')
+            
+            if paragraphs:
+                # 过滤掉太短的段落
+                valid_paragraphs = [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 20]
+                content = "\n\n".join(valid_paragraphs[:3])
+                print(f"      ✓ 详情页获取内容成功 ({len(valid_paragraphs)} 段)")
+            # 提取到正文才缓存
+            if content:
+                article_cache.store(source_url, {"title": title, "content": content, "image": detail_img}, resp)
     except Exception as e:
         print(f"      [!] 详情页内容获取失败: {type(e).__name__}")
 
@@ -147,7 +205,7 @@ def process_article_card(article_card, current_rank, processed_urls, section_nam
     print(f"    [{section_name}] ✓ {title[:70]}")
     if img_url:
         print(f"                     图片: {img_url}")
-    return data, current_rank + 1
+    return data
 
 def scrape(limit=10):
     """
@@ -159,38 +217,24 @@ def scrape(limit=10):
     """
     print("[CNN] 开始抓取新闻...")
     
-    # 定义目标分类（优先级顺序）
-    target_sections = [
-        "World",
-        "Travel",
-        "Style",
-        "Weather",
-        "Architecture",
-        "Sports",
-        "Tech",
-        "Asia",
-        "Americas",
-        "Europe",
-        "Middle East",
-    ]
-    
     try:
         print("[CNN] ℹ 正在加载页面...")
-        response = requests.get(WORLD_URL, headers=HEADERS, verify=False, timeout=20)
+        response = http_client.get(WORLD_URL, headers=HEADERS, verify=False, timeout=20)
         response.raise_for_status()
     except Exception as e:
         print(f"[CNN] ✗ 页面加载失败: {type(e).__name__}")
         return []
 
-    soup = BeautifulSoup(response.content, 'html.parser')
+    soup = html_parser.make_soup(response.content)
     
     # 第一步：收集所有分类的候选文章
     print("[CNN] 分析分类中...")
     section_queues = {}
     processed_urls = set()
+    heading_candidates = find_heading_candidates(soup)
     
-    for section_name in target_sections:
-        cards = extract_cards_from_section(soup, section_name)
+    for section_name in TARGET_SECTIONS:
+        cards = extract_cards_from_section(soup, section_name, heading_candidates)
         if cards:
             section_queues[section_name] = cards
             print(f"  ✓ '{section_name}': 找到 {len(cards)} 条候选")
@@ -201,15 +245,14 @@ def scrape(limit=10):
         print("[CNN] ✗ 未找到任何分类")
         return []
 
-    # 第二步：轮询选择（round-robin）
-    print(f"\n[CNN] 抓取中 (目标: {limit} 条)...")
-    scraped_data = []
-    rank = 1
+    # 第二步：轮询选择（round-robin），只解析卡片，不访问详情页
+    print(f"\n[CNN] 选择候选中 (目标: {limit} 条)...")
+    selected = []
     active_sections = list(section_queues.keys())
 
-    while len(scraped_data) < limit and active_sections:
+    while len(selected) < limit and active_sections:
         for section_name in list(active_sections):
-            if len(scraped_data) >= limit:
+            if len(selected) >= limit:
                 break
             
             queue = section_queues[section_name]
@@ -217,12 +260,11 @@ def scrape(limit=10):
             
             while queue:
                 card = queue.pop(0)
-                article_data, new_rank = process_article_card(card, rank, processed_urls, section_name)
+                candidate = parse_article_card(card, processed_urls)
                 
-                if article_data:
-                    scraped_data.append(article_data)
-                    processed_urls.add(article_data["source_url"])
-                    rank = new_rank
+                if candidate:
+                    selected.append((candidate, section_name))
+                    processed_urls.add(candidate["source_url"])
                     article_found = True
                     break
             
@@ -230,5 +272,14 @@ def scrape(limit=10):
                 # 该分类已无可用文章
                 active_sections.remove(section_name)
 
+    # 第三步：并发抓取详情页，按选择顺序输出排名
+    print(f"\n[CNN] 抓取详情中 ({len(selected)} 条, 并发 {DETAIL_WORKERS})...")
+    with ThreadPoolExecutor(max_workers=DETAIL_WORKERS) as executor:
+        futures = [
+            executor.submit(process_article_card, candidate, rank, section_name)
+            for rank, (candidate, section_name) in enumerate(selected, 1)
+        ]
+        scraped_data = [future.result() for future in futures]
+
     print(f"\n[CNN] ✓ 抓取完成，共 {len(scraped_data)} 条新闻\n")
     return scraped_data
@@ -3,17 +3,27 @@ New York Times News Scraper
 抓取纽约时报国际新闻
 """
 import requests
-from bs4 import BeautifulSoup
 import re
+import os
+import sys
 import time
 import urllib3
 from urllib.parse import urljoin
 
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import html_parser
+import article_cache
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://www.nytimes.com"
 WORLD_URL = "https://www.nytimes.com/section/world"
 
+# 详情页只解析用到的标签
+DETAIL_STRAINER = html_parser.only_tags('section', 'p', 'meta')
+
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
@@ -27,7 +37,11 @@ HEADERS = {
 }
 
 def fetch_article_content_full(url, max_retries=3):
-    """获取文章完整内容和图片（带重试机制）"""
+    """获取文章完整内容和图片（带重试机制，优先使用跨运行的文章缓存）"""
+    cached = article_cache.get(url)
+    if cached:
+        return cached["content"], cached["image"]
+
     for attempt in range(max_retries):
         try:
             time.sleep(2 + attempt)
@@ -35,9 +49,14 @@ def fetch_article_content_full(url, max_retries=3):
             if attempt > 0:
                 print(f"        (重试 {attempt}/{max_retries-1})")
             
-            response = requests.get(url, headers=HEADERS, verify=False, timeout=10)
+            headers = {**HEADERS, **article_cache.conditional_headers(url)}
+            response = http_client.get(url, headers=headers, verify=False, timeout=10)
+            if response.status_code == 304:
+                cached = article_cache.revalidated(url, response)
+                if cached:
+                    return cached["content"], cached["image"]
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = html_parser.make_soup(response.text, parse_only=DETAIL_STRAINER)
             
             # 提取内容
             article_body = soup.find('section', attrs={'name': 'articleBody'})
@@ -65,6 +84,9 @@ def fetch_article_content_full(url, max_retries=3):
             print(f"    [✓] 内容获取成功")
             if image_url:
                 print(f"        图片: {image_url}")
+            # 提取到正文才缓存
+            if content:
+                article_cache.store(url, {"content": content, "image": image_url}, response)
             return content, image_url
             
         except requests.exceptions.HTTPError as e:
@@ -111,9 +133,9 @@ def scrape(limit=10):
     
     try:
         print("[NYTimes] ℹ 正在加载页面...")
-        response = requests.get(WORLD_URL, headers=HEADERS, verify=False, timeout=15)
+        response = http_client.get(WORLD_URL, headers=HEADERS, verify=False, timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = html_parser.make_soup(response.text)
     except Exception as e:
         print(f"[NYTimes] ✗ 页面加载失败: {type(e).__name__}")
         return []
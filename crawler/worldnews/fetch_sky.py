@@ -3,12 +3,19 @@ Sky News Scraper
 抓取 Sky News 国际新闻
 """
 import requests
-from bs4 import BeautifulSoup
 import re
+import os
+import sys
 import time
 import urllib3
 from urllib.parse import urljoin
 
+# 公共模块（http_client 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import html_parser
+import article_cache
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://news.sky.com"
@@ -18,7 +25,11 @@ HEADERS = {
 }
 
 def fetch_article_details(url, max_retries=3):
-    """抓取文章详情（带重试机制）"""
+    """抓取文章详情（带重试机制，优先使用跨运行的文章缓存）"""
+    cached = article_cache.get(url)
+    if cached:
+        return {"title": cached["title"], "content": cached["content"], "image_url": cached["image"]}
+
     for attempt in range(max_retries):
         try:
             time.sleep(1 + attempt)
@@ -26,9 +37,14 @@ def fetch_article_details(url, max_retries=3):
             if attempt > 0:
                 print(f"        (重试 {attempt}/{max_retries-1})")
             
-            response = requests.get(url, headers=HEADERS, verify=False, timeout=15)
+            headers = {**HEADERS, **article_cache.conditional_headers(url)}
+            response = http_client.get(url, headers=headers, verify=False, timeout=15)
+            if response.status_code == 304:
+                cached = article_cache.revalidated(url, response)
+                if cached:
+                    return {"title": cached["title"], "content": cached["content"], "image_url": cached["image"]}
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = html_parser.make_soup(response.text)
 
             # 提取标题
             title_tag = soup.find('h1', class_='sdc-article-header__title')
@@ -81,6 +97,9 @@ def fetch_article_details(url, max_retries=3):
             else:
                 print(f"        图片: (无)")
             
+            # 标题与正文都提取成功才缓存（退回副标题的结果下次运行重新抓取）
+            if title_tag and body_text.strip():
+                article_cache.store(url, {"title": title, "content": final_content, "image": image_url}, response)
             return {
                 "title": title,
                 "content": final_content,
@@ -130,9 +149,9 @@ def scrape(limit=10):
     
     try:
         print("[Sky News] ℹ 正在加载页面...")
-        response = requests.get(BASE_URL, headers=HEADERS, verify=False, timeout=15)
+        response = http_client.get(BASE_URL, headers=HEADERS, verify=False, timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = html_parser.make_soup(response.text)
         
         # 查找"Most Read"部分
         # 方法1: 使用 data-testid 属性
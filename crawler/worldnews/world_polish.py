@@ -3,13 +3,22 @@ World News Polish Script
 国际新闻润色与聚合主程序
 """
 import os
+import sys
 import json
-import requests
 import argparse
 import shutil
 from datetime import datetime
 from dotenv import load_dotenv
 
+# 公共模块（state_store 等）位于 crawler/ 目录
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import history_store
+import llm_cache
+import dedup
+import prompt_builder
+import deepseek_client
+import polish_stages
+
 # Import scrapers
 try:
     from . import fetch_bbc
@@ -27,12 +36,15 @@ load_dotenv()
 
 # --- Configuration ---
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-API_URL = "https://api.deepseek.com/chat/completions"
 MODEL_NAME = "deepseek-chat"
 
-HISTORY_FILE = os.path.join(os.path.dirname(__file__), "worldnews_history.json")
+# 历史库分区：当前目录的 worldnews_history.jsonl
+HISTORY = history_store.open_section(os.path.dirname(os.path.abspath(__file__)), "worldnews")
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
-MAX_HISTORY_SIZE = 36  # 历史库最大容量
+# 单条候选发送给 AI 的英文正文上限（字符）
+CONTENT_CHAR_LIMIT = int(os.getenv("WORLD_PROMPT_CONTENT_CHARS", "1200"))
+# 不经过 AI、按 id 从原始候选回填的字段
+RESTORED_FIELDS = ("title0", "content0", "source_platform", "source_url", "index", "author", "image")
 
 # V2 Prompt Template
 V2_PROMPT_TEMPLATE = """
@@ -75,33 +87,12 @@ V2_PROMPT_TEMPLATE = """
 输出格式要求（必须严格遵守 JSON 格式）
 你必须输出一个包含 10 条数据的列表（Rank 0 为总结 + Rank 1-9 为 9 条精选新闻）。
 
-注意：Rank 0 需要包含所有字段，但 content、title0、source_platform、source_url、index、author、image 都留空。
+每条输入新闻都有编号 id，对选中的每条新闻必须原样返回其 id，不得编造或改动；原始标题、原文、链接、图片、热度等字段无需返回，程序会按 id 从原始数据回填。
+注意：Rank 0 的 id 为 null，content 留空。
 
 [
-  {{
-    "rank": 0,
-    "title": "爆炸性中文总结标题！或？",
-    "title0": "",
-    "content": "",
-    "content0": "",
-    "index": 0,
-    "author": "",
-    "source_platform": "",
-    "source_url": "",
-    "image": ""
-  }},
-  {{
-    "rank": 1,
-    "title": "中文新闻标题",
-    "title0": "原始英文标题",
-    "source_platform": "来源平台",
-    "source_url": "原始链接",
-    "content": "50字以内中文正文",
-    "content0": "直接复制输入数据中该条新闻的 content0 字段，必须保持原样，不得翻译或修改",
-    "index": 热度指数,
-    "author": "平台名称",
-    "image": "图片URL"
-  }},
+  {{"rank": 0, "id": null, "title": "爆炸性中文总结标题！或？", "content": ""}},
+  {{"rank": 1, "id": 7, "title": "中文新闻标题", "content": "50字以内中文正文"}},
   ... (直到 Rank 9)
 ]
 
@@ -109,6 +100,37 @@ V2_PROMPT_TEMPLATE = """
 {news_data}
 """
 
+# 两段式润色（见 polish_stages）：选择 / 单条翻译改写 / 总结标题
+SELECT_COUNT = 9
+
+SELECT_PROMPT = """你是一名专业的中文国际新闻编辑。请从输入的英文候选新闻（JSON 列表，每条带编号 id）中，通过事件级去重与筛选，选出 {count} 条"完全不同新闻事件"的国际新闻。
+
+【历史排重参考】以下是历史库中的新闻，选出的新闻不得与其中任何一条为同一事件（包括同一事件的不同报道）：
+{history_context_str}
+
+⚠️ 必须剔除：涉及中国国内的政治、法律、政府决策；涉及中国军事、国防、领土争议。
+保留的新闻应侧重于：全球科技与商业、重大国际地缘政治（非中国相关）、民生与社会热点、文化、体育、奇闻；尽量覆盖不同来源。
+
+只输出 JSON：{{"selected_ids": [按推荐顺序排列的 id]}}
+"""
+
+REWRITE_PROMPT = """你是一名专业的中文国际新闻编辑。请将输入的一条英文新闻（JSON）翻译并改写为中文精选内容：
+- 使用专业、正式的新闻体，不得虚构原文没有的信息。
+- 标题不超过 20 个汉字。
+- 正文不超过 50 个汉字，只保留"发生了什么 + 关键结果"。
+
+只输出 JSON：{"title": "中文标题", "content": "中文正文"}
+"""
+
+HEADLINE_PROMPT = """你是一名资深中文网络媒体编辑，擅长从大量热点新闻中提炼高度吸引眼球但不造谣、不歪曲事实的标题。
+请根据输入的本期国际新闻标题列表（JSON），生成一个总结性热点标题，用于 Rank 0 位置：
+- 允许"标题党"，追求点击率与传播力，但不得虚构事实、不得引入原文未出现的结论；
+- 不超过 10 个汉字（含标点），以感叹号（！）或问号（？）结尾；
+- 可以只抓住最具传播性的一个侧面，或借鉴常见爆款结构（如"突然""炸锅""定了""彻底""没想到"），但不得失真。
+
+只输出 JSON：{"title": "总结标题"}
+"""
+
 def extract_first_paragraph(content):
     """提取内容的第一段"""
     if not content:
@@ -136,39 +158,14 @@ def setup_directories():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def load_history():
-    """加载历史新闻记录"""
-    if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    return data
-                return []
-        except:
-            return []
-    return []
+    """加载最近的历史新闻记录（用于提示词）"""
+    return HISTORY.recent()
 
 def save_history(news_items):
-    """保存新闻到历史记录，维护最大容量36条"""
+    """追加本次发布的新闻到历史库（跳过 rank 0）"""
     try:
-        history = load_history()
-        
-        # 添加新新闻到历史库
-        for item in news_items:
-            if item.get('rank', 0) > 0:  # 跳过 rank 0
-                history.append({
-                    'title': item.get('title'),
-                    'title0': item.get('title0', ''),
-                    'date': datetime.now().strftime('%Y-%m-%d')
-                })
-        
-        # 只保留最近 36 条
-        history = history[-MAX_HISTORY_SIZE:]
-        
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
-            
-        print(f"[✓] 历史库已更新，当前包含 {len(history)} 条记录")
+        total = HISTORY.add([item for item in news_items if item.get('rank', 0) > 0])
+        print(f"[✓] 历史库已更新，当前包含 {total} 条记录")
     except Exception as e:
         print(f"[!] 保存历史记录失败: {e}")
 
@@ -251,89 +248,123 @@ def run_scrapers(limit=10):
     print("="*50)
     return all_news
 
-def call_deepseek(all_news, history_context=[]):
-    """调用 DeepSeek API 进行筛选、翻译和润色"""
+def call_deepseek(all_news, history_context=[], on_item=None):
+    """
+    调用 DeepSeek API 进行筛选、翻译和润色（流式输出）
+    :param on_item: on_item(item)，每生成完一条新闻（已回填原始字段）立即回调
+    """
     print("\n" + "="*50)
     print("🤖 调用 DeepSeek AI 进行内容处理")
     print("="*50)
     
-    # Format History
+    # 历史与候选各自装入 token 预算：历史从最新往前取，候选按平台轮流、排名与热度优先
     history_str = "无历史记录"
-    if history_context:
-        history_lines = [
-            f"- {h.get('title')} / {h.get('title0', '')} ({h.get('date')})" 
-            for h in history_context
-        ]
+    history_lines = prompt_builder.fit_history([
+        f"- {h.get('title')} / {h.get('title0', '')} ({h.get('date')})"
+        for h in history_context
+    ])
+    if history_lines:
         history_str = "\n".join(history_lines)
+
+    def to_entry(item):
+        return {
+            "title": item.get('title0') or item.get('title', ''),
+            "content": prompt_builder.truncate(item.get('content', ''), CONTENT_CHAR_LIMIT),
+            "source_platform": item.get('source_platform', ''),
+        }
+
+    news_entries, candidates_by_id = prompt_builder.fit_candidates(all_news, to_entry)
+
+    print(f"输入: {len(news_entries)}/{len(all_news)} 条候选新闻")
+    print(f"历史: {len(history_lines)}/{len(history_context)} 条记录")
     
-    print(f"输入: {len(all_news)} 条候选新闻")
-    print(f"历史: {len(history_context)} 条记录")
-    
-    # 构造 Prompt
-    news_json_str = json.dumps(all_news, ensure_ascii=False, indent=2)
+    # 构造 Prompt（紧凑 JSON）
     prompt = V2_PROMPT_TEMPLATE.format(
-        news_data=news_json_str,
+        news_data=prompt_builder.compact_json(news_entries),
         history_context_str=history_str
     )
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}"
-    }
-    
     data = {
         "model": MODEL_NAME,
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.3,
     }
 
+    # 相同模型/提示词/候选/历史直接复用上次通过校验的响应
+    cache_key = llm_cache.make_key("world_polish", data, llm_cache.template_version(V2_PROMPT_TEMPLATE))
+
+    def forward(item):
+        if on_item:
+            on_item(prompt_builder.restore([dict(item)], candidates_by_id, RESTORED_FIELDS)[0])
+
+    # 两段式：短选择调用 + 并发单条翻译改写 + 总结标题；任一阶段失败时退回单次调用
+    if polish_stages.enabled():
+        final_data = polish_stages.run(
+            "world_polish", news_entries, SELECT_COUNT, DEEPSEEK_API_KEY, "world_polish",
+            llm_cache.template_version(SELECT_PROMPT, REWRITE_PROMPT, HEADLINE_PROMPT),
+            select_messages=[
+                {"role": "system", "content": SELECT_PROMPT.format(count=SELECT_COUNT, history_context_str=history_str)},
+                {"role": "user", "content": prompt_builder.compact_json(news_entries)}
+            ],
+            build_rewrite_messages=lambda entry: [
+                {"role": "system", "content": REWRITE_PROMPT},
+                {"role": "user", "content": prompt_builder.compact_json({k: v for k, v in entry.items() if k != "id"})}
+            ],
+            build_headline_messages=lambda items: [
+                {"role": "system", "content": HEADLINE_PROMPT},
+                {"role": "user", "content": prompt_builder.compact_json([item["title"] for item in items])}
+            ],
+            model=MODEL_NAME, on_item=forward)
+        if final_data:
+            prompt_builder.restore(final_data, candidates_by_id, RESTORED_FIELDS)
+            final_data[0]['index'] = 0
+            print(f"[✓] DeepSeek 返回 {len(final_data)} 条结果")
+            return final_data
+        print("[!] 两段式润色失败，改用单次调用")
+
     try:
-        print("正在请求 DeepSeek API...")
-        response = requests.post(API_URL, headers=headers, json=data, timeout=120)
-        response.raise_for_status()
-        result = response.json()
-        content_str = result['choices'][0]['message']['content']
-        
-        # Cleanup markdown
-        content_str = content_str.replace("```json", "").replace("```", "").strip()
-        
-        # Simple JSON repair
-        if content_str.startswith("{") and "}{" in content_str:
-            content_str = f"[{content_str.replace('}{', '},{')}]"
-        elif not content_str.startswith("["):
-            start = content_str.find("[")
-            end = content_str.rfind("]")
-            if start != -1 and end != -1:
-                content_str = content_str[start:end+1]
-        
-        final_data = json.loads(content_str)
+        raw_content = llm_cache.get(cache_key)
+        fresh = raw_content is None
+        complete = True
+        if fresh:
+            print("正在请求 DeepSeek API...")
+            raw_content, usage, final_data, complete = deepseek_client.chat(
+                data, DEEPSEEK_API_KEY, on_item=forward)
+            prompt_builder.log_usage("world_polish", data["messages"], {"usage": usage},
+                                     completion_text=raw_content)
+            if not complete:
+                print(f"[!] DeepSeek 输出不完整，使用已完整的 {len(final_data)} 条")
+        else:
+            prompt_builder.log_usage("world_polish", data["messages"], completion_text=raw_content)
+            # 缓存的输出同样按条目解析（兼容列表、{"news": [...]}、并列对象与 markdown 代码块）
+            final_data = deepseek_client.ItemStream().feed(raw_content)
         
-        if isinstance(final_data, dict):
-            if "news" in final_data:
-                final_data = final_data["news"]
-            else:
-                final_data = [final_data]
+        if not final_data:
+            raise ValueError("输出中没有可解析的新闻条目")
         
-        # 确保 Rank 0 包含所有字段
+        # 按 id 回填原始字段；Rank 0 补齐空字段
+        prompt_builder.restore(final_data, candidates_by_id, RESTORED_FIELDS)
         if final_data and final_data[0].get('rank') == 0:
             rank0 = final_data[0]
-            rank0.setdefault('title0', '')
             rank0.setdefault('content', '')
-            rank0.setdefault('index', 0)
-            rank0.setdefault('author', '')
-            rank0.setdefault('source_platform', '')
-            rank0.setdefault('source_url', '')
-            rank0.setdefault('image', '')
+            rank0['index'] = rank0.get('index') or 0
         
         print(f"[✓] DeepSeek 返回 {len(final_data)} 条结果")
+        # 只缓存新请求得到的完整输出（命中缓存时不重写，避免延长有效期）
+        if fresh and complete:
+            llm_cache.put(cache_key, raw_content, "world_polish")
         return final_data
         
     except Exception as e:
         print(f"[!] DeepSeek API 错误: {e}")
         return None
 
-def main(limit=9):
-    """主函数"""
+def main(limit=9, update_history=True, on_item=None):
+    """
+    主函数
+    :param update_history: 是否立即写入历史库（pipeline 在打包成功后再写）
+    :param on_item: AI 每生成完一条新闻立即回调（pipeline 借此提前下载图片）
+    """
     # 0. 清空输出目录
     clear_output_directory()
     
@@ -348,13 +379,18 @@ def main(limit=9):
         print("\n[!] 未获取到任何新闻，退出。")
         return None
     
+    # 2.1 本地预筛：英文候选与历史的英文原标题(title0)比对，装有句向量模型时再做跨语言比对
+    raw_news = dedup.filter_candidates(raw_news, HISTORY.within_days(), label="[World] ",
+                                       history_fields=("title0", "title"),
+                                       use_embeddings=True, min_keep=limit + 3)
+    
     # 2.5 预处理 content0 (提取原始第一段)
     print(f"\n[Pre-process] 正在为 {len(raw_news)} 条新闻提取原始第一段...")
     for item in raw_news:
         item['content0'] = extract_first_paragraph(item.get('content', ''))
     
     # 3. 调用 DeepSeek 处理
-    final_news = call_deepseek(raw_news, history_context=history)
+    final_news = call_deepseek(raw_news, history_context=history, on_item=on_item)
     
     if not final_news:
         print("\n[!] AI 处理失败，退出。")
@@ -380,8 +416,9 @@ def main(limit=9):
         print(f"\n[!] 保存文件失败: {e}")
         return None
     
-    # 5. 更新历史库
-    save_history(final_news)
+    # 5. 更新历史库（pipeline 在打包成功后再写）
+    if update_history:
+        save_history(final_news)
     
     # 6. 输出结果摘要
     print("\n" + "="*50)